@@ -0,0 +1,150 @@
+# acreage_report.py
+#
+# Flags parcels whose drawn boundary disagrees with the acreage on record.
+#
+# Tax records give acres and hundredths (Tax_Records.acres, acres_qtr) and
+# legal descriptions may give acres; parcel_geometry stores the geodesic area
+# of every mapped polygon.  A parcel is flagged when the two differ by more
+# than a fraction of the recorded acreage (and by more than a minimum number
+# of acres, so small lots are not flagged for drawing noise).
+#
+#   python acreage_report.py [--tolerance 0.1] [--min-acres 0.5] [--csv report.csv]
+
+import argparse
+import csv
+
+from db_utils import get_connection
+from parcel_geometry import GEOMETRY_TABLE, ensure_geometry, has_geometry_tables
+
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_MIN_ACRES = 0.5
+
+REPORT_COLUMNS = [
+    "record_type", "record_id", "legal_description_id", "person_id", "year", "description",
+    "geojson_id", "recorded_acres", "computed_acres", "difference", "ratio", "centroid_lon", "centroid_lat",
+]
+
+# Columns: record_type, record_id, legal_description_id, person_id, year, description,
+# acres, hundredths, geojson_id, area_acres, centroid_lon, centroid_lat
+TAX_ACREAGE_QUERY = f"""
+    SELECT 'Tax', t.record_id, NULL, t.people_id, t.year, t.description,
+           t.acres, t.acres_qtr, g.geojson_id, g.area_acres, g.centroid_lon, g.centroid_lat
+    FROM Tax_Records t
+    JOIN GeoJSONLink gl ON gl.record_type = 'Tax' AND gl.record_id = t.record_id
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = gl.geojson_id
+    WHERE g.area_acres IS NOT NULL AND NULLIF(t.acres, '') IS NOT NULL
+"""
+
+DEED_ACREAGE_QUERY = f"""
+    SELECT 'Deed', ld.deed_id, ld.description_id, NULL, d.execution_date, ld.description_text,
+           ld.acres, NULL, g.geojson_id, g.area_acres, g.centroid_lon, g.centroid_lat
+    FROM LegalDescriptions ld
+    JOIN Deeds d ON d.deed_id = ld.deed_id
+    JOIN GeoJSONLink gl ON gl.record_type = 'Deed' AND gl.legal_description_id = ld.description_id
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = gl.geojson_id
+    WHERE g.area_acres IS NOT NULL AND NULLIF(ld.acres, '') IS NOT NULL
+"""
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def recorded_acres(acres, hundredths=None):
+    """
+    Acreage as recorded: whole acres plus hundredths (the tax form's "100ths").
+
+    Returns:
+        float: None if the acreage is not a number.
+    """
+    total = _number(acres)
+    if total is None:
+        return None
+    extra = _number(hundredths)
+    return total + extra / 100 if extra else total
+
+
+def _has_column(cursor, table, column):
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    return column in [row[1] for row in cursor.fetchall()]
+
+
+def acreage_discrepancies(cursor, tolerance=DEFAULT_TOLERANCE, min_acres=DEFAULT_MIN_ACRES):
+    """
+    Find mapped parcels whose computed area disagrees with their recorded acres.
+
+    Args:
+        cursor: SQLite cursor object.
+        tolerance (float): Allowed difference as a fraction of the recorded acres.
+        min_acres (float): Differences up to this many acres are never flagged.
+
+    Returns:
+        list: One dict per flagged parcel, keyed by REPORT_COLUMNS, largest
+            ratio (computed / recorded, or its inverse) first.
+    """
+    if not has_geometry_tables(cursor):
+        return []
+    ensure_geometry(cursor)
+
+    rows = []
+    for table, query in (("Tax_Records", TAX_ACREAGE_QUERY), ("LegalDescriptions", DEED_ACREAGE_QUERY)):
+        if _has_column(cursor, table, "acres"):
+            cursor.execute(query)
+            rows += cursor.fetchall()
+
+    flagged = []
+    for (record_type, record_id, legal_description_id, person_id, year, description,
+         acres, hundredths, geojson_id, computed, centroid_lon, centroid_lat) in rows:
+        recorded = recorded_acres(acres, hundredths)
+        if not recorded or recorded <= 0:
+            continue
+        difference = computed - recorded
+        if abs(difference) <= max(tolerance * recorded, min_acres):
+            continue
+        ratio = computed / recorded
+        flagged.append(dict(zip(REPORT_COLUMNS, (
+            record_type, record_id, legal_description_id, person_id, year, description or "",
+            geojson_id, round(recorded, 2), round(computed, 2), round(difference, 2), round(ratio, 3),
+            centroid_lon, centroid_lat,
+        ))))
+
+    flagged.sort(key=lambda row: -max(row["ratio"], 1 / row["ratio"] if row["ratio"] else float("inf")))
+    return flagged
+
+
+def write_report(rows, path):
+    """Write flagged parcels to a CSV file."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag parcels whose mapped area disagrees with recorded acres.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed difference as a fraction of recorded acres (default 0.1)")
+    parser.add_argument("--min-acres", type=float, default=DEFAULT_MIN_ACRES,
+                        help="Never flag differences up to this many acres (default 0.5)")
+    parser.add_argument("--csv", help="Write the report to this CSV file")
+    args = parser.parse_args()
+
+    rows = acreage_discrepancies(get_connection().cursor(), args.tolerance, args.min_acres)
+    if args.csv:
+        write_report(rows, args.csv)
+        print(f"Wrote {len(rows)} flagged parcels to {args.csv}")
+        return
+
+    print(f"{'Record':<14} {'Year':<10} {'Recorded':>9} {'Computed':>9} {'Ratio':>7}  Description")
+    for row in rows:
+        record = f"{row['record_type']} {row['record_id']}"
+        print(f"{record:<14} {str(row['year'] or ''):<10} {row['recorded_acres']:>9.2f} "
+              f"{row['computed_acres']:>9.2f} {row['ratio']:>7.3f}  {row['description'][:50]}")
+    print(f"{len(rows)} parcels flagged.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+# ancestry.py
+#
+# Ancestors, descendants and relationships over People.father/People.mother.
+#
+# Each question is answered by one recursive CTE instead of one query per
+# generation.  Walks stop after max_generations, so a bad link that makes
+# someone their own ancestor cannot loop forever; find_cycles() reports such
+# loops from the parent links a walk returns.
+#
+# Optionally, PeopleAncestry holds the transitive closure (every ancestor of
+# every person with the nearest generation).  Triggers log father/mother
+# changes to AncestryClosureLog and sync_closure() refreshes just the affected
+# subtrees.  Lookups use the closure only while that log is empty, so they
+# never return stale answers.
+#
+# father/mother may hold an id as an integer, as text or as '', so every walk
+# compares CAST(NULLIF(father, '') AS INTEGER); migration 11 indexes those
+# expressions so the descendant walks can still seek on them.
+#
+#   python ancestry.py ancestors|descendants PERSON_ID [--generations N] [--closure]
+#   python ancestry.py relationship PERSON_ID OTHER_ID
+#   python ancestry.py build-closure|sync-closure [--db phoenix.db]
+
+import argparse
+from collections import defaultdict
+from db_utils import DB_PATH, connect
+
+MAX_GENERATIONS = 25
+
+CLOSURE_TABLE = "PeopleAncestry"
+CLOSURE_LOG_TABLE = "AncestryClosureLog"
+
+# Parent ids of People p as integers; father/mother hold an id, NULL or ''
+_FATHER_ID = "CAST(NULLIF(p.father, '') AS INTEGER)"
+_MOTHER_ID = "CAST(NULLIF(p.mother, '') AS INTEGER)"
+_PARENT_OF = f"CASE r.role WHEN 'father' THEN {_FATHER_ID} ELSE {_MOTHER_ID} END"
+_ROLES = "(SELECT 'father' AS role UNION ALL SELECT 'mother')"
+
+ANCESTOR_EDGES_QUERY = f"""
+    WITH RECURSIVE walk(child_id, parent_id, role, generation) AS (
+        SELECT p.id, {_PARENT_OF}, r.role, 1
+        FROM People p CROSS JOIN {_ROLES} r
+        WHERE p.id = :person_id AND {_PARENT_OF} IS NOT NULL
+        UNION
+        SELECT p.id, {_PARENT_OF}, r.role, w.generation + 1
+        FROM walk w
+        JOIN People p ON p.id = w.parent_id
+        CROSS JOIN {_ROLES} r
+        WHERE w.generation < :max_generations AND {_PARENT_OF} IS NOT NULL
+    )
+    SELECT child_id, parent_id, role, generation FROM walk
+"""
+
+DESCENDANT_EDGES_QUERY = f"""
+    WITH RECURSIVE walk(parent_id, child_id, role, generation) AS (
+        SELECT :person_id, p.id, CASE WHEN {_FATHER_ID} = :person_id THEN 'father' ELSE 'mother' END, 1
+        FROM People p
+        WHERE {_FATHER_ID} = :person_id OR {_MOTHER_ID} = :person_id
+        UNION
+        SELECT w.child_id, p.id, CASE WHEN {_FATHER_ID} = w.child_id THEN 'father' ELSE 'mother' END, w.generation + 1
+        FROM walk w
+        JOIN People p ON {_FATHER_ID} = w.child_id OR {_MOTHER_ID} = w.child_id
+        WHERE w.generation < :max_generations
+    )
+    SELECT parent_id, child_id, role, generation FROM walk
+"""
+
+COMMON_ANCESTORS_QUERY = f"""
+    WITH RECURSIVE up(start, person_id, generation) AS (
+        SELECT 'a', :person_a, 0
+        UNION
+        SELECT 'b', :person_b, 0
+        UNION
+        SELECT u.start, {_PARENT_OF}, u.generation + 1
+        FROM up u
+        JOIN People p ON p.id = u.person_id
+        CROSS JOIN {_ROLES} r
+        WHERE u.generation < :max_generations AND {_PARENT_OF} IS NOT NULL
+    )
+    SELECT a.person_id, MIN(a.generation), MIN(b.generation)
+    FROM up a
+    JOIN up b ON b.person_id = a.person_id AND b.start = 'b'
+    WHERE a.start = 'a'
+    GROUP BY a.person_id
+"""
+
+# Expression indexes matching _FATHER_ID and _MOTHER_ID, for the descendant walks
+PARENT_ID_INDEXES = [
+    ("idx_people_father_id", "CAST(NULLIF(father, '') AS INTEGER)"),
+    ("idx_people_mother_id", "CAST(NULLIF(mother, '') AS INTEGER)"),
+]
+
+CLOSURE_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CLOSURE_TABLE} (
+        ancestor_id INTEGER NOT NULL,
+        descendant_id INTEGER NOT NULL,
+        generation INTEGER NOT NULL,
+        PRIMARY KEY (descendant_id, ancestor_id)
+    ) WITHOUT ROWID
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_peopleancestry_ancestor ON {CLOSURE_TABLE} (ancestor_id, generation)",
+    f"CREATE TABLE IF NOT EXISTS {CLOSURE_LOG_TABLE} (person_id INTEGER PRIMARY KEY)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_ancestry_insert
+    AFTER INSERT ON People
+    WHEN NULLIF(NEW.father, '') IS NOT NULL OR NULLIF(NEW.mother, '') IS NOT NULL
+    BEGIN
+        INSERT OR IGNORE INTO {CLOSURE_LOG_TABLE} (person_id) VALUES (NEW.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_ancestry_update
+    AFTER UPDATE OF father, mother ON People
+    WHEN OLD.father IS NOT NEW.father OR OLD.mother IS NOT NEW.mother
+    BEGIN
+        INSERT OR IGNORE INTO {CLOSURE_LOG_TABLE} (person_id) VALUES (NEW.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_ancestry_delete
+    AFTER DELETE ON People
+    BEGIN
+        INSERT OR IGNORE INTO {CLOSURE_LOG_TABLE} (person_id) VALUES (OLD.id);
+    END
+    """,
+]
+
+
+# -------------------------------
+# RECURSIVE CTE WALKS
+# -------------------------------
+
+def create_parent_id_indexes(cursor):
+    """Index People by integer father and mother id, as the walks compare them."""
+    for index_name, expression in PARENT_ID_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON People ({expression})")
+
+
+def ancestor_edges(cursor, person_id, max_generations=MAX_GENERATIONS):
+    """
+    Every parent link above a person, in one query.
+
+    Returns:
+        list: (child_id, parent_id, role, generation) where generation 1 is the
+            person's own parents.  A link reached at several generations
+            (pedigree collapse) appears once per generation.
+    """
+    cursor.execute(ANCESTOR_EDGES_QUERY, {"person_id": person_id, "max_generations": max_generations})
+    return cursor.fetchall()
+
+
+def descendant_edges(cursor, person_id, max_generations=MAX_GENERATIONS):
+    """
+    Every parent link below a person, in one query.
+
+    Returns:
+        list: (parent_id, child_id, role, generation) where generation 1 is the person's children.
+    """
+    cursor.execute(DESCENDANT_EDGES_QUERY, {"person_id": person_id, "max_generations": max_generations})
+    return cursor.fetchall()
+
+
+def _nearest(edges, relative_index):
+    """Collapse edges to {relative id: nearest generation}."""
+    nearest = {}
+    for edge in edges:
+        relative_id, generation = int(edge[relative_index]), edge[3]
+        if generation < nearest.get(relative_id, generation + 1):
+            nearest[relative_id] = generation
+    return nearest
+
+
+def find_cycles(edges):
+    """
+    Find loops in a set of parent links, e.g. someone recorded as their own grandparent.
+
+    Args:
+        edges (list): (from_id, to_id, ...) tuples as returned by ancestor_edges()
+            or descendant_edges().
+
+    Returns:
+        list: Each cycle as a list of person ids, first id repeated at the end.
+    """
+    graph = defaultdict(set)
+    for edge in edges:
+        graph[int(edge[0])].add(int(edge[1]))
+
+    cycles = []
+    state = {}  # person id -> 1 while on the DFS stack, 2 when finished
+    for root in list(graph):
+        if root in state:
+            continue
+        stack = [(root, iter(graph[root]))]
+        path = [root]
+        state[root] = 1
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                path.pop()
+                state[node] = 2
+            elif state.get(child) == 1:
+                cycles.append(path[path.index(child):] + [child])
+            elif child not in state:
+                state[child] = 1
+                path.append(child)
+                stack.append((child, iter(graph[child])))
+    return cycles
+
+
+# -------------------------------
+# CLOSURE TABLE
+# -------------------------------
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def closure_is_current(cursor):
+    """Return True if PeopleAncestry exists and has no unprocessed changes."""
+    if not _table_exists(cursor, CLOSURE_TABLE):
+        return False
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {CLOSURE_LOG_TABLE})")
+    return not cursor.fetchone()[0]
+
+
+def _insert_closure(cursor, seed_condition, parameters, max_generations):
+    """Insert closure rows for every person matching seed_condition (on People p)."""
+    # cursor.rowcount is -1 for a statement that starts with WITH
+    changes_before = cursor.connection.total_changes
+    cursor.execute(f"""
+        WITH RECURSIVE up(descendant_id, ancestor_id, generation) AS (
+            SELECT p.id, {_PARENT_OF}, 1
+            FROM People p CROSS JOIN {_ROLES} r
+            WHERE ({seed_condition}) AND {_PARENT_OF} IS NOT NULL
+            UNION
+            SELECT u.descendant_id, {_PARENT_OF}, u.generation + 1
+            FROM up u
+            JOIN People p ON p.id = u.ancestor_id
+            CROSS JOIN {_ROLES} r
+            WHERE u.generation < ? AND {_PARENT_OF} IS NOT NULL
+        )
+        INSERT INTO {CLOSURE_TABLE} (descendant_id, ancestor_id, generation)
+        SELECT descendant_id, ancestor_id, MIN(generation)
+        FROM up
+        WHERE descendant_id != ancestor_id
+        GROUP BY descendant_id, ancestor_id
+    """, (*parameters, max_generations))
+    return cursor.connection.total_changes - changes_before
+
+
+def build_closure(cursor, max_generations=MAX_GENERATIONS):
+    """
+    Create (or rebuild) PeopleAncestry and its change-log triggers.
+
+    The caller owns the transaction.
+
+    Returns:
+        int: Closure rows written.
+    """
+    for statement in CLOSURE_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute(f"DELETE FROM {CLOSURE_TABLE}")
+    cursor.execute(f"DELETE FROM {CLOSURE_LOG_TABLE}")
+    return _insert_closure(cursor, "1 = 1", (), max_generations)
+
+
+def sync_closure(cursor, max_generations=MAX_GENERATIONS):
+    """
+    Refresh the closure rows of everyone whose parent links changed, and their descendants.
+
+    The caller owns the transaction.
+
+    Returns:
+        int: Number of people whose ancestry was recomputed.
+    """
+    if not _table_exists(cursor, CLOSURE_TABLE):
+        return 0
+
+    # Changed people plus everyone below them, from the closure as it was
+    cursor.execute("DROP TABLE IF EXISTS temp.AncestrySyncPeople")
+    cursor.execute(f"""
+        CREATE TEMP TABLE AncestrySyncPeople AS
+        SELECT person_id FROM {CLOSURE_LOG_TABLE}
+        UNION
+        SELECT a.descendant_id FROM {CLOSURE_TABLE} a
+        JOIN {CLOSURE_LOG_TABLE} l ON l.person_id = a.ancestor_id
+    """)
+    cursor.execute("SELECT COUNT(*) FROM temp.AncestrySyncPeople")
+    affected = cursor.fetchone()[0]
+    if affected:
+        cursor.execute(f"""
+            DELETE FROM {CLOSURE_TABLE}
+            WHERE descendant_id IN (SELECT person_id FROM temp.AncestrySyncPeople)
+        """)
+        _insert_closure(cursor, "p.id IN (SELECT person_id FROM temp.AncestrySyncPeople)", (), max_generations)
+
+    cursor.execute("DROP TABLE temp.AncestrySyncPeople")
+    cursor.execute(f"DELETE FROM {CLOSURE_LOG_TABLE}")
+    return affected
+
+
+# -------------------------------
+# QUESTIONS
+# -------------------------------
+
+def get_ancestors(cursor, person_id, max_generations=MAX_GENERATIONS, use_closure=False):
+    """
+    Everyone above a person, nearest generation first.
+
+    Args:
+        cursor: SQLite cursor object.
+        person_id (int): People.id to start from.
+        max_generations (int): How far up to walk.
+        use_closure (bool): Read PeopleAncestry when it is current.
+
+    Returns:
+        list: (ancestor_id, generation) sorted by generation then id.
+    """
+    if use_closure and closure_is_current(cursor):
+        cursor.execute(f"""
+            SELECT ancestor_id, generation FROM {CLOSURE_TABLE}
+            WHERE descendant_id = ? AND generation <= ?
+            ORDER BY generation, ancestor_id
+        """, (person_id, max_generations))
+        return cursor.fetchall()
+
+    nearest = _nearest(ancestor_edges(cursor, person_id, max_generations), 1)
+    nearest.pop(int(person_id), None)
+    return sorted(nearest.items(), key=lambda item: (item[1], item[0]))
+
+
+def get_descendants(cursor, person_id, max_generations=MAX_GENERATIONS, use_closure=False):
+    """
+    Everyone below a person, nearest generation first.
+
+    Returns:
+        list: (descendant_id, generation) sorted by generation then id.
+    """
+    if use_closure and closure_is_current(cursor):
+        cursor.execute(f"""
+            SELECT descendant_id, generation FROM {CLOSURE_TABLE}
+            WHERE ancestor_id = ? AND generation <= ?
+            ORDER BY generation, descendant_id
+        """, (person_id, max_generations))
+        return cursor.fetchall()
+
+    nearest = _nearest(descendant_edges(cursor, person_id, max_generations), 1)
+    nearest.pop(int(person_id), None)
+    return sorted(nearest.items(), key=lambda item: (item[1], item[0]))
+
+
+def describe_relationship(generations_a, generations_b):
+    """
+    Name how person B is related to person A through a common ancestor.
+
+    Args:
+        generations_a (int): Generations from A up to the common ancestor.
+        generations_b (int): Generations from B up to the common ancestor.
+
+    Returns:
+        str: e.g. "parent", "grandchild", "sibling", "first cousin once removed".
+    """
+    def greats(count):
+        return "great-" * count if count <= 2 else f"{count}x great-"
+
+    if generations_a == 0 and generations_b == 0:
+        return "self"
+    if generations_b == 0:
+        return {1: "parent", 2: "grandparent"}.get(generations_a, greats(generations_a - 2) + "grandparent")
+    if generations_a == 0:
+        return {1: "child", 2: "grandchild"}.get(generations_b, greats(generations_b - 2) + "grandchild")
+    if generations_a == 1 and generations_b == 1:
+        return "sibling"
+    if generations_b == 1:
+        return ("aunt/uncle" if generations_a == 2
+                else greats(generations_a - 3) + "grand-aunt/uncle")
+    if generations_a == 1:
+        return ("niece/nephew" if generations_b == 2
+                else greats(generations_b - 3) + "grand-niece/nephew")
+
+    degree = min(generations_a, generations_b) - 1
+    removed = abs(generations_a - generations_b)
+    ordinals = {1: "first", 2: "second", 3: "third", 4: "fourth", 5: "fifth"}
+    name = f"{ordinals.get(degree, f'{degree}th')} cousin"
+    if removed:
+        name += " " + {1: "once", 2: "twice"}.get(removed, f"{removed} times") + " removed"
+    return name
+
+
+def _branch_parents(cursor, person_id, ancestor_ids, generations):
+    """
+    Parents of the children of ancestor_ids on person_id's line.
+
+    Returns:
+        set: (father id, mother id) of each such child; None where a parent is not recorded.
+    """
+    edges = ancestor_edges(cursor, person_id, generations)
+    children = {child_id for child_id, parent_id, _, generation in edges
+                if generation == generations and parent_id in ancestor_ids}
+    parents = defaultdict(dict)
+    for child_id, parent_id, role, _ in edges:
+        if child_id in children:
+            parents[child_id][role] = parent_id
+    return {(roles.get("father"), roles.get("mother")) for roles in parents.values()}
+
+
+def get_relationship(cursor, person_a, person_b, max_generations=MAX_GENERATIONS):
+    """
+    How person B is related to person A by blood, in one query.
+
+    Whether a sibling or cousin is a half one is decided where the two lines
+    branch: the children of the common ancestors on each side are full
+    siblings if they have the same father and mother, half siblings if both
+    parents are recorded for each and they differ, and unknown otherwise.
+
+    Returns:
+        dict: None if no common ancestor within max_generations, else:
+            - "relationship" (str): Name from describe_relationship().
+            - "common_ancestors" (list): Nearest common ancestor ids.
+            - "generations" (tuple): (generations from A, generations from B).
+            - "half" (bool or None): True for half-siblings/cousins, False for full
+              ones and direct lines, None when a parent at the branch is not recorded.
+    """
+    cursor.execute(COMMON_ANCESTORS_QUERY, {"person_a": person_a, "person_b": person_b,
+                                            "max_generations": max_generations})
+    common = cursor.fetchall()
+    if not common:
+        return None
+
+    best = min(generation_a + generation_b for _, generation_a, generation_b in common)
+    nearest = [row for row in common if row[1] + row[2] == best]
+    generations = min((row[1], row[2]) for row in nearest)
+    nearest_ids = sorted(int(row[0]) for row in nearest if (row[1], row[2]) == generations)
+
+    half = False
+    if 0 not in generations:
+        parents_a = _branch_parents(cursor, person_a, nearest_ids, generations[0])
+        parents_b = _branch_parents(cursor, person_b, nearest_ids, generations[1])
+        if any(None in pair for pair in parents_a | parents_b):
+            half = None
+        else:
+            half = not parents_a & parents_b
+
+    return {
+        "relationship": describe_relationship(*generations),
+        "common_ancestors": nearest_ids,
+        "generations": generations,
+        "half": half,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ancestry queries over People.father/mother.")
+    parser.add_argument("command", choices=["ancestors", "descendants", "relationship", "build-closure", "sync-closure"])
+    parser.add_argument("people", nargs="*", type=int, help="person id(s)")
+    parser.add_argument("--generations", type=int, default=MAX_GENERATIONS, help="generation cap")
+    parser.add_argument("--closure", action="store_true", help="answer from PeopleAncestry when current")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    cursor = connection.cursor()
+    try:
+        if args.command in ("build-closure", "sync-closure"):
+            cursor.execute("BEGIN")
+            if args.command == "build-closure":
+                print(f"Wrote {build_closure(cursor, args.generations)} ancestry rows.")
+            else:
+                print(f"Recomputed ancestry for {sync_closure(cursor, args.generations)} people.")
+            connection.commit()
+
+        elif args.command == "relationship":
+            if len(args.people) != 2:
+                parser.error("relationship needs two person ids")
+            result = get_relationship(cursor, *args.people, max_generations=args.generations)
+            if result is None:
+                print("No common ancestor found.")
+            else:
+                half = {True: "half-", False: "", None: "(half or full) "}[result["half"]]
+                print(f"{args.people[1]} is {args.people[0]}'s {half}{result['relationship']} "
+                      f"(common ancestor(s): {', '.join(map(str, result['common_ancestors']))})")
+
+        else:
+            if len(args.people) != 1:
+                parser.error(f"{args.command} needs one person id")
+            person_id = args.people[0]
+            if args.command == "ancestors":
+                relatives = get_ancestors(cursor, person_id, args.generations, args.closure)
+                edges = ancestor_edges(cursor, person_id, args.generations)
+            else:
+                relatives = get_descendants(cursor, person_id, args.generations, args.closure)
+                edges = descendant_edges(cursor, person_id, args.generations)
+            for relative_id, generation in relatives:
+                print(f"{generation:>3}  {relative_id}")
+            print(f"{len(relatives)} {args.command}.")
+            for cycle in find_cycles(edges):
+                print(f"WARNING: parent links form a loop: {' -> '.join(map(str, cycle))}")
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# background_search.py
+#
+# Search-as-you-type for picker windows without blocking Tk.
+#
+# BackgroundSearch debounces keystrokes with after(), then runs the query on
+# a worker thread that has its own connection (db_utils.connect), so a slow
+# LIKE or a large result never freezes the window.  Searches only read, except
+# that a sounds-like search first codes people logged as changed; that goes
+# through db_utils.refresh_before_read, which commits it or rolls it back, so
+# interrupting the worker never leaves a write transaction open.  Rows come
+# back in chunks through a queue that the Tk thread drains with after(); Tk
+# widgets are only ever touched from the Tk thread.
+#
+# Each new search bumps a generation number.  The worker interrupts a stale
+# query that is still running, stops streaming a stale result, and the Tk side
+# drops any chunk from an older generation, so only the latest search is shown.
+
+import queue
+import sqlite3
+import threading
+from db_utils import DB_PATH, connect
+
+SEARCH_DELAY_MS = 250   # Quiet time after the last keystroke before searching
+POLL_MS = 30            # How often the Tk thread checks for results
+CHUNK_SIZE = 200        # Rows handed to the window per poll
+
+
+class BackgroundSearch:
+    """Debounced query that runs on a worker thread and streams rows back to Tk."""
+
+    def __init__(self, widget, run_query, on_rows, on_error=None, delay_ms=SEARCH_DELAY_MS, db_path=DB_PATH):
+        """
+        Args:
+            widget: Any Tk widget of the window; used for after() and <Destroy>.
+            run_query (callable): run_query(cursor, *args) runs on the worker
+                thread and returns the rows (a list or the executed cursor).
+            on_rows (callable): on_rows(rows, first) on the Tk thread for each
+                chunk; first is True for the first chunk of a new result, so
+                the caller can clear its tree.
+            on_error (callable): on_error(exception) on the Tk thread.
+            delay_ms (int): Debounce delay for schedule().
+            db_path (str): Database the worker connects to.
+        """
+        self.widget = widget
+        self.run_query = run_query
+        self.on_rows = on_rows
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.db_path = db_path
+
+        self._generation = 0
+        self._after_id = None
+        self._poll_id = None
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = None
+        self._connection = None
+        self._running = None  # generation the worker is currently querying
+        self._last_args = None
+        self._closed = False
+
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    # -------------------------------
+    # Tk thread
+    # -------------------------------
+
+    def schedule(self, *args):
+        """Search with these arguments once typing pauses for delay_ms."""
+        if self._closed:
+            return
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        elif args == self._last_args:
+            return  # e.g. an arrow key; nothing to search again
+        self._after_id = self.widget.after(self.delay_ms, self.run_now, *args)
+
+    def run_now(self, *args):
+        """Search with these arguments immediately, cancelling any pending or running search."""
+        if self._closed:
+            return
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+        self._generation += 1
+        self._last_args = args
+        self._requests.put((self._generation, args))
+        if self._running is not None and self._connection is not None:
+            self._connection.interrupt()
+
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name="BackgroundSearch", daemon=True)
+            self._worker.start()
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        if self._closed:
+            return
+
+        finished = False
+        try:
+            while True:
+                generation, kind, payload = self._results.get_nowait()
+                if generation != self._generation:
+                    continue  # Stale result
+                if kind == "rows":
+                    self.on_rows(*payload)
+                    break  # One chunk per poll keeps the window responsive
+                if kind == "error":
+                    if self.on_error:
+                        self.on_error(payload)
+                    else:
+                        print(f"Search failed: {payload}")
+                finished = True
+        except queue.Empty:
+            pass
+
+        if not finished:
+            self._poll_id = self.widget.after(POLL_MS, self._poll)
+
+    def close(self):
+        """Cancel pending work and stop the worker thread."""
+        if self._closed:
+            return
+        self._closed = True
+        for after_id in (self._after_id, self._poll_id):
+            if after_id is not None:
+                try:
+                    self.widget.after_cancel(after_id)
+                except Exception:
+                    pass
+        self._generation += 1
+        self._requests.put(None)
+        if self._running is not None and self._connection is not None:
+            self._connection.interrupt()
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.close()
+
+    # -------------------------------
+    # Worker thread
+    # -------------------------------
+
+    def _work(self):
+        self._connection = connect(self.db_path)
+        cursor = self._connection.cursor()
+        try:
+            while True:
+                request = self._requests.get()
+                # Only the newest request matters
+                while request is not None and not self._requests.empty():
+                    request = self._requests.get()
+                if request is None:
+                    break
+                self._search(cursor, *request)
+        finally:
+            self._connection.close()
+
+    def _search(self, cursor, generation, args, retried=False):
+        self._running = generation
+        try:
+            rows = self.run_query(cursor, *args)
+            rows = iter(rows if rows is not None else cursor)
+            first = True
+            while generation == self._generation:
+                chunk = []
+                for row in rows:
+                    chunk.append(row)
+                    if len(chunk) == CHUNK_SIZE:
+                        break
+                if chunk or first:
+                    self._results.put((generation, "rows", (chunk, first)))
+                    first = False
+                if len(chunk) < CHUNK_SIZE:
+                    self._results.put((generation, "done", None))
+                    break
+        except sqlite3.OperationalError as e:
+            # interrupt() from a newer search lands here.  If it raced onto
+            # the current search instead of the stale one, run it again.
+            if generation != self._generation:
+                return
+            if "interrupt" in str(e) and not retried:
+                return self._search(cursor, generation, args, retried=True)
+            self._results.put((generation, "error", e))
+        except Exception as e:
+            self._results.put((generation, "error", e))
+        finally:
+            self._running = None
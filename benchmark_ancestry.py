@@ -0,0 +1,120 @@
+# benchmark_ancestry.py
+#
+# Times ancestor and descendant lookups on synthetic pedigrees of 10+
+# generations: the generation-by-generation loop (one SELECT per person
+# reached) against the single recursive CTE in ancestry.py and the optional
+# PeopleAncestry closure table.  Results of all three are compared.
+#
+#   python benchmark_ancestry.py [generations...]
+
+import sqlite3
+import sys
+import time
+
+from ancestry import build_closure, create_parent_id_indexes, get_ancestors, get_descendants
+
+DEFAULT_GENERATIONS = [10, 12, 14]
+
+
+def build_database(generations):
+    """
+    Create an in-memory database holding a full pedigree `generations` deep.
+
+    Person 1 is the root; person n has father 2n and mother 2n + 1, so the
+    tree holds 2**generations - 1 people and the root has every other person
+    as an ancestor.  A second, separate family descends from person
+    2**generations: everyone in it has two children, so that person has a
+    descendancy as large as the pedigree.
+    """
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE People (id INTEGER PRIMARY KEY, father INTEGER, mother INTEGER)")
+    size = 2 ** generations - 1
+    cursor.executemany("INSERT INTO People (id, father, mother) VALUES (?, ?, ?)", (
+        (n, 2 * n if 2 * n <= size else None, 2 * n + 1 if 2 * n + 1 <= size else None)
+        for n in range(1, size + 1)
+    ))
+    # Descendancy: person size + n is the father of size + 2n and size + 2n + 1
+    cursor.executemany("INSERT INTO People (id, father, mother) VALUES (?, ?, NULL)", (
+        (size + n, size + n // 2 if n > 1 else None)
+        for n in range(1, size + 1)
+    ))
+    cursor.execute("CREATE INDEX idx_people_father ON People (father)")
+    cursor.execute("CREATE INDEX idx_people_mother ON People (mother)")
+    create_parent_id_indexes(cursor)
+    conn.commit()
+    return conn, size
+
+
+def ancestors_by_generation(cursor, person_id):
+    """The per-generation walk: one SELECT father, mother for every person reached."""
+    found = {}
+    current = [person_id]
+    generation = 0
+    while current:
+        generation += 1
+        parents = []
+        for child_id in current:
+            cursor.execute("SELECT father, mother FROM People WHERE id = ?", (child_id,))
+            row = cursor.fetchone()
+            for parent_id in row or ():
+                if parent_id not in (None, "") and parent_id not in found:
+                    found[parent_id] = generation
+                    parents.append(parent_id)
+        current = parents
+    return sorted(found.items(), key=lambda item: (item[1], item[0]))
+
+
+def descendants_by_generation(cursor, person_id):
+    """The per-generation walk downwards: one SELECT of children for every person reached."""
+    found = {}
+    current = [person_id]
+    generation = 0
+    while current:
+        generation += 1
+        children = []
+        for parent_id in current:
+            cursor.execute("SELECT id FROM People WHERE father = ? OR mother = ?", (parent_id, parent_id))
+            for (child_id,) in cursor.fetchall():
+                if child_id not in found:
+                    found[child_id] = generation
+                    children.append(child_id)
+        current = children
+    return sorted(found.items(), key=lambda item: (item[1], item[0]))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(generation_counts):
+    print(f"{'Generations':>11} {'People':>8} {'Lookup':>12} {'Per-gen (s)':>12} "
+          f"{'CTE (s)':>9} {'Closure (s)':>12}")
+    for generations in generation_counts:
+        conn, size = build_database(generations)
+        cursor = conn.cursor()
+
+        cursor.execute("BEGIN")
+        build_time, _ = timed(build_closure, cursor)
+        conn.commit()
+
+        lookups = [
+            ("ancestors", ancestors_by_generation, get_ancestors, 1),
+            ("descendants", descendants_by_generation, get_descendants, size + 1),
+        ]
+        for label, loop, lookup, person_id in lookups:
+            loop_time, loop_rows = timed(loop, cursor, person_id)
+            cte_time, cte_rows = timed(lookup, cursor, person_id)
+            closure_time, closure_rows = timed(lookup, cursor, person_id, use_closure=True)
+            if not loop_rows == cte_rows == closure_rows:
+                print(f"WARNING: {label} differ for {generations} generations")
+            print(f"{generations:>11} {size:>8} {label:>12} {loop_time:>12.3f} "
+                  f"{cte_time:>9.3f} {closure_time:>12.4f}")
+        print(f"{'':>11} {'':>8} {'closure build':>12} {build_time:.2f} s")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_GENERATIONS)
@@ -0,0 +1,115 @@
+# benchmark_people_grid.py
+#
+# Compares how long it takes to fill the main menu People grid with the old
+# per-row Photos/Marriages lookups versus the single People grid query.
+# Runs against a synthetic in-memory database so it never touches phoenix.db.
+#
+#   python benchmark_people_grid.py [sizes...]
+
+import sqlite3
+import sys
+import time
+import random
+
+from people_grid import fetch_people_grid, format_people_grid_row, CAMERA_SYMBOL
+
+PEOPLE_COLUMNS = [
+    "first_name", "middle_name", "last_name", "title", "nick_name", "married_name",
+    "married_to", "father", "mother", "birth_date", "birth_location", "death_date",
+    "death_location", "death_cause", "buried_date", "buried_location", "buried_notes",
+    "buried_source", "marriage_date", "marriage_location", "business", "obit_link",
+    "occupation", "bio", "notes", "buried_link", "buried_block", "buried_tour_link"
+]
+
+DEFAULT_SIZES = [100, 1000, 5000, 20000]
+
+
+def build_database(size):
+    """Create an in-memory database with `size` people sharing one surname."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE People (id INTEGER PRIMARY KEY, {', '.join(PEOPLE_COLUMNS)})")
+    cursor.execute("CREATE TABLE Photos (id INTEGER PRIMARY KEY, person_id INTEGER, image_path TEXT)")
+    cursor.execute("CREATE TABLE Marriages (id INTEGER PRIMARY KEY, person1_id INTEGER, person2_id INTEGER)")
+    cursor.execute("CREATE INDEX idx_photos_person_id ON Photos(person_id)")
+    cursor.execute("CREATE INDEX idx_marriages_person1_id ON Marriages(person1_id)")
+    cursor.execute("CREATE INDEX idx_marriages_person2_id ON Marriages(person2_id)")
+
+    rng = random.Random(size)
+    placeholders = ", ".join("?" for _ in PEOPLE_COLUMNS)
+    cursor.executemany(
+        f"INSERT INTO People ({', '.join(PEOPLE_COLUMNS)}) VALUES ({placeholders})",
+        (
+            [f"First{i}", None, "Smith"] + [None] * 6 + [f"{1800 + i % 150}"] + [None] * (len(PEOPLE_COLUMNS) - 10)
+            for i in range(size)
+        )
+    )
+    cursor.executemany(
+        "INSERT INTO Photos (person_id, image_path) VALUES (?, ?)",
+        ((pid, f"photo_{pid}.jpg") for pid in range(1, size + 1) if rng.random() < 0.2)
+    )
+    cursor.executemany(
+        "INSERT INTO Marriages (person1_id, person2_id) VALUES (?, ?)",
+        ((pid, pid + 1) for pid in range(1, size, 2) if rng.random() < 0.6)
+    )
+    conn.commit()
+    return conn
+
+
+def fill_per_row(cursor):
+    """The original populate_tree path: one People query plus two lookups per row."""
+    cursor.execute("SELECT * FROM People WHERE (last_name LIKE ? OR married_name LIKE ?)", ("Smith%", "Smith%"))
+    rows = []
+    for record in cursor.fetchall():
+        person_id = record[0]
+        cursor.execute("SELECT image_path FROM Photos WHERE person_id = ?", (person_id,))
+        image_symbol = CAMERA_SYMBOL if cursor.fetchone() else ""
+        cursor.execute("""
+            SELECT CASE
+                WHEN person1_id = ? THEN person2_id
+                ELSE person1_id
+            END AS spouse_id
+            FROM Marriages
+            WHERE person1_id = ? OR person2_id = ?
+            LIMIT 1
+        """, (person_id, person_id, person_id))
+        spouse_result = cursor.fetchone()
+        spouse_id_display = spouse_result[0] if spouse_result else ""
+        rows.append([image_symbol, person_id] + list(record[1:-1]) + [spouse_id_display])
+    return rows
+
+
+def fill_joined(cursor):
+    """The People grid path: a single query returning photo flag and spouse id."""
+    records = fetch_people_grid(
+        cursor, "(p.last_name LIKE ? OR p.married_name LIKE ?)", ("Smith%", "Smith%")
+    )
+    return [format_people_grid_row(record) for record in records]
+
+
+def best_of(func, cursor, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(cursor)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(sizes):
+    print(f"{'Rows':>8} {'Per-row (ms)':>14} {'Joined (ms)':>13} {'Speedup':>9}")
+    for size in sizes:
+        conn = build_database(size)
+        cursor = conn.cursor()
+        old_time, old_rows = best_of(fill_per_row, cursor)
+        new_time, new_rows = best_of(fill_joined, cursor)
+        if old_rows != new_rows:
+            print(f"WARNING: grid rows differ for size {size}")
+        print(f"{size:>8} {old_time * 1000:>14.1f} {new_time * 1000:>13.1f} {old_time / new_time:>8.1f}x")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,125 @@
+# benchmark_resgroups.py
+#
+# Times the ResGroup rebuild on a synthetic Census table: the original
+# row-by-row path (one INSERT per household, then one UPDATE of Census per
+# household key) against the set-based rebuild_resgroups().  Both run on
+# identical in-memory copies and the resulting links are compared.
+#
+#   python benchmark_resgroups.py [rows...]
+
+import random
+import sqlite3
+import sys
+import time
+
+from rebuild_resgroups import rebuild_resgroups
+
+DEFAULT_SIZES = [10000, 100000]
+PEOPLE_PER_HOUSEHOLD = 5
+
+
+def build_database(size):
+    """Create an in-memory database with `size` Census rows in ~5-person households."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE Census (
+            id INTEGER PRIMARY KEY, person_id INTEGER, census_year INTEGER, township_id INTEGER,
+            census_dwellnum INTEGER, census_householdnum INTEGER, res_group_id INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE ResGroups (
+            id INTEGER PRIMARY KEY, res_group_year INTEGER, township_id INTEGER, dwelling_num INTEGER,
+            household_num INTEGER, event_type TEXT, household_notes TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE ResGroupMembers (
+            id INTEGER PRIMARY KEY, res_group_id INTEGER, res_group_member INTEGER, member_order INTEGER
+        )
+    """)
+
+    rng = random.Random(size)
+    years = [1850, 1860, 1870, 1880, 1900, 1910]
+    rows = []
+    household = 0
+    while len(rows) < size:
+        household += 1
+        year = rng.choice(years)
+        township_id = rng.randint(1, 12)
+        for _ in range(rng.randint(1, 2 * PEOPLE_PER_HOUSEHOLD - 1)):
+            rows.append((rng.randint(1, size), year, township_id, household, household))
+    cursor.executemany("""
+        INSERT INTO Census (person_id, census_year, township_id, census_dwellnum, census_householdnum)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows[:size])
+    conn.commit()
+    return conn
+
+
+def rebuild_row_by_row(cursor):
+    """The original rebuild: one INSERT per household and one Census UPDATE per key."""
+    cursor.execute("DELETE FROM ResGroupMembers")
+    cursor.execute("DELETE FROM ResGroups")
+    cursor.execute("""
+        SELECT DISTINCT census_year, township_id, census_dwellnum, census_householdnum
+        FROM Census
+        WHERE census_dwellnum IS NOT NULL AND census_householdnum IS NOT NULL
+    """)
+    resgroup_map = {}
+    for year, township_id, dwellnum, hhnum in cursor.fetchall():
+        cursor.execute("""
+            INSERT INTO ResGroups (res_group_year, township_id, dwelling_num, household_num, event_type, household_notes)
+            VALUES (?, ?, ?, ?, 'Census', 'Rebuilt from Census Records')
+        """, (year, township_id, dwellnum, hhnum))
+        resgroup_map[(year, township_id, dwellnum, hhnum)] = cursor.lastrowid
+
+    for (year, township_id, dwellnum, hhnum), res_group_id in resgroup_map.items():
+        cursor.execute("""
+            UPDATE Census
+            SET res_group_id = ?
+            WHERE census_year = ? AND township_id = ? AND census_dwellnum = ? AND census_householdnum = ?
+        """, (res_group_id, year, township_id, dwellnum, hhnum))
+
+    cursor.execute("""
+        INSERT INTO ResGroupMembers (res_group_id, res_group_member)
+        SELECT res_group_id, person_id FROM Census
+        WHERE res_group_id IS NOT NULL
+    """)
+
+
+def census_links(cursor):
+    """Each Census row with the household key of the group it is linked to."""
+    cursor.execute("""
+        SELECT c.id, g.res_group_year, g.township_id, g.dwelling_num, g.household_num
+        FROM Census c LEFT JOIN ResGroups g ON g.id = c.res_group_id
+        ORDER BY c.id
+    """)
+    return cursor.fetchall()
+
+
+def timed(func, conn):
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    cursor.execute("BEGIN")
+    func(cursor)
+    conn.commit()
+    return time.perf_counter() - start, census_links(cursor)
+
+
+def main(sizes):
+    print(f"{'Census rows':>12} {'Row-by-row (s)':>16} {'Set-based (s)':>15} {'Speedup':>9}")
+    for size in sizes:
+        old_conn, new_conn = build_database(size), build_database(size)
+        old_time, old_links = timed(rebuild_row_by_row, old_conn)
+        new_time, new_links = timed(rebuild_resgroups, new_conn)
+        if old_links != new_links:
+            print(f"WARNING: Census links differ for size {size}")
+        print(f"{size:>12} {old_time:>16.2f} {new_time:>15.3f} {old_time / new_time:>8.0f}x")
+        old_conn.close()
+        new_conn.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,116 @@
+# benchmark_startup.py
+#
+# Measures how long the person form (editme.py) spends importing modules
+# before it can open, using `python -X importtime`.  The modules are read from
+# editme.py's top-level imports, so the numbers follow the form as it changes.
+# The heavy libraries that editme now loads lazily can be added with --heavy
+# to see what an eager import would cost.
+#
+#   python benchmark_startup.py [--heavy] [--repeat N] [--top N]
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FORM_SCRIPT = "editme.py"
+
+# Imported on first use by the map and FindAGrave actions
+HEAVY_MODULES = [
+    "folium", "folium.plugins", "geopandas", "pandas", "shapely.geometry",
+    "requests", "bs4", "findagrave_agent_direct", "map_control"
+]
+
+
+def form_imports(script=FORM_SCRIPT):
+    """
+    List the modules a script imports at module level.
+
+    Args:
+        script (str): Script file name in this directory.
+
+    Returns:
+        list: Module names in the order they are imported.
+    """
+    with open(os.path.join(SCRIPT_DIR, script), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def run_importtime(modules):
+    """
+    Import the modules in a fresh interpreter with -X importtime.
+
+    Modules that are not installed are skipped and reported.
+
+    Returns:
+        tuple: ({module: cumulative microseconds}, [missing modules])
+    """
+    code = (
+        "import importlib, sys\n"
+        f"for name in {modules!r}:\n"
+        "    try:\n"
+        "        importlib.import_module(name)\n"
+        "    except Exception as e:\n"
+        "        print(f'MISSING {name}: {e}')\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        if not package.startswith("  "):  # Top-level import (not nested)
+            timings[package.strip()] = int(cumulative)
+
+    missing = [line.split(" ", 1)[1] for line in result.stdout.splitlines() if line.startswith("MISSING ")]
+    missing = list(dict.fromkeys(missing))
+    return timings, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the person form.")
+    parser.add_argument("--heavy", action="store_true", help="also import the lazily loaded libraries")
+    parser.add_argument("--repeat", type=int, default=3, help="runs to take the best total from")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    args = parser.parse_args()
+
+    modules = form_imports()
+    if args.heavy:
+        modules += [name for name in HEAVY_MODULES if name not in modules]
+
+    best_total, best_timings, missing = None, {}, []
+    for _ in range(args.repeat):
+        timings, missing = run_importtime(modules)
+        total = sum(timings.values())
+        if best_total is None or total < best_total:
+            best_total, best_timings = total, timings
+
+    print(f"{FORM_SCRIPT}: {len(modules)} top-level imports, best of {args.repeat} runs")
+    print(f"Total import time: {best_total / 1000:.1f} ms\n")
+    print(f"{'Module':<40} {'Cumulative (ms)':>16}")
+    for name, micros in sorted(best_timings.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40} {micros / 1000:>16.1f}")
+
+    if missing:
+        print("\nNot importable here (skipped):")
+        for entry in missing:
+            print(f"  {entry}")
+
+
+if __name__ == "__main__":
+    main()
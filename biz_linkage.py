@@ -1,38 +1,40 @@
 
 import tkinter as tk
 from tkinter import ttk
-import sqlite3
+from background_search import BackgroundSearch
+
+
+def run_biz_search(cursor, name_filter, cat_filter, year_filter):
+    """Business query for the linkage popup; runs on the search worker thread."""
+    query = "SELECT biz_id, biz_name, start_date, end_date, category FROM Biz WHERE 1=1"
+    params = []
+
+    if name_filter:
+        query += " AND LOWER(biz_name) LIKE ?"
+        params.append(f"%{name_filter}%")
+    if cat_filter:
+        query += " AND LOWER(category) LIKE ?"
+        params.append(f"%{cat_filter}%")
+    if year_filter.isdigit():
+        query += " AND (start_date >= ? OR end_date >= ?)"
+        params.append(year_filter)
+        params.append(year_filter)
+
+    query += " ORDER BY biz_name"
+    return cursor.execute(query, params)
 
-DB_PATH = "phoenix.db"
 
 def open_biz_linkage_popup(callback):
+    def search_args():
+        return (name_var.get().strip().lower(), category_var.get().strip().lower(), year_var.get().strip())
+
     def refresh_tree():
-        name_filter = name_var.get().strip().lower()
-        cat_filter = category_var.get().strip().lower()
-        year_filter = year_var.get().strip()
-
-        query = "SELECT biz_id, biz_name, start_date, end_date, category FROM Biz WHERE 1=1"
-        params = []
-
-        if name_filter:
-            query += " AND LOWER(biz_name) LIKE ?"
-            params.append(f"%{name_filter}%")
-        if cat_filter:
-            query += " AND LOWER(category) LIKE ?"
-            params.append(f"%{cat_filter}%")
-        if year_filter.isdigit():
-            query += " AND (start_date >= ? OR end_date >= ?)"
-            params.append(year_filter)
-            params.append(year_filter)
-
-        query += " ORDER BY biz_name"
-
-        for item in tree.get_children():
-            tree.delete(item)
-
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        for row in cursor.fetchall():
+        search_job.run_now(*search_args())
+
+    def show_rows(rows, first):
+        if first:
+            tree.delete(*tree.get_children())
+        for row in rows:
             tree.insert('', 'end', values=row)
 
     def select_and_return():
@@ -42,7 +44,6 @@ def open_biz_linkage_popup(callback):
             callback(biz_id)
             popup.destroy()
 
-    conn = sqlite3.connect(DB_PATH)
     popup = tk.Toplevel()
     popup.title("Select Business")
     popup.geometry("850x500")
@@ -82,6 +83,11 @@ def open_biz_linkage_popup(callback):
     ttk.Button(btn_frame, text="Select", command=select_and_return).pack(side="left", padx=10)
     ttk.Button(btn_frame, text="Cancel", command=popup.destroy).pack(side="left", padx=10)
 
+    # Search as the user types; the query runs off the Tk thread
+    search_job = BackgroundSearch(popup, run_biz_search, show_rows)
+    for var in (name_var, category_var, year_var):
+        var.trace_add("write", lambda *_: search_job.schedule(*search_args()))
+
     refresh_tree()  # Initial load
 
     popup.transient()
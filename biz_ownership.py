@@ -1,17 +1,16 @@
 # biz_ownership.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import sys
 
-DB_PATH = "phoenix.db"
+from db_utils import get_connection
 
 class OwnershipManager:
     def __init__(self, root, biz_id):
         self.root = root
         self.biz_id = biz_id
         self.root.title(f"Ownership History - Business ID {biz_id}")
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = get_connection()
         self.cursor = self.conn.cursor()
 
         self.setup_ui()
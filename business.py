@@ -1,22 +1,28 @@
 # business.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import webbrowser
 
-DB_PATH = "phoenix.db"
+from db_utils import get_connection
+from background_search import BackgroundSearch
 
 class BusinessManager:
     def __init__(self, root):
         self.root = root
         self.root.title("Business Search")
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = get_connection()
         self.cursor = self.conn.cursor()
 
         self.sort_column = None
         self.sort_reverse = False
 
         self.setup_ui()
+
+        # Search as the user types; the query runs off the Tk thread
+        self.search_job = BackgroundSearch(self.tree, self.run_search, self.show_businesses)
+        for entry in (self.name_entry, self.year_entry, self.type_entry):
+            entry.bind("<KeyRelease>", self.search_as_you_type, add="+")
+
         self.load_businesses()
 
     def setup_ui(self):
@@ -75,17 +81,27 @@ class BusinessManager:
         self.sort_column = col
         self.sort_reverse = not (self.sort_column == col and self.sort_reverse)
 
+    def search_args(self):
+        return (self.name_entry.get().strip(), self.year_entry.get().strip(), self.type_entry.get().strip())
+
+    def search_as_you_type(self, event=None):
+        self.search_job.schedule(*self.search_args())
+
     def load_businesses(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        self.search_job.run_now(*self.search_args())
 
+    def show_businesses(self, rows, first):
+        if first:
+            self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert('', 'end', values=row)
+
+    @staticmethod
+    def run_search(cursor, name, year, btype):
+        """Business query; runs on the search worker thread."""
         query = "SELECT biz_id, biz_name, category, start_date, end_date, external_url FROM Biz WHERE 1=1"
         params = []
 
-        name = self.name_entry.get().strip()
-        year = self.year_entry.get().strip()
-        btype = self.type_entry.get().strip()
-
         if name:
             query += " AND biz_name LIKE ?"
             params.append(f"%{name}%")
@@ -97,10 +113,7 @@ class BusinessManager:
             params.append(f"%{btype}%")
 
         query += " ORDER BY biz_name"
-        self.cursor.execute(query, params)
-
-        for row in self.cursor.fetchall():
-            self.tree.insert('', 'end', values=row)
+        return cursor.execute(query, params)
 
     def add_business(self):
         import editbiz
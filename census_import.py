@@ -0,0 +1,331 @@
+# census_import.py
+#
+# Bulk import of Census transcription sheets (CSV).
+#
+# Each row is one person on the enumeration.  Columns are "Person ID",
+# "Census Year", "Township", an optional "Address", and the field labels
+# from census_records.get_census_fields() for that year ("Dwelling No.",
+# "Age", "Relation to Head", ...).  --year and --township fill in sheets that
+# cover a single enumeration district.
+#
+# The file is streamed in chunks.  Every chunk is validated against the
+# year's layout and preloaded maps of townships, addresses and people, then
+# written in its own transaction: ResGroups and members through the batched
+# resgroup_utils helpers, Census rows with executemany.  Bad rows are reported with their line number and skipped; a
+# chunk that still fails in SQLite is retried row by row so only the
+# offending rows are lost.
+#
+#   python census_import.py sheet.csv [--year 1880] [--township NAME] [--errors errors.csv] [--dry-run]
+
+import argparse
+import csv
+import sqlite3
+import time
+
+from census_records import get_census_fields
+from db_utils import DB_PATH, connect
+from resgroup_sync import reconcile_resgroups
+from resgroup_utils import add_resgroup_members, get_or_create_resgroups
+
+EVENT_TYPE = "Census"
+CHUNK_SIZE = 1000
+ERROR_SAMPLE_SIZE = 20
+
+PERSON_COLUMN = "Person ID"
+YEAR_COLUMN = "Census Year"
+TOWNSHIP_COLUMN = "Township"
+ADDRESS_COLUMN = "Address"
+
+# Census field label (as in get_census_fields) -> Census column
+CENSUS_FIELD_COLUMNS = {
+    "Age": "person_age",
+    "Sex": "sex",
+    "Race": "race",
+    "Relation to Head": "relation_to_head",
+    "Real Estate Value": "real_estate_value",
+    "Estate Value": "estate_value",
+    "Occupation": "person_occupation",
+    "Dwelling No.": "census_dwellnum",
+    "Household No.": "census_householdnum",
+    "Attended School": "attended_school",
+    "Birth Place": "birth_place",
+    "Fathers Birth Place": "father_birth_place",
+    "Mothers Birth Place": "mother_birth_place",
+    "Native Language": "native_language",
+    "Years Married": "years_married",
+    "Number of Children Born": "number_of_children_born",
+    "Number of Children Living": "number_of_children_living",
+    "Farm Owner": "farm_owner",
+    "Rented Home or Farm": "rented_home_or_farm",
+    "City": "city",
+    "State": "state",
+}
+
+INSERT_CENSUS = f"""
+    INSERT INTO Census (person_id, census_year, township_id, res_group_id, {', '.join(CENSUS_FIELD_COLUMNS.values())})
+    VALUES ({', '.join('?' * (4 + len(CENSUS_FIELD_COLUMNS)))})
+"""
+
+
+class ImportMaps:
+    """Everything a chunk is validated and resolved against, loaded once per import."""
+
+    def __init__(self, cursor):
+        cursor.execute("SELECT township_id, township_name FROM Townships")
+        self.townships = {}
+        for township_id, name in cursor.fetchall():
+            self.townships[str(township_id)] = township_id
+            if name:
+                self.townships[name.strip().lower()] = township_id
+
+        cursor.execute("SELECT address_id, address FROM Address")
+        self.addresses = {address.strip().lower(): address_id
+                          for address_id, address in cursor.fetchall() if address}
+
+        cursor.execute("SELECT id FROM People")
+        self.people = {row[0] for row in cursor.fetchall()}
+
+        cursor.execute("SELECT person_id, census_year FROM Census WHERE person_id IS NOT NULL")
+        self.enumerated = {(person_id, str(year)) for person_id, year in cursor.fetchall()}
+
+
+def _normalize_header(fieldnames):
+    """Map each CSV header to its canonical label, matching case-insensitively."""
+    known = {label.lower(): label
+             for label in (PERSON_COLUMN, YEAR_COLUMN, TOWNSHIP_COLUMN, ADDRESS_COLUMN, *CENSUS_FIELD_COLUMNS)}
+    header = {}
+    unknown = []
+    for name in fieldnames or []:
+        label = known.get((name or "").strip().rstrip("*").strip().lower())
+        if label:
+            header[name] = label
+        elif name:
+            unknown.append(name)
+    return header, unknown
+
+
+def validate_row(values, layouts, maps, defaults):
+    """
+    Check one sheet row against its year's layout and resolve its ids.
+
+    Args:
+        values (dict): Canonical label -> stripped cell value.
+        layouts (dict): get_census_fields() output.
+        maps (ImportMaps): Preloaded lookups.
+        defaults (dict): Values for "Census Year"/"Township" when a cell is blank.
+
+    Returns:
+        tuple: (record dict, None) if the row is valid, else (None, error message).
+    """
+    year = values.get(YEAR_COLUMN) or defaults.get(YEAR_COLUMN, "")
+    if year not in layouts:
+        return None, f"unknown Census year '{year}'"
+    layout = layouts[year]
+
+    person = values.get(PERSON_COLUMN, "")
+    try:
+        person_id = int(person)
+    except ValueError:
+        return None, f"'{PERSON_COLUMN}' must be a number, got '{person}'"
+    if person_id not in maps.people:
+        return None, f"person {person_id} does not exist"
+    if (person_id, year) in maps.enumerated:
+        return None, f"person {person_id} already has a {year} Census record"
+
+    township = values.get(TOWNSHIP_COLUMN) or defaults.get(TOWNSHIP_COLUMN, "")
+    township_id = maps.townships.get(township.lower())
+    if township_id is None:
+        return None, f"unknown township '{township}'"
+
+    address_id = None
+    address = values.get(ADDRESS_COLUMN, "")
+    if address:
+        address_id = maps.addresses.get(address.lower())
+        if address_id is None:
+            return None, f"unknown address '{address}'"
+
+    for label, hint in layout:
+        value = values.get(label, "")
+        if hint == "Required" and not value:
+            return None, f"'{label}' is required for {year}"
+        if value and "/" in hint and value.lower() not in hint.lower().split("/"):
+            return None, f"'{label}' must be one of {hint}, got '{value}'"
+
+    # New records always need a household key, whatever the year's layout says
+    try:
+        dwelling_num = int(values.get("Dwelling No.", ""))
+        household_num = int(values.get("Household No.", ""))
+    except ValueError:
+        return None, "'Dwelling No.' and 'Household No.' must be numbers"
+
+    fields = {label: values.get(label, "") for label, _ in layout}
+    fields["Dwelling No."], fields["Household No."] = dwelling_num, household_num
+    return {
+        "person_id": person_id,
+        "year": year,
+        "township_id": township_id,
+        "address_id": address_id,
+        "key": (dwelling_num, household_num, int(year), township_id),
+        "fields": fields,
+    }, None
+
+
+def write_records(cursor, records):
+    """
+    Write validated records: ResGroups, addresses, Census rows and members.
+
+    The caller owns the transaction.
+
+    Returns:
+        tuple: (members added, ResGroups created)
+    """
+    resgroup_ids, created = get_or_create_resgroups(cursor, (r["key"] for r in records), EVENT_TYPE)
+
+    addresses = {resgroup_ids[r["key"]]: r["address_id"] for r in records if r["address_id"]}
+    cursor.executemany("UPDATE ResGroups SET address_id = ? WHERE id = ?",
+                       [(address_id, res_group_id) for res_group_id, address_id in addresses.items()])
+
+    census_rows = []
+    members = []
+    for record in records:
+        res_group_id = resgroup_ids[record["key"]]
+        fields = record["fields"]
+        census_rows.append((record["person_id"], record["year"], record["township_id"], res_group_id,
+                            *(fields.get(label, "") for label in CENSUS_FIELD_COLUMNS)))
+        members.append((res_group_id, record["person_id"], fields.get("Relation to Head", "")))
+
+    cursor.executemany(INSERT_CENSUS, census_rows)
+    added = add_resgroup_members(cursor, members)
+
+    # Keep the change log from resgroup_sync empty, as a form save does
+    reconcile_resgroups(cursor)
+    return len(added), len(created)
+
+
+def _commit_chunk(connection, cursor, records, maps, stats, dry_run):
+    """Write one chunk in its own transaction and add its counts to stats."""
+    cursor.execute("BEGIN")
+    try:
+        members_added, groups_created = write_records(cursor, records)
+    except Exception:
+        connection.rollback()
+        raise
+    if dry_run:
+        connection.rollback()
+    else:
+        connection.commit()
+    maps.enumerated.update((r["person_id"], r["year"]) for r in records)
+    stats["imported"] += len(records)
+    stats["members_added"] += members_added
+    stats["groups_created"] += groups_created
+
+
+def import_census_sheet(path, db_path=DB_PATH, year=None, township=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Import one CSV transcription sheet.
+
+    Args:
+        path (str): CSV file with a header row.
+        db_path (str): Path to the SQLite database.
+        year (str): Census year for rows that leave "Census Year" blank.
+        township (str): Township name or id for rows that leave "Township" blank.
+        chunk_size (int): Rows validated and written per transaction.
+        dry_run (bool): Validate and write each chunk, then roll it back.
+
+    Returns:
+        dict: "imported", "members_added" and "groups_created" counts (what
+            would have been written, for a dry run), plus "errors": a list of
+            (line number, message).
+    """
+    connection = connect(db_path)
+    cursor = connection.cursor()
+    layouts = get_census_fields()
+    defaults = {YEAR_COLUMN: str(year or ""), TOWNSHIP_COLUMN: str(township or "")}
+    stats = {"imported": 0, "members_added": 0, "groups_created": 0, "errors": []}
+
+    try:
+        maps = ImportMaps(cursor)
+
+        with open(path, newline="", encoding="utf-8-sig") as sheet:
+            reader = csv.DictReader(sheet)
+            header, unknown = _normalize_header(reader.fieldnames)
+            if unknown:
+                print(f"Ignoring unknown column(s): {', '.join(unknown)}")
+
+            def flush(chunk):
+                try:
+                    _commit_chunk(connection, cursor, [record for _, record in chunk], maps, stats, dry_run)
+                except (sqlite3.Error, ValueError):
+                    # Find the rows the database rejects; keep the rest
+                    for line_number, record in chunk:
+                        try:
+                            _commit_chunk(connection, cursor, [record], maps, stats, dry_run)
+                        except (sqlite3.Error, ValueError) as e:
+                            stats["errors"].append((line_number, f"database error: {e}"))
+
+            chunk = []
+            seen = set()  # (person, year) pairs earlier in the current chunk
+            for row in reader:
+                line_number = reader.line_num
+                values = {label: (row.get(name) or "").strip() for name, label in header.items()}
+                record, error = validate_row(values, layouts, maps, defaults)
+                if record and (record["person_id"], record["year"]) in seen:
+                    record, error = None, f"person {record['person_id']} appears twice for {record['year']}"
+                if error:
+                    stats["errors"].append((line_number, error))
+                    continue
+                seen.add((record["person_id"], record["year"]))
+                chunk.append((line_number, record))
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    chunk, seen = [], set()
+            if chunk:
+                flush(chunk)
+
+        stats["errors"].sort()
+        return stats
+    finally:
+        connection.close()
+
+
+def write_error_report(path, errors):
+    """Write (line number, message) pairs to a CSV file."""
+    with open(path, "w", newline="", encoding="utf-8") as report:
+        writer = csv.writer(report)
+        writer.writerow(["Line", "Error"])
+        writer.writerows(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import a Census transcription sheet (CSV).")
+    parser.add_argument("sheet", help="CSV file to import")
+    parser.add_argument("--year", help="Census year for rows without one")
+    parser.add_argument("--township", help="township name or id for rows without one")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--errors", help="write rejected rows to this CSV file")
+    parser.add_argument("--dry-run", action="store_true", help="validate and roll back every chunk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = import_census_sheet(args.sheet, args.db, args.year, args.township, args.chunk_size, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    verb = "Validated" if args.dry_run else "Imported"
+    print(f"{verb} {stats['imported']} Census record(s) in {elapsed:.1f}s.")
+    print(f"  ResGroups created: {stats['groups_created']}, members added: {stats['members_added']}")
+
+    errors = stats["errors"]
+    if errors:
+        print(f"{len(errors)} row(s) rejected:")
+        for line_number, message in errors[:ERROR_SAMPLE_SIZE]:
+            print(f"  line {line_number}: {message}")
+        if len(errors) > ERROR_SAMPLE_SIZE:
+            print(f"  ... and {len(errors) - ERROR_SAMPLE_SIZE} more")
+        if args.errors:
+            write_error_report(args.errors, errors)
+            print(f"Rejected rows written to {args.errors}")
+
+
+if __name__ == "__main__":
+    main()
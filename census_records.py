@@ -3,6 +3,7 @@ import sqlite3
 from tkinter import ttk, messagebox
 from common_utils import load_townships
 from resgroup_utils import get_or_create_resgroup, add_resgroup_member, update_resgroup_address, cleanup_resgroup, show_entire_group
+from resgroup_sync import reconcile_resgroups
 
 current_address_mapping = {}
 
@@ -877,6 +878,9 @@ def save_census_record(cursor, entries, census_year, address, township, township
             add_resgroup_member(cursor, res_group_id, person_id, 
                                 role=census_data.get('Relation to Head', ''))
 
+        # Fold any household-key change into the affected ResGroups
+        reconcile_resgroups(cursor)
+
         # Commit transaction
         cursor.execute("COMMIT")
         transaction_started = False
@@ -987,6 +991,9 @@ def delete_census_record(cursor, census_tree, person_id):
                     f"has been maintained as other members exist."
                 )
 
+        # Clear the change log entry the delete just wrote
+        reconcile_resgroups(cursor)
+
         # Commit the transaction
         cursor.execute("COMMIT")
         
@@ -0,0 +1,242 @@
+# date_keys.py
+#
+# Sortable keys for the free-text date columns.
+#
+# Dates are typed as MM-DD-YYYY, MM-YYYY, YYYY, or a year with ABT/BEF/AFT,
+# and stored as entered, so they cannot be sorted as text.  Each date column
+# below gets a companion <column>_sort INTEGER column holding
+#
+#     YYYYMMDD * 10 + precision flag
+#
+# with unknown month and day stored as 00.  "Bef 1900" < "Abt 1900" < "1900"
+# < "05-1900" < "05-15-1900", and dates that do not parse are NULL, so lists
+# can ORDER BY <column>_sort IS NULL, <column>_sort and put them last.
+#
+# The keys are backfilled once with parse_date_input (migration 6).  After
+# that, triggers recompute a key whenever a row is inserted or its date
+# changes, using a SQL expression that accepts the same formats as
+# parse_date_input, so rows written by any tool stay sorted correctly.
+
+from date_utils import parse_date_input
+
+# (table, date column) pairs that get a <column>_sort key
+DATE_COLUMNS = [
+    ("People", "birth_date"),
+    ("People", "death_date"),
+    ("Residence", "start_date"),
+    ("Membership", "start_date"),
+    ("BusinessEvents", "event_start_date"),
+    ("Deeds", "execution_date"),
+]
+
+# parse_date_input precision -> last digit of the key
+PRECISION_FLAGS = {
+    "BEFORE": 1,
+    "ABOUT": 2,
+    "YEAR": 3,
+    "MONTH": 4,
+    "EXACT": 5,
+    "AFTER": 6,
+}
+_FLAG_PRECISIONS = {flag: precision for precision, flag in PRECISION_FLAGS.items()}
+
+
+def sort_column(column):
+    """Name of the sort key column for a date column."""
+    return f"{column}_sort"
+
+
+def date_sort_value(value):
+    """
+    Compute the sort key of a date as typed.
+
+    Args:
+        value: Date text (or a bare year as an int), as stored in the database.
+
+    Returns:
+        int: YYYYMMDD * 10 + precision flag, or None if the date is empty or
+            does not parse.
+    """
+    try:
+        parsed, precision = parse_date_input(value)
+    except ValueError:
+        return None
+    if not parsed:
+        return None
+    # strftime does not pad years before 1000 ("999-01-01"), so build the key from numbers
+    year, month, day = (list(map(int, parsed.split("-"))) + [0, 0])[:3]
+    return (year * 10000 + month * 100 + day) * 10 + PRECISION_FLAGS[precision]
+
+
+def decode_sort_value(key):
+    """
+    Split a sort key back into its parts.
+
+    Args:
+        key (int): A value from a <column>_sort column.
+
+    Returns:
+        tuple: (year, month, day, precision) with 0 for an unknown month or
+            day, or None if the key is None.
+    """
+    if key is None:
+        return None
+    date_part, flag = divmod(int(key), 10)
+    year, month_day = divmod(date_part, 10000)
+    month, day = divmod(month_day, 100)
+    return year, month, day, _FLAG_PRECISIONS.get(flag)
+
+
+def sort_value_range(value):
+    """
+    Lowest and highest sort keys of the dates a date as typed may stand for.
+
+    A full date stands for that day whatever its precision flag, so
+    "ABT 05-01-1880" matches 05-01-1880; a year, or a month and year, stands
+    for any day in that period, so "1880" covers 1880 through 12-31-1880.
+
+    Args:
+        value: Date text (or a bare year as an int).
+
+    Returns:
+        tuple: (low, high) sort keys, or None if the date does not parse.
+    """
+    key = date_sort_value(value)
+    if key is None:
+        return None
+    year, month, day, _ = decode_sort_value(key)
+    if month and day:
+        return key // 10 * 10, key // 10 * 10 + 9
+    start = (year * 10000 + month * 100) * 10
+    end = (year * 10000 + (month or 12) * 100 + 31) * 10 + 9
+    return start, end
+
+
+def sort_value_sql(expression):
+    """
+    SQL expression computing the sort key of a date expression.
+
+    Accepts exactly what parse_date_input accepts: an optional "ABT ",
+    "BEF " or "AFT " prefix, then YYYY-MM-DD, MM-DD-YYYY (a real calendar
+    date), MM-YYYY or YYYY.  Anything else gives NULL.  Written without a
+    WITH clause so it can be used inside triggers.
+
+    Args:
+        expression (str): SQL expression of the date, e.g. "NEW.birth_date".
+
+    Returns:
+        str: The SQL expression.
+    """
+    mdy_iso = "substr(s, 7, 4) || '-' || substr(s, 1, 2) || '-' || substr(s, 4, 2)"
+    return f"""(SELECT CASE
+            WHEN s GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+                THEN CAST(replace(s, '-', '') AS INTEGER) * 10 + f
+            WHEN s GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]'
+                 AND substr(s, 7, 4) <> '0000' AND date({mdy_iso}, '+0 days') = {mdy_iso}
+                THEN CAST(substr(s, 7, 4) || substr(s, 1, 2) || substr(s, 4, 2) AS INTEGER) * 10 + f
+            WHEN s GLOB '[0-9][0-9]-[0-9][0-9][0-9][0-9]'
+                 AND substr(s, 1, 2) BETWEEN '01' AND '12' AND substr(s, 4, 4) <> '0000'
+                THEN CAST(substr(s, 4, 4) || substr(s, 1, 2) || '00' AS INTEGER) * 10 + {PRECISION_FLAGS["MONTH"]}
+            WHEN s GLOB '[0-9][0-9][0-9][0-9]'
+                THEN CAST(s AS INTEGER) * 100000
+                     + CASE f WHEN {PRECISION_FLAGS["EXACT"]} THEN {PRECISION_FLAGS["YEAR"]} ELSE f END
+        END
+        FROM (
+            SELECT
+                CASE WHEN substr(d, 1, 4) IN ('ABT ', 'BEF ', 'AFT ') THEN substr(d, 5) ELSE d END AS s,
+                CASE substr(d, 1, 4)
+                    WHEN 'BEF ' THEN {PRECISION_FLAGS["BEFORE"]}
+                    WHEN 'ABT ' THEN {PRECISION_FLAGS["ABOUT"]}
+                    WHEN 'AFT ' THEN {PRECISION_FLAGS["AFTER"]}
+                    ELSE {PRECISION_FLAGS["EXACT"]}
+                END AS f
+            FROM (SELECT upper(trim(CAST({expression} AS TEXT), char(32, 9, 10, 11, 12, 13))) AS d)
+        ))"""
+
+
+def date_key_triggers(table, columns):
+    """
+    CREATE TRIGGER statements keeping the sort keys of one table current.
+
+    Args:
+        table (str): Table name.
+        columns (list): Date columns of the table that have a sort key.
+
+    Returns:
+        list: SQL statements.
+    """
+    name = table.lower()
+    assignments = ", ".join(f"{sort_column(column)} = {sort_value_sql(f'NEW.{column}')}" for column in columns)
+    statements = [f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{name}_date_keys_insert
+        AFTER INSERT ON {table}
+        WHEN {' OR '.join(f'NEW.{column} IS NOT NULL' for column in columns)}
+        BEGIN
+            UPDATE {table} SET {assignments} WHERE rowid = NEW.rowid;
+        END
+    """]
+    for column in columns:
+        statements.append(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{name}_{column}_sort_update
+        AFTER UPDATE OF {column} ON {table}
+        WHEN OLD.{column} IS NOT NEW.{column}
+        BEGIN
+            UPDATE {table} SET {sort_column(column)} = {sort_value_sql(f'NEW.{column}')} WHERE rowid = NEW.rowid;
+        END
+    """)
+    return statements
+
+
+def backfill_date_keys(cursor, table, column):
+    """
+    Recompute every sort key of one date column with parse_date_input.
+
+    Args:
+        cursor: SQLite cursor object.
+        table (str): Table name.
+        column (str): Date column.
+
+    Returns:
+        int: Number of rows whose date has a key.
+    """
+    cursor.execute(f"SELECT rowid, {column} FROM {table}")
+    keys = [(date_sort_value(value), rowid) for rowid, value in cursor.fetchall()]
+    cursor.executemany(f"UPDATE {table} SET {sort_column(column)} = ? WHERE rowid = ?", keys)
+    return sum(1 for key, _ in keys if key is not None)
+
+
+def _columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    return [row[1] for row in cursor.fetchall()]
+
+
+def create_date_keys(cursor):
+    """
+    Add, index, backfill and maintain the sort key of every date column present.
+
+    Args:
+        cursor: SQLite cursor object.
+
+    Returns:
+        dict: {(table, column): number of rows with a key}; tables or columns
+            missing from the database are left out.
+    """
+    by_table = {}
+    for table, column in DATE_COLUMNS:
+        if column in _columns(cursor, table):
+            by_table.setdefault(table, []).append(column)
+
+    counts = {}
+    for table, columns in by_table.items():
+        existing = _columns(cursor, table)
+        for column in columns:
+            key_column = sort_column(column)
+            if key_column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {key_column} INTEGER")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table.lower()}_{key_column} ON {table} ({key_column})"
+            )
+            counts[(table, column)] = backfill_date_keys(cursor, table, column)
+        for statement in date_key_triggers(table, columns):
+            cursor.execute(statement)
+    return counts
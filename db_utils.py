@@ -0,0 +1,121 @@
+# db_utils.py
+#
+# One place to open and configure SQLite connections to the Phoenix database.
+# Windows share a connection per thread instead of each module opening its own
+# at import time, and every connection gets the same pragmas so that several
+# open windows do not stall each other with "database is locked" errors.
+
+import sqlite3
+import threading
+
+DB_PATH = "phoenix.db"
+
+BUSY_TIMEOUT_MS = 5000          # Wait this long for a lock before raising
+CACHE_SIZE_KB = 65536           # 64 MB page cache per connection
+MMAP_SIZE = 268435456           # Map up to 256 MB of the file into memory
+
+_local = threading.local()
+
+
+def configure_connection(connection):
+    """
+    Apply the standard pragmas to a connection.
+
+    WAL lets readers keep working while another window writes, and
+    synchronous=NORMAL is safe under WAL while avoiding an fsync per commit.
+
+    Args:
+        connection: SQLite connection object.
+
+    Returns:
+        The same connection, for chaining.
+    """
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size = -{int(CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+    return connection
+
+
+def connect(db_path=DB_PATH):
+    """
+    Open a new, configured connection that the caller owns and closes.
+
+    Use this for batch jobs and worker threads; windows should use
+    get_connection() instead.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: The configured connection.
+    """
+    connection = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    return configure_connection(connection)
+
+
+def get_connection(db_path=DB_PATH):
+    """
+    Return the shared connection for this thread, opening it on first use.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: The shared, configured connection.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    connection = connections.get(db_path)
+    if connection is None:
+        connection = connections[db_path] = connect(db_path)
+    return connection
+
+
+def refresh_before_read(cursor, refresh, *args):
+    """
+    Apply pending changes to a derived table just before reading it.
+
+    Derived tables (parsed geometry, deed summaries, title chains) are brought
+    up to date by refresh(cursor, *args) when they are read.  If the caller
+    already has a transaction open, the refresh joins it and the caller
+    commits or rolls back as usual; otherwise it is committed here, or rolled
+    back if the refresh fails, so a read never leaves a write transaction open.
+
+    Args:
+        cursor: SQLite cursor object.
+        refresh: Function that updates the derived table.
+        *args: Extra arguments for refresh.
+
+    Returns:
+        Whatever refresh returned.
+    """
+    in_transaction = cursor.connection.in_transaction
+    try:
+        result = refresh(cursor, *args)
+    except Exception:
+        if not in_transaction:
+            cursor.connection.rollback()
+        raise
+    if not in_transaction and cursor.connection.in_transaction:
+        cursor.connection.commit()
+    return result
+
+
+def get_cursor(db_path=DB_PATH):
+    """Return a new cursor on the shared connection for this thread."""
+    return get_connection(db_path).cursor()
+
+
+def close_connection(db_path=DB_PATH):
+    """Close this thread's shared connection, if one is open."""
+    connections = getattr(_local, "connections", {})
+    connection = connections.pop(db_path, None)
+    if connection is not None:
+        connection.close()
@@ -0,0 +1,443 @@
+# dedupe.py
+#
+# Batch duplicate-person detection.
+#
+# Comparing every person with every other is quadratic, so candidates are
+# blocked first: people are grouped by the Soundex code of their last and
+# married names, and within a group only people born within
+# BIRTH_YEAR_WINDOW years of each other are compared (people with no birth
+# year are compared with those whose first name also sounds the same).
+# Blocks are scored in parallel on a process pool, and the pairs scoring at
+# least MIN_SCORE are written to DuplicateCandidates for review, best first.
+#
+#   python dedupe.py [--db phoenix.db] [--workers N] [--min-score 0.75] [--top 20]
+#
+# Re-running replaces the pending candidates; pairs already marked
+# 'duplicate' or 'not_duplicate' are kept and not suggested again.
+
+import argparse
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from db_utils import DB_PATH, connect
+from date_utils import parse_date_input
+from phonetic import fold_name, phonetic_codes, soundex
+
+CANDIDATE_TABLE = "DuplicateCandidates"
+
+BIRTH_YEAR_WINDOW = 2
+MIN_SCORE = 0.75
+BATCH_PEOPLE = 5000  # People per pool task; small blocks are sent together
+
+# Relative weight of each comparison in the score
+WEIGHTS = {
+    "first_name": 0.30,
+    "last_name": 0.20,
+    "middle_name": 0.05,
+    "birth": 0.20,
+    "death": 0.10,
+    "parents": 0.10,
+    "spouses": 0.05,
+}
+
+CANDIDATE_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CANDIDATE_TABLE} (
+        person1_id INTEGER NOT NULL,
+        person2_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        reasons TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        found_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (person1_id, person2_id)
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_duplicatecandidates_status_score ON {CANDIDATE_TABLE} (status, score DESC)",
+]
+
+# Fields of the per-person tuple handed to the workers; the *_CODE fields
+# hold the Soundex codes, computed once while loading
+(P_ID, P_FIRST, P_MIDDLE, P_LAST, P_MARRIED, P_BIRTH, P_BIRTH_YEAR,
+ P_DEATH, P_DEATH_YEAR, P_FATHER, P_MOTHER, P_SPOUSES,
+ P_FIRST_CODE, P_MIDDLE_CODE, P_LAST_CODE, P_MARRIED_CODE) = range(16)
+
+
+# -------------------------------
+# LOADING AND BLOCKING
+# -------------------------------
+
+_NOT_NAME_CHARS = re.compile(r"[^a-z ]")
+
+# Names repeat a lot, so each distinct name is coded once per run
+_soundex = lru_cache(maxsize=None)(soundex)
+
+
+@lru_cache(maxsize=None)
+def _surname_codes(name):
+    return frozenset(phonetic_codes(name, "soundex"))
+
+
+def _clean(name):
+    # Folded first, so "Müller" and "O'Brien" keep all their letters
+    return _NOT_NAME_CHARS.sub("", fold_name(name).lower()).strip()
+
+
+@lru_cache(maxsize=None)
+def _parse_date(value):
+    """Normalize a People date through parse_date_input; returns (iso string, year)."""
+    try:
+        parsed, _ = parse_date_input(value)
+    except ValueError:
+        # Free-text dates: keep whatever year they mention
+        match = re.search(r"\b(1[5-9]\d\d|20\d\d)\b", str(value or ""))
+        return "", int(match.group(1)) if match else None
+    return parsed, int(parsed[:4]) if parsed else None
+
+
+def _parent_id(value):
+    try:
+        return int(value) or None
+    except (TypeError, ValueError):
+        return None
+
+
+def load_people(cursor):
+    """
+    Read everyone once, with parsed dates and spouse ids, for scoring.
+
+    Returns:
+        list: One tuple per person, indexed by the P_* constants.
+    """
+    spouses = defaultdict(set)
+    cursor.execute("SELECT person1_id, person2_id FROM Marriages")
+    for person1_id, person2_id in cursor.fetchall():
+        if person1_id and person2_id:
+            spouses[person1_id].add(person2_id)
+            spouses[person2_id].add(person1_id)
+
+    cursor.execute("""
+        SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date, father, mother
+        FROM People
+    """)
+    people = []
+    for person_id, first, middle, last, married, birth, death, father, mother in cursor.fetchall():
+        birth_iso, birth_year = _parse_date(birth)
+        death_iso, death_year = _parse_date(death)
+        names = (_clean(first), _clean(middle), _clean(last), _clean(married))
+        people.append((
+            person_id, *names,
+            birth_iso, birth_year, death_iso, death_year,
+            _parent_id(father), _parent_id(mother), frozenset(spouses.get(person_id, ())),
+            *(_soundex(name) for name in names),
+        ))
+    return people
+
+
+def build_blocks(people):
+    """
+    Group people by the Soundex code of each word of their last and married names.
+
+    Returns:
+        list: Blocks (lists of person tuples) with at least two people, largest first.
+    """
+    blocks = defaultdict(list)
+    for person in people:
+        for code in _surname_codes(person[P_LAST]) | _surname_codes(person[P_MARRIED]):
+            blocks[code].append(person)
+    return sorted((block for block in blocks.values() if len(block) > 1), key=len, reverse=True)
+
+
+def batch_blocks(blocks, batch_people=BATCH_PEOPLE):
+    """Pack blocks into pool tasks of roughly batch_people people each."""
+    batch, size = [], 0
+    for block in blocks:
+        batch.append(block)
+        size += len(block)
+        if size >= batch_people:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+# -------------------------------
+# SCORING
+# -------------------------------
+
+def _name_similarity(a, b, code_a, code_b):
+    if not a or not b:
+        return None, ""
+    if a == b:
+        return 1.0, "exact"
+    if code_a == code_b:
+        return 0.8, "sounds alike"
+    if a[0] == b[0]:
+        return 0.3, "same initial"
+    return 0.0, "different"
+
+
+def _date_similarity(iso1, year1, iso2, year2):
+    if year1 is None or year2 is None:
+        return None, ""
+    if iso1 and iso1 == iso2 and len(iso1) == 10:
+        return 1.0, "same date"
+    if iso1 and len(iso1) >= 7 and iso1[:7] == (iso2 or "")[:7]:
+        return 0.9, "same month"
+    gap = abs(year1 - year2)
+    if gap == 0:
+        return 0.8, "same year"
+    if gap == 1:
+        return 0.6, "1 year apart"
+    if gap <= BIRTH_YEAR_WINDOW:
+        return 0.4, f"{gap} years apart"
+    return 0.0, f"{gap} years apart"
+
+
+def score_pair(a, b):
+    """
+    Score how likely two people are the same person.
+
+    Comparisons with nothing to compare (a missing date, unknown parents) are
+    left out rather than counted against the pair.
+
+    Returns:
+        tuple: (score between 0 and 1, reasons string)
+    """
+    parts = []
+
+    parts.append(("first_name", "first name")
+                 + _name_similarity(a[P_FIRST], b[P_FIRST], a[P_FIRST_CODE], b[P_FIRST_CODE]))
+
+    surname = max(
+        (_name_similarity(a[x], b[y], a[x_code], b[y_code])
+         for x, x_code in ((P_LAST, P_LAST_CODE), (P_MARRIED, P_MARRIED_CODE))
+         for y, y_code in ((P_LAST, P_LAST_CODE), (P_MARRIED, P_MARRIED_CODE))
+         if a[x] and b[y]),
+        default=(None, ""),
+    )
+    parts.append(("last_name", "surname") + surname)
+    parts.append(("middle_name", "middle name")
+                 + _name_similarity(a[P_MIDDLE], b[P_MIDDLE], a[P_MIDDLE_CODE], b[P_MIDDLE_CODE]))
+    parts.append(("birth", "birth") + _date_similarity(a[P_BIRTH], a[P_BIRTH_YEAR], b[P_BIRTH], b[P_BIRTH_YEAR]))
+    parts.append(("death", "death") + _date_similarity(a[P_DEATH], a[P_DEATH_YEAR], b[P_DEATH], b[P_DEATH_YEAR]))
+
+    # Parents: a shared parent is strong evidence, two different known parents is strong against
+    parent_scores = []
+    for field in (P_FATHER, P_MOTHER):
+        if a[field] and b[field]:
+            parent_scores.append(1.0 if a[field] == b[field] else 0.0)
+    if parent_scores:
+        parts.append(("parents", "parents", sum(parent_scores) / len(parent_scores),
+                      "same" if min(parent_scores) == 1.0 else "differ" if max(parent_scores) == 0.0 else "one shared"))
+
+    if a[P_SPOUSES] and b[P_SPOUSES]:
+        shared = a[P_SPOUSES] & b[P_SPOUSES]
+        parts.append(("spouses", "spouse", 1.0 if shared else 0.3, "shared" if shared else "different"))
+
+    total_weight = 0.0
+    total = 0.0
+    reasons = []
+    for key, label, similarity, detail in parts:
+        if similarity is None:
+            continue
+        total_weight += WEIGHTS[key]
+        total += WEIGHTS[key] * similarity
+        reasons.append(f"{label} {detail}")
+
+    if total_weight == 0:
+        return 0.0, ""
+    return round(total / total_weight, 4), "; ".join(reasons)
+
+
+def _candidate_pairs(block, window):
+    """Yield the pairs within one block worth scoring."""
+    # Born within the window, and first names that start alike (or are unknown)
+    dated = sorted((p for p in block if p[P_BIRTH_YEAR] is not None), key=lambda p: p[P_BIRTH_YEAR])
+    for i, a in enumerate(dated):
+        initial = a[P_FIRST][:1]
+        for b in dated[i + 1:]:
+            if b[P_BIRTH_YEAR] - a[P_BIRTH_YEAR] > window:
+                break
+            if initial and b[P_FIRST] and b[P_FIRST][0] != initial:
+                continue
+            yield a, b
+
+    # Without a birth year, only compare people whose first names sound the same
+    undated = [p for p in block if p[P_BIRTH_YEAR] is None]
+    if undated:
+        by_first = defaultdict(list)
+        for person in block:
+            if person[P_FIRST]:
+                by_first[person[P_FIRST_CODE]].append(person)
+        for person in undated:
+            if not person[P_FIRST]:
+                continue
+            for other in by_first[person[P_FIRST_CODE]]:
+                # Each undated pair once; undated-dated pairs from the undated side
+                if other[P_ID] != person[P_ID] and (other[P_BIRTH_YEAR] is not None or other[P_ID] > person[P_ID]):
+                    yield person, other
+
+
+def score_blocks(blocks, window=BIRTH_YEAR_WINDOW, min_score=MIN_SCORE):
+    """
+    Score every candidate pair in a batch of blocks; runs in a pool worker.
+
+    Returns:
+        list: (person1_id, person2_id, score, reasons) with person1_id < person2_id.
+    """
+    results = {}
+    for block in blocks:
+        for a, b in _candidate_pairs(block, window):
+            if a[P_ID] > b[P_ID]:
+                a, b = b, a
+            key = (a[P_ID], b[P_ID])
+            if key in results:
+                continue  # Already scored from another surname block
+            score, reasons = score_pair(a, b)
+            if score >= min_score:
+                results[key] = (a[P_ID], b[P_ID], score, reasons)
+    return list(results.values())
+
+
+# -------------------------------
+# REVIEW TABLE
+# -------------------------------
+
+def create_candidate_table(cursor):
+    """Create the DuplicateCandidates review table if it does not exist."""
+    for statement in CANDIDATE_SCHEMA:
+        cursor.execute(statement)
+
+
+def save_candidates(cursor, candidates):
+    """
+    Replace the pending candidates; pairs already reviewed are left alone.
+
+    Returns:
+        int: Number of pending candidates written.
+    """
+    cursor.execute(f"DELETE FROM {CANDIDATE_TABLE} WHERE status = 'pending'")
+    cursor.executemany(f"""
+        INSERT OR IGNORE INTO {CANDIDATE_TABLE} (person1_id, person2_id, score, reasons)
+        VALUES (?, ?, ?, ?)
+    """, candidates)
+    cursor.execute(f"SELECT COUNT(*) FROM {CANDIDATE_TABLE} WHERE status = 'pending'")
+    return cursor.fetchone()[0]
+
+
+def load_candidates(cursor, status="pending", limit=None):
+    """
+    Candidate pairs for review, highest score first.
+
+    Returns:
+        list: (person1_id, person1 name, person2_id, person2 name, score, reasons)
+    """
+    query = f"""
+        SELECT d.person1_id,
+               TRIM(COALESCE(p1.first_name, '') || ' ' || COALESCE(p1.last_name, '')),
+               d.person2_id,
+               TRIM(COALESCE(p2.first_name, '') || ' ' || COALESCE(p2.last_name, '')),
+               d.score, d.reasons
+        FROM {CANDIDATE_TABLE} d
+        JOIN People p1 ON p1.id = d.person1_id
+        JOIN People p2 ON p2.id = d.person2_id
+        WHERE d.status = ?
+        ORDER BY d.score DESC
+    """
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    cursor.execute(query, (status,))
+    return cursor.fetchall()
+
+
+def set_candidate_status(cursor, person1_id, person2_id, status):
+    """Record a review decision ('duplicate' or 'not_duplicate') for a pair."""
+    cursor.execute(f"""
+        UPDATE {CANDIDATE_TABLE} SET status = ?
+        WHERE person1_id = ? AND person2_id = ?
+    """, (status, min(person1_id, person2_id), max(person1_id, person2_id)))
+
+
+# -------------------------------
+# DRIVER
+# -------------------------------
+
+def find_duplicates(db_path=DB_PATH, workers=None, window=BIRTH_YEAR_WINDOW, min_score=MIN_SCORE):
+    """
+    Run the whole detection pass and write the review table.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        workers (int): Worker processes; None uses every CPU, 1 scores in this process.
+        window (int): Largest birth-year gap compared.
+        min_score (float): Lowest score kept.
+
+    Returns:
+        int: Number of pending candidate pairs.
+    """
+    connection = connect(db_path)
+    cursor = connection.cursor()
+
+    try:
+        start = time.perf_counter()
+        people = load_people(cursor)
+        blocks = build_blocks(people)
+        print(f"Loaded {len(people)} people into {len(blocks)} surname blocks "
+              f"({time.perf_counter() - start:.1f}s).")
+
+        candidates = {}
+        batches = list(batch_blocks(blocks))
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(batches) <= 1:
+            results = (score_blocks(batch, window, min_score) for batch in batches)
+            for pairs in results:
+                for pair in pairs:
+                    candidates.setdefault(pair[:2], pair)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(score_blocks, batch, window, min_score) for batch in batches]
+                for done, future in enumerate(futures, 1):
+                    for pair in future.result():
+                        candidates.setdefault(pair[:2], pair)
+                    print(f"  Scored batch {done}/{len(futures)}")
+
+        cursor.execute("BEGIN")
+        create_candidate_table(cursor)
+        pending = save_candidates(cursor, list(candidates.values()))
+        connection.commit()
+
+        print(f"Found {len(candidates)} candidate pairs with score >= {min_score}; "
+              f"{pending} pending review ({time.perf_counter() - start:.1f}s).")
+        return pending
+
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find likely duplicate people and queue them for review.")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--window", type=int, default=BIRTH_YEAR_WINDOW, help="birth-year window in years")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE, help="lowest score to keep (0-1)")
+    parser.add_argument("--top", type=int, default=20, help="print this many top candidates")
+    args = parser.parse_args()
+
+    find_duplicates(args.db, args.workers, args.window, args.min_score)
+
+    connection = connect(args.db)
+    try:
+        for person1_id, name1, person2_id, name2, score, reasons in load_candidates(connection.cursor(), limit=args.top):
+            print(f"{score:.2f}  {person1_id} {name1}  <->  {person2_id} {name2}  ({reasons})")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# deed_summary.py
+#
+# DeedSummary: one precomputed row per deed for the person's deed tab.
+#
+# The tab shows each deed's first legal description segment, the combined
+# description of all segments, the kinds of map data linked to it and the
+# other parties.  Working those out took a GROUP_CONCAT over every legal
+# description, a correlated subquery per deed and a self-join on DeedParties.
+# DeedSummary keeps them per deed, so the tab is one lookup through
+# DeedParties(person_id).
+#
+# Triggers on Deeds, LegalDescriptions, DeedParties, People names, GeoJSONLink
+# and GeoJSONData only log the deeds they touch in DeedSummaryLog;
+# refresh_deed_summary() rebuilds the logged deeds in one statement before
+# the next read, like the PeopleAncestry closure log.
+
+import json
+from db_utils import refresh_before_read
+
+SUMMARY_TABLE = "DeedSummary"
+SUMMARY_LOG_TABLE = "DeedSummaryLog"
+
+# Deeds a GeoJSONLink row belongs to, for a trigger row alias (NEW or OLD)
+_LINKED_DEEDS = """
+    SELECT {row}.record_id AS deed_id WHERE {row}.record_type = 'Deed' AND {row}.record_id IS NOT NULL
+    UNION
+    SELECT deed_id FROM LegalDescriptions
+    WHERE {row}.record_type = 'Deed' AND description_id = {row}.legal_description_id
+"""
+
+# Deeds whose map data is a GeoJSONData row, for a trigger row alias
+_GEOJSON_DEEDS = """
+    SELECT gl.record_id AS deed_id FROM GeoJSONLink gl
+    WHERE gl.geojson_id = {row}.geojson_id AND gl.record_type = 'Deed' AND gl.record_id IS NOT NULL
+    UNION
+    SELECT ld.deed_id FROM GeoJSONLink gl
+    JOIN LegalDescriptions ld ON ld.description_id = gl.legal_description_id
+    WHERE gl.geojson_id = {row}.geojson_id AND gl.record_type = 'Deed'
+"""
+
+# (trigger name, event, deeds to log)
+_LOG_TRIGGERS = [
+    ("deeds_insert", "AFTER INSERT ON Deeds", "SELECT NEW.deed_id AS deed_id"),
+    ("deeds_update", "AFTER UPDATE OF deed_id ON Deeds", "SELECT OLD.deed_id AS deed_id UNION SELECT NEW.deed_id"),
+    ("deeds_delete", "AFTER DELETE ON Deeds", "SELECT OLD.deed_id AS deed_id"),
+    ("legaldescriptions_insert", "AFTER INSERT ON LegalDescriptions", "SELECT NEW.deed_id AS deed_id"),
+    ("legaldescriptions_update", "AFTER UPDATE ON LegalDescriptions", "SELECT OLD.deed_id AS deed_id UNION SELECT NEW.deed_id"),
+    ("legaldescriptions_delete", "AFTER DELETE ON LegalDescriptions", "SELECT OLD.deed_id AS deed_id"),
+    ("deedparties_insert", "AFTER INSERT ON DeedParties", "SELECT NEW.deed_id AS deed_id"),
+    ("deedparties_update", "AFTER UPDATE ON DeedParties", "SELECT OLD.deed_id AS deed_id UNION SELECT NEW.deed_id"),
+    ("deedparties_delete", "AFTER DELETE ON DeedParties", "SELECT OLD.deed_id AS deed_id"),
+    ("people_update", "AFTER UPDATE OF id, first_name, last_name ON People",
+     "SELECT deed_id FROM DeedParties WHERE person_id IN (OLD.id, NEW.id)"),
+    ("people_delete", "AFTER DELETE ON People", "SELECT deed_id FROM DeedParties WHERE person_id = OLD.id"),
+    ("geojsonlink_insert", "AFTER INSERT ON GeoJSONLink", _LINKED_DEEDS.format(row="NEW")),
+    ("geojsonlink_update", "AFTER UPDATE ON GeoJSONLink",
+     _LINKED_DEEDS.format(row="OLD") + " UNION " + _LINKED_DEEDS.format(row="NEW")),
+    ("geojsonlink_delete", "AFTER DELETE ON GeoJSONLink", _LINKED_DEEDS.format(row="OLD")),
+    ("geojsondata_update", "AFTER UPDATE OF feature_type ON GeoJSONData", _GEOJSON_DEEDS.format(row="NEW")),
+    ("geojsondata_delete", "AFTER DELETE ON GeoJSONData", _GEOJSON_DEEDS.format(row="OLD")),
+]
+
+SUMMARY_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+        deed_id INTEGER PRIMARY KEY,
+        first_description_id INTEGER,
+        segment_count INTEGER NOT NULL,
+        combined_description TEXT,
+        display_description TEXT,
+        geodata_types TEXT,
+        parties TEXT NOT NULL
+    )
+    """,
+    f"CREATE TABLE IF NOT EXISTS {SUMMARY_LOG_TABLE} (deed_id INTEGER PRIMARY KEY)",
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{name}_deed_summary
+    {event}
+    BEGIN
+        INSERT OR IGNORE INTO {SUMMARY_LOG_TABLE} (deed_id)
+        SELECT deed_id FROM ({deeds}) WHERE deed_id IS NOT NULL;
+    END
+    """
+    for name, event, deeds in _LOG_TRIGGERS
+]
+
+# Summary rows of the deeds chosen by {deeds} (a SELECT of deed ids).  The first
+# segment and the single-segment description follow load_deed_records: the
+# segment numbered 1 (or unnumbered); the combined text joins every segment.
+# parties is a JSON array of [person_id, name, role] in DeedParties order.
+_SUMMARY_SELECT = """
+    SELECT
+        d.deed_id,
+        fd.description_id,
+        COALESCE(segments.segment_count, 0),
+        segments.combined_desc,
+        CASE WHEN segments.segment_count > 1 THEN segments.combined_desc ELSE fd.description_text END,
+        (
+            SELECT GROUP_CONCAT(DISTINCT gd.feature_type)
+            FROM GeoJSONLink gl
+            JOIN GeoJSONData gd ON gd.geojson_id = gl.geojson_id
+            WHERE gl.record_type = 'Deed'
+              AND (gl.record_id = d.deed_id
+                   OR gl.legal_description_id IN (SELECT description_id FROM LegalDescriptions WHERE deed_id = d.deed_id))
+        ),
+        (
+            SELECT json_group_array(json_array(p.id, TRIM(p.first_name || ' ' || p.last_name), dp.party_role))
+            FROM (SELECT * FROM DeedParties WHERE deed_id = d.deed_id ORDER BY rowid) dp
+            JOIN People p ON p.id = dp.person_id
+        )
+    FROM Deeds d
+    LEFT JOIN (
+        SELECT deed_id, GROUP_CONCAT(description_text, ' and ') AS combined_desc, COUNT(*) AS segment_count
+        FROM (SELECT deed_id, description_text FROM LegalDescriptions ORDER BY deed_id, segment_order, description_id)
+        GROUP BY deed_id
+    ) segments ON segments.deed_id = d.deed_id
+    LEFT JOIN LegalDescriptions fd ON fd.description_id = (
+        SELECT description_id FROM LegalDescriptions
+        WHERE deed_id = d.deed_id AND (segment_order = 1 OR segment_order IS NULL)
+        ORDER BY segment_order IS NULL, description_id
+        LIMIT 1
+    )
+    WHERE d.deed_id IN ({deeds})
+"""
+
+# Deed tab rows for a person: one per deed and role they hold in it
+PERSON_DEEDS_QUERY = f"""
+    SELECT d.deed_id, s.first_description_id, s.geodata_types, d.execution_date, d.deed_type,
+           dp.party_role, s.parties, d.consideration_amount, s.display_description, d.notes
+    FROM DeedParties dp
+    JOIN Deeds d ON d.deed_id = dp.deed_id
+    LEFT JOIN {SUMMARY_TABLE} s ON s.deed_id = dp.deed_id
+    WHERE dp.person_id = ?
+    GROUP BY dp.deed_id, dp.party_role
+    ORDER BY d.execution_date_sort IS NULL, d.execution_date_sort, d.deed_id
+"""
+
+
+def create_deed_summary(cursor):
+    """Create DeedSummary, its change log and the triggers that fill the log."""
+    for statement in SUMMARY_SCHEMA:
+        cursor.execute(statement)
+
+
+def has_deed_summary(cursor):
+    """Return True if DeedSummary exists in this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SUMMARY_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def rebuild_deed_summary(cursor):
+    """
+    Recompute the summary of every deed.
+
+    Returns:
+        int: Number of deeds summarized.
+    """
+    cursor.execute(f"DELETE FROM {SUMMARY_TABLE}")
+    cursor.execute(f"DELETE FROM {SUMMARY_LOG_TABLE}")
+    before = cursor.connection.total_changes
+    cursor.execute(f"INSERT INTO {SUMMARY_TABLE} " + _SUMMARY_SELECT.format(deeds="SELECT deed_id FROM Deeds"))
+    return cursor.connection.total_changes - before
+
+
+def refresh_deed_summary(cursor):
+    """
+    Recompute the summaries of the deeds logged as changed since the last refresh.
+
+    Returns:
+        int: Number of deeds refreshed (deleted deeds included).
+    """
+    cursor.execute(f"SELECT COUNT(*) FROM {SUMMARY_LOG_TABLE}")
+    count = cursor.fetchone()[0]
+    if not count:
+        return 0
+
+    cursor.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE deed_id IN (SELECT deed_id FROM {SUMMARY_LOG_TABLE})")
+    cursor.execute(
+        f"INSERT INTO {SUMMARY_TABLE} "
+        + _SUMMARY_SELECT.format(deeds=f"SELECT deed_id FROM {SUMMARY_LOG_TABLE}")
+    )
+    cursor.execute(f"DELETE FROM {SUMMARY_LOG_TABLE}")
+    return count
+
+
+def get_person_deeds(cursor, person_id):
+    """
+    Rows for a person's deed tab, from DeedSummary.
+
+    Logged changes are applied first.  Needs migrations 6 (date sort keys)
+    and 9 (DeedSummary).
+
+    Args:
+        cursor: SQLite cursor object.
+        person_id (int): People.id.
+
+    Returns:
+        list: (deed_id, first_description_id, geodata_types, execution_date,
+            deed_type, party_role, other_parties, consideration_amount,
+            display_description, notes) oldest deed first; other_parties is
+            the names of everyone else on the deed, comma-separated, once
+            per person (two parties may share a name, e.g. father and son).
+    """
+    refresh_before_read(cursor, refresh_deed_summary)
+
+    cursor.execute(PERSON_DEEDS_QUERY, (person_id,))
+    rows = []
+    for record in cursor.fetchall():
+        names = {}
+        for party_id, name, _role in json.loads(record[6] or "[]"):
+            if party_id != person_id and name:
+                names.setdefault(party_id, name)
+        rows.append(record[:6] + (", ".join(names.values()),) + record[7:])
+    return rows
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
+from db_utils import get_connection
+from deed_summary import get_person_deeds
 from edit_deed_dialog import EditDeedDialog
 from add_deed_dialog import AddDeedDialog
 from geodata import (
@@ -75,49 +77,7 @@ def initialize_deed_section(parent_frame, connection, person_id):
 def load_deed_records(cursor, tree, person_id):
     tree.delete(*tree.get_children())
 
-    query = """
-        WITH CombinedDescriptions AS (
-            SELECT 
-                d.deed_id,
-                GROUP_CONCAT(ld.description_text, ' and ') as combined_desc,
-                COUNT(*) as segment_count
-            FROM LegalDescriptions ld
-            JOIN Deeds d ON ld.deed_id = d.deed_id
-            GROUP BY d.deed_id
-        )
-        SELECT DISTINCT 
-            d.deed_id,
-            ld.description_id,
-            (
-                SELECT GROUP_CONCAT(DISTINCT gd.feature_type)
-                FROM GeoJSONLink gl
-                JOIN GeoJSONData gd ON gl.geojson_id = gd.geojson_id
-                WHERE gl.record_type = 'Deed' 
-                AND (gl.record_id = d.deed_id 
-                     OR gl.legal_description_id IN (
-                         SELECT description_id FROM LegalDescriptions WHERE deed_id = d.deed_id
-                     ))
-            ) as geodata_types,
-            d.execution_date,
-            d.deed_type,
-            dp1.party_role,
-            GROUP_CONCAT(CASE WHEN p.id != ? THEN TRIM(p.first_name || ' ' || p.last_name) ELSE '' END),
-            d.consideration_amount,
-            CASE WHEN cd.segment_count > 1 THEN cd.combined_desc ELSE ld.description_text END as display_description,
-            d.notes
-        FROM Deeds d
-        JOIN DeedParties dp1 ON d.deed_id = dp1.deed_id AND dp1.person_id = ?
-        JOIN DeedParties dp2 ON d.deed_id = dp2.deed_id
-        JOIN People p ON dp2.person_id = p.id
-        LEFT JOIN LegalDescriptions ld ON d.deed_id = ld.deed_id AND (ld.segment_order = 1 OR ld.segment_order IS NULL)
-        LEFT JOIN CombinedDescriptions cd ON d.deed_id = cd.deed_id
-        WHERE p.id != ?
-        GROUP BY d.deed_id, dp1.party_role
-        ORDER BY d.execution_date ASC
-    """
-
-    cursor.execute(query, (person_id, person_id, person_id))
-    records = cursor.fetchall()
+    records = get_person_deeds(cursor, person_id)
 
     type_icons = { 'POINT': '📍', 'LINE': '〰️', 'POLYGON': '⬡' }
     type_descriptions = {
@@ -130,7 +90,7 @@ def load_deed_records(cursor, tree, person_id):
         geodata_types = record[2].split(',') if record[2] else []
         map_indicator = ''.join(type_icons.get(t.strip(), '') for t in geodata_types if t.strip())
         amount = f"${float(record[7]):,.2f}" if record[7] else ""
-        other_parties = ', '.join(filter(None, (record[6] or '').split(',')))
+        other_parties = record[6]
         description = record[8] or ""
 
         values = (
@@ -147,8 +107,7 @@ def load_deed_records(cursor, tree, person_id):
 
 def add_deed_record(deed_tree, person_id):
     def refresh():
-        connection = sqlite3.connect('phoenix.db')
-        load_deed_records(connection.cursor(), deed_tree, person_id)
+        load_deed_records(get_connection().cursor(), deed_tree, person_id)
     dialog = AddDeedDialog(deed_tree.winfo_toplevel(), person_id)
     dialog.dialog.transient(deed_tree.winfo_toplevel())
     dialog.dialog.grab_set()
@@ -161,8 +120,7 @@ def edit_deed_record(deed_tree, person_id):
         messagebox.showwarning("No Selection", "Please select a deed record to edit.")
         return
     def refresh():
-        connection = sqlite3.connect('phoenix.db')
-        load_deed_records(connection.cursor(), deed_tree, person_id)
+        load_deed_records(get_connection().cursor(), deed_tree, person_id)
     deed_id = deed_tree.item(selected_item[0])['values'][0]
     dialog = EditDeedDialog(deed_tree.winfo_toplevel(), person_id, deed_id)
     dialog.dialog.transient(deed_tree.winfo_toplevel())
@@ -177,7 +135,7 @@ def delete_deed_record(deed_tree, person_id):
         return
 
     deed_id = deed_tree.item(selected_item[0])['values'][0]
-    connection = sqlite3.connect('phoenix.db')
+    connection = get_connection()
     cursor = connection.cursor()
 
     try:
@@ -219,4 +177,3 @@ def delete_deed_record(deed_tree, person_id):
 
     finally:
         cursor.close()
-        connection.close()
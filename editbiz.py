@@ -1,7 +1,6 @@
 # editbiz.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
 import sqlite3
 import webbrowser
 import urllib.parse
@@ -10,17 +9,15 @@ from date_utils import parse_date_input, format_date_for_display, date_sort_key
 from context_menu import create_context_menu, apply_context_menu_to_all_entries
 from person_linkage import person_search_popup
 from biz_linkage import open_biz_linkage_popup
+from db_utils import get_connection
+from window_manager import open_person_form, open_business_form
 
 
-DB_PATH = "phoenix.db"
-connection = sqlite3.connect(DB_PATH)
-cursor = connection.cursor()
-
 class EditBusinessForm:
     def __init__(self, master, biz_id=None):
         self.master = master
         self.biz_id = biz_id
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = get_connection()
         self.cursor = self.conn.cursor()
         self.entries = {}
         self.preceded_by_id_map = {}
@@ -51,9 +48,7 @@ class EditBusinessForm:
 
         if biz_id:
             self.master.destroy()  # Close current Edit Business form
-            new_root = tk.Tk()  # Create a new root window
-            EditBusinessForm(new_root, biz_id)  # Launch a new form
-            new_root.mainloop()  # Start the Tkinter event loop again
+            open_business_form(biz_id)  # Launch a new form
 
     def lookup_predecessor(self):
         def set_biz(biz_id):
@@ -433,7 +428,7 @@ class EditBusinessForm:
             person_id = values[0]
             if person_id:
                 self.master.destroy()  # Optional: close current biz form if needed
-                subprocess.Popen(["python", "editme.py", str(person_id)])
+                open_person_form(person_id)
     
     def sort_owner_tree_by_column(self, col):
         if not hasattr(self, '_owner_sort_state'):
@@ -778,7 +773,7 @@ class EditBusinessForm:
             values = self.employee_tree.item(selected[0])['values']
             person_id = values[0]
             if person_id:
-                subprocess.Popen(["python", "editme.py", str(person_id)])
+                open_person_form(person_id)
 
     
     def on_location_double_click(self, event):
@@ -851,7 +846,7 @@ class EditBusinessForm:
             FROM BusinessEvents e
             LEFT JOIN People p ON e.person_id = p.id
             WHERE e.biz_id = ?
-            ORDER BY e.event_start_date
+            ORDER BY e.event_start_date_sort IS NULL, e.event_start_date_sort
         """
         self.cursor.execute(query, (self.biz_id,))
         for row in self.cursor.fetchall():
@@ -1108,7 +1103,7 @@ class EditBusinessForm:
             result = self.cursor.fetchone()
             if result:
                 person_id = result[0]
-                subprocess.Popen(["python", "editme.py", str(person_id)])
+                open_person_form(person_id)
             else:
                 messagebox.showinfo("Info", f"No linked person found for '{person_name}'.")
 
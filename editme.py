@@ -1,10 +1,6 @@
 import sys
-import folium
-import geopandas as gpd
 import os
-import pandas as pd
 import re
-import requests
 import subprocess
 import sqlite3
 import tkinter as tk
@@ -12,21 +8,21 @@ from tkinter import ttk, font, messagebox, simpledialog, filedialog, Button, Top
 import traceback  # Import the traceback module for error handling
 import urllib.parse  # Import the urllib.parse module for URL encoding
 import webbrowser
-from bs4 import BeautifulSoup
-from shapely.geometry import Polygon
-from folium.plugins import TimestampedGeoJson
 from datetime import datetime
+from lazy_imports import lazy_import
+from lazy_tabs import LazyTabs
 from add_deed_dialog import AddDeedDialog
 from edit_deed_dialog import EditDeedDialog
 from person_linkage import open_person_linkage_popup
 
 from editbiz import EditBusinessForm
 
-from findagrave_agent_direct import (
-    findagrave_direct_search,
-    show_findagrave_picker,
-    clean_location_for_findagrave
-)
+
+# The FindAGrave agent (requests/bs4) and the map controller (folium,
+# geopandas, shapely) are only needed for web-search and map actions, so they
+# are imported the first time one of those actions runs.
+findagrave_agent_direct = lazy_import("findagrave_agent_direct")
+map_control = lazy_import("map_control")
 #from property_boundary import PropertyBoundaryCalculator
 #from geojson_dialog import AddGeoJSONDialog
 
@@ -64,17 +60,36 @@ from deeds import (
 from PIL import Image, ImageTk
 from context_menu import create_context_menu
 from date_utils import parse_date_input, format_date_for_display, add_date_format_menu
-from map_control import MapController
+from db_utils import get_connection, close_connection as close_shared_connection
+from phonetic import update_phonetic_codes
+from window_manager import (
+    hosted_form,
+    form_argv,
+    create_form_window,
+    run_form_mainloop,
+    open_person_form,
+    open_membership_for_person,
+    open_membership_edit
+)
 
 #from map_control import load_sections, load_boundary, load_placemarks
 
 # Connect to the database
-connection = sqlite3.connect('Phoenix.db')
+connection = get_connection()
 cursor = connection.cursor()
 connection_open = True
 
-# Create a single instance of MapController
-#map_controller = MapController()
+# Set when this form is opened inside the running app by window_manager
+hosted = hosted_form()
+
+# Single instance of MapController, created the first time a map is shown
+map_controller = None
+
+def get_map_controller():
+    global map_controller
+    if map_controller is None:
+        map_controller = map_control.MapController()
+    return map_controller
 
 spouse_list = []
 global related_people_tree
@@ -87,35 +102,6 @@ def open_link(url):
     else:
         messagebox.showinfo("Information", "No URL provided.")
 
-def convert_to_sortable_date(date_str):
-    if not date_str:
-        return None
-
-    if isinstance(date_str, int):
-        return f"{date_str:04d}-01-01"
-
-    date_str = date_str.strip()
-
-    # Try different formats, and log unrecognized formats for diagnostics
-    try:
-        return datetime.strptime(date_str, "%m-%d-%Y").strftime("%Y-%m-%d")
-    except ValueError:
-        pass
-
-    try:
-        return datetime.strptime(date_str, "%m-%Y").strftime("%Y-%m-01")
-    except ValueError:
-        pass
-
-    try:
-        return datetime.strptime(date_str, "%Y").strftime("%Y-01-01")
-    except ValueError:
-        pass
-
-    # Log or print to identify what's causing issues
-    print(f"Unrecognized date format: {date_str}")
-    return None
-
 def format_date(date_str):
     """Format date string for display."""
     if not date_str:
@@ -196,8 +182,8 @@ def close_form():
 # Where close_connection is a function defined as:
 def close_connection():
     global connection_open
-    if connection_open:
-        connection.close()
+    if connection_open and hosted is None:
+        close_shared_connection()
         connection_open = False
     window.destroy() # Close the form    
 
@@ -309,19 +295,19 @@ def open_spouse_record(event=None):
     spouse_id = entry_married_to.get()
     if spouse_id.isdigit():
         window.destroy()
-        subprocess.Popen(["python", "editme.py", str(spouse_id)])
+        open_person_form(spouse_id)
 
 def open_father_record(event=None):
     father_id = entry_father.get()
     if father_id.isdigit():
         window.destroy()
-        subprocess.Popen(["python", "editme.py", str(father_id)])
+        open_person_form(father_id)
 
 def open_mother_record(event=None):
     mother_id = entry_mother.get()
     if mother_id.isdigit():
         window.destroy()
-        subprocess.Popen(["python", "editme.py", str(mother_id)])
+        open_person_form(mother_id)
 
 def open_spouse_record():
     selected_spouse_info = spouse_dropdown.get()
@@ -329,14 +315,14 @@ def open_spouse_record():
         spouse_id = selected_spouse_info.split(':')[0].strip()
         if spouse_id.isdigit():
             window.destroy()
-            subprocess.Popen(["python", "editme.py", str(spouse_id)])
+            open_person_form(spouse_id)
 
 def open_child_record(event=None):
     # Get the selected item from the Treeview
     selected_item = children_tree.focus()
     record_id = children_tree.item(selected_item)['values'][0]  # Assuming the first value is the ID
     window.destroy()
-    subprocess.Popen(["python", "editme.py", str(record_id)])         
+    open_person_form(record_id)
 
 # Function to update the record in the database
 def update_record():
@@ -387,6 +373,7 @@ def update_record():
         )
 
         cursor.execute(update_query, data)
+        update_phonetic_codes(cursor, record_id)
         connection.commit()
         
         messagebox.showinfo("Success", "Record updated successfully.")
@@ -396,7 +383,7 @@ def update_record():
     #update_father_name()
 
 # Retrieve the record ID passed as a command-line argument
-record_id = sys.argv[1]
+record_id = form_argv()[1]
 
 # Retrieve the record from the database
 query = f"SELECT id, first_name, middle_name, last_name, title, nick_name, married_name, father, mother, " \
@@ -512,10 +499,8 @@ def create_orgs_tab(notebook, person_id):
     button_frame.pack(fill='x', padx=5, pady=(0, 10))
 
     def launch_add_membership(person_id, refresh_callback):
-        print(f"Launching members.py with person_id={person_id}")
-        subprocess.run(["python", "members.py", "--for-person", str(person_id)])
-        print("Returned from subprocess — refreshing memberships")
-        refresh_callback()
+        # Memberships are refreshed once the add form closes
+        open_membership_for_person(person_id, on_close=refresh_callback)
 
     ttk.Button(button_frame, text="Add Membership",
            command=lambda: launch_add_membership(person_id, refresh_org_memberships)).pack(side="left", padx=5)
@@ -526,7 +511,7 @@ def create_orgs_tab(notebook, person_id):
         FROM Membership
         JOIN Org ON Membership.org_id = Org.org_id
         WHERE Membership.person_id = {person_id}
-        ORDER BY Org.org_name, Membership.start_date
+        ORDER BY Org.org_name, Membership.start_date_sort IS NULL, Membership.start_date_sort
     """
     cursor.execute(query)
     records = cursor.fetchall()
@@ -538,8 +523,7 @@ def create_orgs_tab(notebook, person_id):
             messagebox.showwarning("No Selection", "Please select a membership to edit.")
             return
         membership_id = table.focus()
-        subprocess.run(["python", "members.py", "--edit-membership", str(membership_id)])
-        refresh_callback()
+        open_membership_edit(membership_id, on_close=refresh_callback)
 
     btn_edit = ttk.Button(button_frame, text="Edit Membership",
                       command=lambda: launch_edit_membership(refresh_org_memberships))
@@ -583,8 +567,7 @@ def create_orgs_tab(notebook, person_id):
     def on_item_double_click(event):
         selected_id = table.focus()  # Get the 'iid' of the selected item, which is the membership_id
         # Call the function to open the edit window, passing the membership_id
-        subprocess.run(["python", "members.py", "--edit-membership", str(selected_id)])
-        refresh_org_memberships()
+        open_membership_edit(selected_id, on_close=refresh_org_memberships)
 
     table.bind("<Double-1>", on_item_double_click)  # Bind double-click event
 
@@ -629,6 +612,7 @@ def view_geojson_map(event, tax_tree, person_id):
         return
 
     try:
+        map_controller = get_map_controller()
         record_id = values[0]  # Hidden record_id
         map_controller.logger.info(f"Attempting to display tax property for record_id: {record_id}")
         
@@ -856,33 +840,9 @@ def create_family_tab(notebook, person_id):
     tree_text = tk.Text(frame_tree, width=80, height=40)
     tree_text.grid(row=0, column=0, sticky='nsew')  # fill both directions, allow widget to expand
 
-    connection = sqlite3.connect('phoenix.db')
+    connection = get_connection()
     cursor = connection.cursor()
 
-    # Custom function to parse various date formats
-    def parse_date(date_str):
-        if not date_str:
-            return (0, 0, 0)  # Default for unknown dates
-        
-        # Try parsing full date format
-        try:
-            return datetime.strptime(date_str, "%d-%m-%Y").timetuple()[:3]
-        except ValueError:
-            pass
-
-        # Try parsing year and month format
-        try:
-            return datetime.strptime(date_str, "%B %Y").timetuple()[:2] + (0,)
-        except ValueError:
-            pass
-
-        # Extract year only
-        match = re.search(r'\b(1[5-9]\d\d|20[0-1]\d|202[0-3])\b', date_str)
-        if match:
-            return (int(match.group()), 0, 0)
-
-        return (0, 0, 0)
-
     # Function to recursively fetch and build the family tree
     def build_family_tree(person_id, cursor, tree_text, indent="", is_last_child=False):
                 
@@ -937,16 +897,14 @@ def create_family_tab(notebook, person_id):
 
             tree_text.insert(tk.END, "\n")  # Add a blank line
 
-            # Retrieve the children of the person
+            # Retrieve the children of the person, oldest first
             cursor.execute(
-                "SELECT id, birth_date FROM People WHERE father = ? OR mother = ?",
+                "SELECT id, birth_date FROM People WHERE father = ? OR mother = ? "
+                "ORDER BY birth_date_sort IS NULL, birth_date_sort",
                 (person_id, person_id),
             )
             children = cursor.fetchall()
 
-            # Sort children by birth date using the custom parse_date function
-            children.sort(key=lambda x: parse_date(x[1]))  # Using index 1 for birth_date
-
             # Build the family tree for each child
             for index, child in enumerate(children, start=1):
                 child_id = child[0]  # child_id is now the first element of the tuple
@@ -1096,7 +1054,7 @@ def create_family_tab(notebook, person_id):
             FROM People 
             LEFT JOIN Photos ON People.id = Photos.person_id
             WHERE People.father = ? OR People.mother = ? 
-            ORDER BY People.birth_date ASC""",
+            ORDER BY People.birth_date_sort IS NULL, People.birth_date_sort""",
             (person_id, person_id),
         )
         children_info = cursor.fetchall()
@@ -1174,8 +1132,8 @@ def open_person_record(event):
     selected_item = related_people_tree.selection()[0]
     person_id = related_people_tree.item(selected_item, 'values')[0]  # Assuming ID is the 1st column
     
-    # Open the editme.py script with the person's ID
-    subprocess.Popen(["python", "editme.py", str(person_id)])
+    # Open the person's edit form
+    open_person_form(person_id)
 
 # -------------------------------   
 # START OF THE MEDIA TAB CODE
@@ -1511,7 +1469,7 @@ def create_residence_tab(notebook, person_id):
         LEFT JOIN Address ON Residence.address_id = Address.address_id
         LEFT JOIN Sources ON Residence.res_source = Sources.id
         WHERE ResHistory.person_id = ?
-        ORDER BY Residence.start_date ASC
+        ORDER BY Residence.start_date_sort IS NULL, Residence.start_date_sort
     """
 
     cursor.execute(query, (person_id,))
@@ -1635,7 +1593,7 @@ def create_residence_tab(notebook, person_id):
         JOIN Address ON Residence.address_id = Address.address_id
         LEFT JOIN Sources ON Residence.res_source = Sources.id
         WHERE ResHistory.person_id = ?
-        ORDER BY Residence.start_date ASC
+        ORDER BY Residence.start_date_sort IS NULL, Residence.start_date_sort
         """ 
         cursor.execute(query, (person_id,))
         data = cursor.fetchall()
@@ -2132,7 +2090,7 @@ def search_findagrave():
 
 
 # Create the GUI window
-window = tk.Tk()
+window = create_form_window()
 window.title("Update Record")
 
 # Set the window size and position
@@ -2165,30 +2123,48 @@ notebook.add(frame_vitals, text='Vitals')
 # Bind the FocusIn event to refresh the spouse list
 frame_vitals.bind("<FocusIn>", lambda e: populate_spouse_dropdown(record_id))
 
-# Create the Bio tab if the bio is not empty
-# TODO - we will need to reset - it is now out of range
-create_bio_tab(notebook, person_record[21], person_record[0])
+# The remaining tabs are built (and queried) the first time they are selected,
+# and rebuilt on selection after an edit has changed the database
+person_tabs = LazyTabs(notebook, connection)
+
+def build_bio_tab():
+    cursor.execute("SELECT bio FROM People WHERE id = ?", (person_record[0],))
+    row = cursor.fetchone()
+    create_bio_tab(notebook, row[0] if row else None, person_record[0])
+
+# The Education and Media tabs only appear when the person has such records
+cursor.execute("""
+    SELECT EXISTS (SELECT 1 FROM Education WHERE person_id = ?),
+           EXISTS (SELECT 1 FROM MediaPerson WHERE person_id = ?)
+""", (person_record[0], person_record[0]))
+has_education, has_media = cursor.fetchone()
+
+# Add the Bio tab if the bio is not empty
+if person_record[21]:
+    person_tabs.add(' Bio ', build_bio_tab)
 
 # Add the Family tab
 # create_family_tab(notebook, person_record[0])
 
 # Add the Lived At tab
-create_residence_tab(notebook, person_record[0])
+person_tabs.add("Home/Property", lambda: create_residence_tab(notebook, person_record[0]))
 
 # Add the Education tab
-create_education_tab(notebook, person_record[0])
+if has_education:
+    person_tabs.add('Education/Career', lambda: create_education_tab(notebook, person_record[0]))
 
 # Add the Businesses tab
-create_business_tab(notebook, person_record[0])
+person_tabs.add('Business Roles', lambda: create_business_tab(notebook, person_record[0]))
 
 # Add the Records tab
-create_records_tab(notebook, person_record[0])
+person_tabs.add('Records', lambda: create_records_tab(notebook, person_record[0]))
 
 #Add the Orgs tab
-create_orgs_tab(notebook, person_record[0])
+person_tabs.add('Orgs', lambda: create_orgs_tab(notebook, person_record[0]))
 
 # Add the Media tab
-create_media_tab(notebook, person_record[0])
+if has_media:
+    person_tabs.add('Media', lambda: create_media_tab(notebook, person_record[0]))
 
 # Add the Sources tab
 frame_sources = ttk.Frame(notebook)
@@ -2479,19 +2455,16 @@ def update_children_tree_on_spouse_selection(event=None):
         SELECT id, first_name, middle_name, last_name, title, nick_name, married_name, birth_date, birth_location, death_date, death_location 
         FROM People 
         WHERE father = ? AND mother = ? OR father = ? AND mother = ?
+        ORDER BY birth_date_sort IS NULL, birth_date_sort
     """
     cursor.execute(query, (record_id, spouse_id, spouse_id, record_id))
     children = cursor.fetchall()
 
-    # Convert birth dates and sort
-    children_with_dates = [(child, convert_to_sortable_date(child[7])) for child in children]
-    children_with_dates.sort(key=lambda x: x[1] or "")  # Sort by the converted date, placing None values last
-
     # Clear existing data in the treeview
     for i in children_tree.get_children():
         children_tree.delete(i)
 
-    for child, _ in children_with_dates:
+    for child in children:
         formatted_child = [
             child[0],  # ID
             child[1] if child[1] is not None else "",  # First Name
@@ -2567,20 +2540,16 @@ spouse_dropdown = ttk.Combobox(frame_vitals, width=40)
 spouse_dropdown.grid(row=14, column=1, padx=5, pady=5, sticky='ew')
 
 def display_children():
-    query = "SELECT id, first_name, middle_name, last_name, title, nick_name, married_name, birth_date, birth_location, death_date, death_location FROM People WHERE father = ? OR mother = ?"
+    query = "SELECT id, first_name, middle_name, last_name, title, nick_name, married_name, birth_date, birth_location, death_date, death_location FROM People WHERE father = ? OR mother = ? ORDER BY birth_date_sort IS NULL, birth_date_sort"
     cursor.execute(query, (record_id, record_id))
     children = cursor.fetchall()
 
-    # Convert birth dates and sort
-    children_with_dates = [(child, convert_to_sortable_date(child[7])) for child in children]
-    children_with_dates.sort(key=lambda x: x[1] or "")  # Sort by the converted date, placing None values last
-
     # Clear existing data in the treeview
     for i in children_tree.get_children():
         children_tree.delete(i)
 
     # Inserting each child into the treeview
-    for child, _ in children_with_dates:
+    for child in children:
         formatted_child = [
             child[0],  # ID
             child[1] if child[1] is not None else "",  # First Name
@@ -2713,7 +2682,11 @@ def add_default_bio():
     try:
         cursor.execute("UPDATE People SET bio = ? WHERE id = ?", (default_bio, record_id))
         connection.commit()
-        create_bio_tab(notebook, default_bio, record_id)  # Create the bio tab with the default bio
+        # Add the bio tab; it is built with the default bio when selected
+        if ' Bio ' in person_tabs.tabs:
+            person_tabs.invalidate(' Bio ')
+        else:
+            person_tabs.add(' Bio ', build_bio_tab)
         add_bio_button.grid_remove()  # Remove the "Add Bio" button
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {e}")
@@ -2734,7 +2707,8 @@ create_context_menu(entry_death_location, my_custom_locations)
 create_context_menu(entry_buried_location, my_custom_cemeteries)
 
 # Run the GUI window
-window.mainloop()
+run_form_mainloop(window)
 
 # Close the database connection
-connection.close()
\ No newline at end of file
+if hosted is None:
+    close_shared_connection()
\ No newline at end of file
@@ -3,6 +3,9 @@ from tkinter import ttk, messagebox
 import sqlite3
 from datetime import datetime
 from search_controls import SearchControls
+from db_utils import get_connection
+from phonetic import update_phonetic_codes
+from household_roster import get_household_roster
 
 temp_orders = {}  # Store member ordering changes: {member_id: new_order}
 original_orders = {}  # Store original orders for comparison
@@ -135,106 +138,88 @@ def prompt_for_census_details(cursor, person_id, census_year):
     return result_data
 
 
-def get_available_family_members(cursor, person_id, household_num, census_year):
-    """Get list of available family members not in current household."""
-    available_family_members = []
-    
-    # Get current household members' IDs
-    cursor.execute("""
-        SELECT person_id
-        FROM Census
-        WHERE census_year = ? AND census_dwellnum = ?
-    """, (census_year, household_num))
-    household_member_ids = {row[0] for row in cursor.fetchall()}
-    
-    # Fetch the person's details
-    cursor.execute("SELECT father, mother FROM People WHERE id = ?", (person_id,))
-    person_details = cursor.fetchone()
-    
-    if not person_details:
-        print(f"No details found for person_id: {person_id}")
-        return []
-        
-    father_id, mother_id = person_details
-    
-    # Fetch father if not in household
-    if father_id and father_id not in household_member_ids:
-        cursor.execute("""
-            SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date 
-            FROM People WHERE id = ?
-        """, (father_id,))
-        father = cursor.fetchone()
-        if father:
-            available_family_members.append(father + ('Father',))
-
-    # Fetch mother if not in household
-    if mother_id and mother_id not in household_member_ids:
-        cursor.execute("""
-            SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date 
-            FROM People WHERE id = ?
-        """, (mother_id,))
-        mother = cursor.fetchone()
-        if mother:
-            available_family_members.append(mother + ('Mother',))
-
-    # Fetch spouse(s) not in household
-    cursor.execute("""
-        SELECT p.id, p.first_name, p.middle_name, p.last_name, p.married_name, p.birth_date, p.death_date
-        FROM Marriages m
-        JOIN People p ON (m.person1_id = p.id OR m.person2_id = p.id)
-        WHERE (m.person1_id = ? OR m.person2_id = ?) AND p.id != ?
-    """, (person_id, person_id, person_id))
-    spouses = cursor.fetchall()
-    for spouse in spouses:
-        if spouse[0] not in household_member_ids:
-            available_family_members.append(spouse + ('Spouse',))
-
-    # Fetch children not in household
-    cursor.execute("""
-        SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date
-        FROM People
-        WHERE father = ? OR mother = ?
-    """, (person_id, person_id))
-    children = cursor.fetchall()
-    for child in children:
-        if child[0] not in household_member_ids:
-            available_family_members.append(child + ('Child',))
-
-    # Fetch siblings only if at least one parent is known
-    if father_id or mother_id:
-        sibling_query = """
-            SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date
-            FROM People
-            WHERE id != ? AND (
-        """
-        query_params = [person_id]
-        
-        if father_id:
-            sibling_query += "(father = ? AND father IS NOT NULL)"
-            query_params.append(father_id)
-        
-        if mother_id:
-            if father_id:
-                sibling_query += " OR "
-            sibling_query += "(mother = ? AND mother IS NOT NULL)"
-            query_params.append(mother_id)
-        
-        sibling_query += ")"
-        
-        cursor.execute(sibling_query, tuple(query_params))
-        siblings = cursor.fetchall()
-        for sibling in siblings:
-            if sibling[0] not in household_member_ids:
-                available_family_members.append(sibling + ('Sibling',))
-
-    return available_family_members
+# Parents, spouses, children and siblings of one person in one query.  Each
+# branch starts from "me", so an unknown person returns no rows, and anyone
+# already in the household is dropped before the rows leave SQLite.
+FAMILY_MEMBERS_QUERY = """
+    WITH me AS (
+        SELECT id, NULLIF(NULLIF(father, ''), 0) AS father, NULLIF(NULLIF(mother, ''), 0) AS mother
+        FROM People WHERE id = :person_id
+    ),
+    family(relative_id, relationship, sort_order) AS (
+        SELECT father, 'Father', 1 FROM me WHERE father IS NOT NULL
+        UNION ALL
+        SELECT mother, 'Mother', 2 FROM me WHERE mother IS NOT NULL
+        UNION ALL
+        SELECT CASE WHEN m.person1_id = me.id THEN m.person2_id ELSE m.person1_id END, 'Spouse', 3
+        FROM me JOIN Marriages m ON m.person1_id = me.id OR m.person2_id = me.id
+        UNION ALL
+        SELECT c.id, 'Child', 4
+        FROM me JOIN People c ON c.father = me.id OR c.mother = me.id
+        UNION ALL
+        SELECT s.id, 'Sibling', 5
+        FROM me JOIN People s ON s.father = me.father OR s.mother = me.mother
+        WHERE s.id != me.id
+    )
+    SELECT p.id, p.first_name, p.middle_name, p.last_name, p.married_name, p.birth_date, p.death_date,
+           f.relationship
+    FROM family f
+    JOIN People p ON p.id = f.relative_id
+    WHERE p.id != :person_id
+      AND NOT EXISTS (
+        SELECT 1 FROM Census c
+        WHERE c.census_year = :census_year AND c.census_dwellnum = :household_num AND c.person_id = p.id
+    )
+    ORDER BY f.sort_order, p.id
+"""
+
+# (person_id, res_group_id or household) -> (total_changes, rows)
+_family_cache = {}
+
+
+def clear_family_cache():
+    """Forget every cached family neighbourhood."""
+    _family_cache.clear()
+
+
+def get_available_family_members(cursor, person_id, household_num, census_year, res_group_id=None):
+    """
+    Get list of available family members not in current household.
+
+    Results are cached per person and household until anything is written
+    through the same connection (its total_changes counter moves), so the
+    linkage window can refresh after every link or unlink without going back
+    to the database.
+
+    Args:
+        cursor: SQLite cursor object.
+        person_id (int): Person whose family to list.
+        household_num: Census dwelling number of the household.
+        census_year (int): Census year of the household.
+        res_group_id (int): ResGroup of the household, used as the cache key when given.
+
+    Returns:
+        list: (id, first_name, middle_name, last_name, married_name, birth_date,
+            death_date, relationship) tuples.
+    """
+    key = (person_id, res_group_id if res_group_id is not None else (census_year, household_num))
+    changes = cursor.connection.total_changes
+    cached = _family_cache.get(key)
+    if cached is not None and cached[0] == changes:
+        return list(cached[1])
+
+    cursor.execute(FAMILY_MEMBERS_QUERY, {"person_id": person_id, "household_num": household_num,
+                                          "census_year": census_year})
+    available_family_members = cursor.fetchall()
+    _family_cache[key] = (changes, available_family_members)
+    return list(available_family_members)
 
 def open_family_linkage_window(cursor, census_id, res_group_id, census_year, township_name, 
                              dwelling_num, household_num, address, person_id, township_id):
     """Open window to manage Census record members."""
 
     # Connect to the database
-    connection = sqlite3.connect('phoenix.db')
+    connection = get_connection()
     cursor = connection.cursor()
 
     # Store the passed person_id as a global variable
@@ -268,23 +253,13 @@ def open_family_linkage_window(cursor, census_id, res_group_id, census_year, tow
             for item in tree.get_children():
                 tree.delete(item)
 
-        # Get current members with their order
-        cursor.execute("""
-        SELECT p.id, p.first_name, p.middle_name, p.last_name, p.married_name, 
-               p.birth_date, p.death_date, 
-               COALESCE(rgm.member_order, 9999) as display_order
-        FROM People p
-        JOIN ResGroupMembers rgm ON p.id = rgm.res_group_member
-        WHERE rgm.res_group_id = ?
-        ORDER BY 
-            CASE 
-                WHEN rgm.member_order IS NULL THEN 1 
-                ELSE 0 
-            END,
-            COALESCE(rgm.member_order, 9999)
-    """, (res_group_id,))
-        
-        members = cursor.fetchall()
+        # Get current members with their order from the cached household roster
+        roster = get_household_roster(cursor, res_group_id)
+        members = [
+            (m["person_id"], m["first_name"], m["middle_name"], m["last_name"], m["married_name"],
+             m["birth_date"], m["death_date"], m["member_order"] if m["member_order"] is not None else 9999)
+            for m in (roster["members"] if roster else []) if m["in_people"]
+        ]
         
         # Store original orders
         for member in members:
@@ -307,7 +282,8 @@ def open_family_linkage_window(cursor, census_id, res_group_id, census_year, tow
                 ))
 
         # Get available family members
-        available_members = get_available_family_members(cursor, person_id, household_num, census_year)
+        available_members = get_available_family_members(cursor, person_id, household_num, census_year,
+                                                         res_group_id)
 
         # First, add family members who are available
         for member in available_members:
@@ -517,7 +493,8 @@ def open_family_linkage_window(cursor, census_id, res_group_id, census_year, tow
                             WHERE person_id = ? AND census_year = ? AND census_dwellnum = ?
                         """, (member_id, census_year, dwelling_num))
 
-                # Add linked members
+                # Add linked members; their ResGroup memberships go in as one batch
+                new_members = []
                 for member_id in temp_links:
                     cursor.execute("""
                         SELECT 1 FROM Census 
@@ -603,19 +580,12 @@ def open_family_linkage_window(cursor, census_id, res_group_id, census_year, tow
                         ))
                         print(f"[DEBUG] Inserted {member_id} into Census.")
 
-                        # Add to ResGroupMembers
-                        cursor.execute("""
-                            SELECT 1 FROM ResGroupMembers 
-                            WHERE res_group_id = ? AND res_group_member = ?
-                        """, (res_group_id, member_id))
-                        if not cursor.fetchone():
-                            print(f"[DEBUG] Adding {member_id} to ResGroupMembers.")
-                            cursor.execute("""
-                                INSERT INTO ResGroupMembers (res_group_id, res_group_member)
-                                VALUES (?, ?)
-                            """, (res_group_id, member_id))
-                        else:
-                            print(f"[DEBUG] {member_id} already exists in ResGroupMembers.")
+                        new_members.append((res_group_id, member_id))
+
+                # Imported here: resgroup_utils imports this module
+                from resgroup_utils import add_resgroup_members
+                added = add_resgroup_members(cursor, new_members)
+                print(f"[DEBUG] Added {len(added)} of {len(new_members)} linked member(s) to ResGroupMembers.")
 
                 return True
 
@@ -994,9 +964,10 @@ def open_family_linkage_window(cursor, census_id, res_group_id, census_year, tow
                 mother_id if mother_id else "",
                 married_to_id if married_to_id else ""
             ))
+            new_person_id = cursor.lastrowid
+            update_phonetic_codes(cursor, new_person_id)
             
             connection.commit()
-            new_person_id = cursor.lastrowid
 
             # Handle marriage record creation if needed
             if create_marriage_record:
@@ -1,7 +1,12 @@
 # geodata.py
 import tkinter as tk
 from tkinter import ttk, messagebox
+import os
 import sqlite3
+import webbrowser
+from db_utils import get_connection
+from parcel_geometry import update_geometry
+from land_map import person_land_features, export_land_map, default_map_path
 
 # These functions were previously in editme.py and handle GeoJSON linking
 
@@ -26,10 +31,28 @@ def manage_deed_geodata(deed_tree, person_id):
 
 
 def view_all_geodata(deed_tree, person_id):
-    messagebox.showinfo("Coming Soon", "The full mapping interface will be available in a future update.")
+    """Map every tax and deed parcel of the person in one pass, stepping through the years."""
+    cursor = get_connection().cursor()
+    try:
+        features = person_land_features(cursor, person_id)
+    except sqlite3.Error as e:
+        messagebox.showerror("Error", f"Failed to load map data: {e}")
+        return
+    if not features:
+        messagebox.showinfo("No Map Data", "None of this person's tax or deed records have map data.")
+        return
+
+    try:
+        path = export_land_map(features, default_map_path(f"land_history_{person_id}"))
+    except ImportError as e:
+        messagebox.showerror("Error", f"Map support is not installed: {e}")
+        return
+    webbrowser.open(f"file://{os.path.abspath(path)}", new=2)
 
 def add_geojson_data(tree, record_type, person_id):
     """Add GeoJSON data for selected record."""
+    connection = get_connection()
+    cursor = connection.cursor()
     selected = tree.selection()
     if not selected:
         messagebox.showinfo("Select Record", 
@@ -148,6 +171,7 @@ Example: -83.45397,42.43816,-83.45344,42.42388"""
                     ) VALUES (?, ?, ?)
                 """, (geojson_id, record_type.capitalize(), record_id))
 
+            update_geometry(cursor, geojson_id)
             connection.commit()
             geojson_window.destroy()
             
@@ -175,6 +199,8 @@ Example: -83.45397,42.43816,-83.45344,42.42388"""
 
 def edit_geojson_data(tree, record_type, person_id):
     """Edit GeoJSON data for selected record"""
+    connection = get_connection()
+    cursor = connection.cursor()
     selected = tree.selection()
     if not selected:
         messagebox.showinfo("Select Record", 
@@ -304,6 +330,7 @@ Example: -83.45397,42.43816,-83.45344,42.42388"""
                     end_date_entry.get().strip(),
                     geojson_id
                 ))
+                update_geometry(cursor, geojson_id)
 
                 connection.commit()
                 geojson_window.destroy()
@@ -335,6 +362,8 @@ Example: -83.45397,42.43816,-83.45344,42.42388"""
 
 def delete_geojson_data(tree, record_type, person_id):
     """Delete GeoJSON data for selected record"""
+    connection = get_connection()
+    cursor = connection.cursor()
     selected = tree.selection()
     if not selected:
         messagebox.showinfo("Select Record", 
@@ -0,0 +1,112 @@
+# household_roster.py
+#
+# The household roster for one ResGroup: where it is, whether it is marked
+# complete, and every member in display order with their Census row, all
+# from one query.
+#
+# Rosters are cached per ResGroup.  Like lazy_tabs, a cached roster is only
+# reused while the connection's total_changes counter is unchanged, so any
+# edit made through the shared connection (a Census save, a link, the
+# completion checkbox) is picked up on the next call.
+
+ROSTER_QUERY = """
+    SELECT
+        g.id, g.res_group_year, g.township_id, t.township_name, g.dwelling_num, g.household_num,
+        g.address_id, a.address, g.record_completed,
+        rgm.res_group_member, rgm.member_order, rgm.res_group_role,
+        p.id, p.first_name, p.middle_name, p.last_name, p.married_name, p.birth_date, p.death_date,
+        c.*
+    FROM ResGroups g
+    LEFT JOIN Townships t ON t.township_id = g.township_id
+    LEFT JOIN Address a ON a.address_id = g.address_id
+    LEFT JOIN ResGroupMembers rgm ON rgm.res_group_id = g.id
+    LEFT JOIN People p ON p.id = rgm.res_group_member
+    LEFT JOIN Census c ON c.res_group_id = g.id AND c.person_id = rgm.res_group_member
+    WHERE g.id = ?
+    ORDER BY rgm.member_order IS NULL, rgm.member_order, rgm.id
+"""
+_CENSUS_OFFSET = 19  # Census columns (c.*) start here
+
+# res_group_id -> (total_changes, roster)
+_roster_cache = {}
+
+
+def invalidate_roster(res_group_id=None):
+    """Forget the cached roster of one ResGroup, or of all of them."""
+    if res_group_id is None:
+        _roster_cache.clear()
+    else:
+        _roster_cache.pop(res_group_id, None)
+
+
+def get_household_roster(cursor, res_group_id):
+    """
+    Get the complete, ordered roster of a ResGroup.
+
+    Args:
+        cursor: SQLite cursor object.
+        res_group_id (int): ResGroup to list.
+
+    Returns:
+        dict: None if the ResGroup does not exist, else:
+            - "res_group_id", "census_year", "township_id", "township_name",
+              "dwelling_num", "household_num", "address_id", "address"
+            - "completed" (bool): ResGroups.record_completed.
+            - "members" (list): One dict per member in member_order (unordered
+              members last) with "person_id", "member_order", "role",
+              "first_name", "middle_name", "last_name", "married_name",
+              "birth_date", "death_date", "in_people" (False if the person
+              row is missing), and "census": the member's Census row in this
+              group as {column: value}, or {} if there is none.
+    """
+    changes = cursor.connection.total_changes
+    cached = _roster_cache.get(res_group_id)
+    if cached is not None and cached[0] == changes:
+        return cached[1]
+
+    cursor.execute(ROSTER_QUERY, (res_group_id,))
+    census_columns = [column[0] for column in cursor.description[_CENSUS_OFFSET:]]
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+
+    header = rows[0]
+    roster = {
+        "res_group_id": header[0],
+        "census_year": header[1],
+        "township_id": header[2],
+        "township_name": header[3],
+        "dwelling_num": header[4],
+        "household_num": header[5],
+        "address_id": header[6],
+        "address": header[7],
+        "completed": bool(header[8]),
+        "members": [],
+    }
+
+    members = {}
+    for row in rows:
+        person_id = row[9]
+        if person_id is None:
+            continue  # A group with no members
+        census = dict(zip(census_columns, row[_CENSUS_OFFSET:]))
+        if person_id in members:
+            # A person with two Census rows in one group is listed once
+            continue
+        members[person_id] = {
+            "person_id": person_id,
+            "member_order": row[10],
+            "role": row[11],
+            "first_name": row[13],
+            "middle_name": row[14],
+            "last_name": row[15],
+            "married_name": row[16],
+            "birth_date": row[17],
+            "death_date": row[18],
+            "in_people": row[12] is not None,
+            "census": census if census.get("id") is not None else {},
+        }
+    roster["members"] = list(members.values())
+
+    _roster_cache[res_group_id] = (changes, roster)
+    return roster
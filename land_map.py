@@ -0,0 +1,351 @@
+# land_map.py
+#
+# Batch map of a person's (or a township's) land history.
+#
+# Every GeoJSON feature linked to the tax and deed records is pulled in one
+# query over the parsed geometry in parcel_geometry, simplified for the zoom
+# level the map opens at, and written as a single FeatureCollection.  Each
+# feature carries the year of its record, so the folium map steps through
+# the years with TimestampedGeoJson instead of drawing one record at a time.
+#
+#   python land_map.py person <person_id> [--out map.html] [--from 1850] [--to 1900]
+#   python land_map.py township <township_id> [--out map.geojson] [--zoom 14]
+#
+# An output ending in .geojson gets the bare FeatureCollection.
+
+import argparse
+import json
+import math
+import os
+import tempfile
+
+from db_utils import get_connection
+from lazy_imports import lazy_import
+from parcel_geometry import (
+    GEOMETRY_TABLE,
+    RTREE_TABLE,
+    bounding_box,
+    ensure_geometry,
+    has_geometry_tables,
+    to_geojson_geometry,
+    unpack_coordinates,
+)
+
+folium = lazy_import("folium")
+folium_plugins = lazy_import("folium.plugins")
+
+DEFAULT_ZOOM = 15
+
+# Map colour of each record type
+RECORD_COLORS = {"Tax": "#2b7bb9", "Deed": "#c0392b"}
+
+# Tax features of a person, then deed features of every deed they are a party to.
+# Columns: geojson_id, record_type, record_id, legal_description_id, year, label,
+# geometry_type, coordinates
+PERSON_FEATURES_QUERY = f"""
+    SELECT gl.geojson_id, 'Tax', t.record_id, NULL, CAST(t.year AS INTEGER),
+           COALESCE(NULLIF(gd.description, ''), t.description), g.geometry_type, g.coordinates
+    FROM Tax_Records t
+    JOIN GeoJSONLink gl ON gl.record_type = 'Tax' AND gl.record_id = t.record_id
+    JOIN GeoJSONData gd ON gd.geojson_id = gl.geojson_id
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = gl.geojson_id AND g.point_count > 0
+    WHERE t.people_id = :person_id
+    UNION ALL
+    SELECT gl.geojson_id, 'Deed', d.deed_id, gl.legal_description_id, d.execution_date_sort / 100000,
+           COALESCE(NULLIF(gd.description, ''), ld.description_text, d.deed_type), g.geometry_type, g.coordinates
+    FROM (SELECT DISTINCT deed_id FROM DeedParties WHERE person_id = :person_id) dp
+    JOIN Deeds d ON d.deed_id = dp.deed_id
+    JOIN GeoJSONLink gl ON gl.record_type = 'Deed'
+        AND (gl.record_id = d.deed_id
+             OR gl.legal_description_id IN (SELECT description_id FROM LegalDescriptions WHERE deed_id = d.deed_id))
+    LEFT JOIN LegalDescriptions ld ON ld.description_id = gl.legal_description_id
+    JOIN GeoJSONData gd ON gd.geojson_id = gl.geojson_id
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = gl.geojson_id AND g.point_count > 0
+"""
+
+# Tax features of a township; deeds have no township, so the deed features
+# inside the extent of those tax parcels are added by township_land_features
+TOWNSHIP_TAX_QUERY = f"""
+    SELECT gl.geojson_id, 'Tax', t.record_id, NULL, CAST(t.year AS INTEGER),
+           COALESCE(NULLIF(gd.description, ''), t.description), g.geometry_type, g.coordinates
+    FROM Tax_Records t
+    JOIN GeoJSONLink gl ON gl.record_type = 'Tax' AND gl.record_id = t.record_id
+    JOIN GeoJSONData gd ON gd.geojson_id = gl.geojson_id
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = gl.geojson_id AND g.point_count > 0
+    WHERE t.township_id = ?
+"""
+
+DEEDS_IN_AREA_QUERY = f"""
+    SELECT gl.geojson_id, 'Deed', d.deed_id, gl.legal_description_id, d.execution_date_sort / 100000,
+           COALESCE(NULLIF(gd.description, ''), ld.description_text, d.deed_type), g.geometry_type, g.coordinates
+    FROM {RTREE_TABLE} r
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = r.geojson_id
+    JOIN GeoJSONLink gl ON gl.geojson_id = r.geojson_id AND gl.record_type = 'Deed'
+    LEFT JOIN LegalDescriptions ld ON ld.description_id = gl.legal_description_id
+    JOIN Deeds d ON d.deed_id = COALESCE(ld.deed_id, gl.record_id)
+    JOIN GeoJSONData gd ON gd.geojson_id = gl.geojson_id
+    WHERE r.min_lon >= ? AND r.max_lon <= ? AND r.min_lat >= ? AND r.max_lat <= ?
+"""
+
+
+# -------------------------------
+# SIMPLIFICATION
+# -------------------------------
+
+def zoom_tolerance(zoom):
+    """Degrees covered by one screen pixel at a web map zoom level."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def _segment_distance(point, start, end):
+    """Distance from point to the segment start-end, in degrees."""
+    (px, py), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(px - x1, py - y1)
+    t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def simplify_points(points, tolerance):
+    """
+    Douglas-Peucker simplification of a line or polygon ring.
+
+    Args:
+        points (list): (lon, lat) pairs.
+        tolerance (float): Largest allowed deviation, in degrees.
+
+    Returns:
+        list: The points kept, first and last always included.
+    """
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, distance = None, tolerance
+        for index in range(first + 1, last):
+            d = _segment_distance(points[index], points[first], points[last])
+            if d > distance:
+                farthest, distance = index, d
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_geometry(geometry_type, points, tolerance):
+    """Simplify a stored geometry, never reducing a polygon below a triangle."""
+    if geometry_type == "POINT" or tolerance <= 0:
+        return points
+    if geometry_type == "POLYGON":
+        ring = points if points[0] == points[-1] else points + [points[0]]
+        simplified = simplify_points(ring, tolerance)
+        return simplified if len(simplified) >= 4 else ring
+    return simplify_points(points, tolerance)
+
+
+# -------------------------------
+# FEATURES
+# -------------------------------
+
+def _in_years(year, start_year, end_year):
+    if year is None:
+        return start_year is None and end_year is None
+    return (start_year is None or year >= start_year) and (end_year is None or year <= end_year)
+
+
+def _features(rows, start_year, end_year):
+    """Feature dicts from query rows, one per (feature, record), filtered by year."""
+    features = {}
+    for geojson_id, record_type, record_id, legal_description_id, year, label, geometry_type, coordinates in rows:
+        if not _in_years(year, start_year, end_year):
+            continue
+        features.setdefault((geojson_id, record_type, record_id), {
+            "geojson_id": geojson_id,
+            "record_type": record_type,
+            "record_id": record_id,
+            "legal_description_id": legal_description_id,
+            "year": year,
+            "label": label or "",
+            "geometry_type": geometry_type,
+            "points": unpack_coordinates(coordinates),
+        })
+    return sorted(features.values(), key=lambda f: (f["year"] is None, f["year"] or 0, f["record_type"], f["record_id"]))
+
+
+def person_land_features(cursor, person_id, start_year=None, end_year=None):
+    """
+    Every mapped feature of a person's tax records and deeds, in one query.
+
+    Args:
+        cursor: SQLite cursor object.
+        person_id (int): People.id.
+        start_year, end_year (int): Optional inclusive year range; undated
+            records are only included when no range is given.
+
+    Returns:
+        list: Feature dicts ("geojson_id", "record_type", "record_id",
+            "legal_description_id", "year", "label", "geometry_type",
+            "points"), oldest first.
+    """
+    if not has_geometry_tables(cursor):
+        return []
+    ensure_geometry(cursor)
+    cursor.execute(PERSON_FEATURES_QUERY, {"person_id": person_id})
+    return _features(cursor.fetchall(), start_year, end_year)
+
+
+def township_land_features(cursor, township_id, start_year=None, end_year=None):
+    """
+    Every mapped tax parcel of a township, plus the deed features lying
+    within the extent of those parcels.
+
+    Args and Returns: as person_land_features.
+    """
+    if not has_geometry_tables(cursor):
+        return []
+    ensure_geometry(cursor)
+    cursor.execute(TOWNSHIP_TAX_QUERY, (township_id,))
+    rows = cursor.fetchall()
+    if rows:
+        min_lon, max_lon, min_lat, max_lat = bounding_box(
+            [point for row in rows for point in unpack_coordinates(row[7])]
+        )
+        cursor.execute(DEEDS_IN_AREA_QUERY, (min_lon, max_lon, min_lat, max_lat))
+        rows += cursor.fetchall()
+    return _features(rows, start_year, end_year)
+
+
+def build_feature_collection(features, zoom=DEFAULT_ZOOM):
+    """
+    Build one GeoJSON FeatureCollection from feature dicts.
+
+    Geometry is simplified to about one pixel at `zoom`.  Each feature's
+    properties hold its record, label, year and the "times" list
+    TimestampedGeoJson reads; undated features take the earliest year so
+    they show from the start.
+
+    Returns:
+        dict: The FeatureCollection.
+    """
+    tolerance = zoom_tolerance(zoom)
+    years = [feature["year"] for feature in features if feature["year"] is not None]
+    first_year = min(years) if years else None
+
+    collection = []
+    for feature in features:
+        year = feature["year"] if feature["year"] is not None else first_year
+        points = simplify_geometry(feature["geometry_type"], feature["points"], tolerance)
+        color = RECORD_COLORS.get(feature["record_type"], "#555555")
+        properties = {
+            "record_type": feature["record_type"],
+            "record_id": feature["record_id"],
+            "legal_description_id": feature["legal_description_id"],
+            "year": feature["year"],
+            "popup": f"{feature['record_type']} {feature['year'] or 'undated'}: {feature['label']}",
+            "style": {"color": color, "fillColor": color, "weight": 2, "fillOpacity": 0.3},
+        }
+        if year is not None:
+            properties["times"] = [f"{year:04d}-01-01"]
+        collection.append({
+            "type": "Feature",
+            "geometry": to_geojson_geometry(feature["geometry_type"], points),
+            "properties": properties,
+        })
+    return {"type": "FeatureCollection", "features": collection}
+
+
+# -------------------------------
+# OUTPUT
+# -------------------------------
+
+def write_feature_collection(collection, path):
+    """Write a FeatureCollection as a .geojson file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(collection, f)
+    return path
+
+
+def render_land_map(collection, path, zoom=DEFAULT_ZOOM):
+    """
+    Write a folium map of a FeatureCollection, stepping through the years.
+
+    Args:
+        collection (dict): From build_feature_collection.
+        path (str): HTML file to write.
+        zoom (int): Zoom level the geometry was simplified for.
+
+    Returns:
+        str: The path written.
+    """
+    points = []
+    for feature in collection["features"]:
+        geometry = feature["geometry"]
+        coordinates = geometry["coordinates"]
+        if geometry["type"] == "Point":
+            coordinates = [coordinates]
+        elif geometry["type"] == "Polygon":
+            coordinates = coordinates[0]
+        points.extend(coordinates)
+    min_lon, max_lon, min_lat, max_lat = bounding_box(points)
+
+    land_map = folium.Map(location=[(min_lat + max_lat) / 2, (min_lon + max_lon) / 2], zoom_start=zoom)
+    if any("times" in feature["properties"] for feature in collection["features"]):
+        folium_plugins.TimestampedGeoJson(
+            collection,
+            period="P1Y",
+            duration=None,  # Parcels stay on the map once acquired
+            add_last_point=False,
+            auto_play=False,
+            date_options="YYYY",
+        ).add_to(land_map)
+    else:
+        folium.GeoJson(collection, popup=folium.GeoJsonPopup(fields=["popup"], labels=False)).add_to(land_map)
+    land_map.fit_bounds([[min_lat, min_lon], [max_lat, max_lon]])
+    land_map.save(path)
+    return path
+
+
+def export_land_map(features, path, zoom=DEFAULT_ZOOM):
+    """Write features to `path`: a FeatureCollection for .geojson, else a folium map."""
+    collection = build_feature_collection(features, zoom)
+    if path.lower().endswith((".geojson", ".json")):
+        return write_feature_collection(collection, path)
+    return render_land_map(collection, path, zoom)
+
+
+def default_map_path(name):
+    """Temporary HTML file for a generated map."""
+    return os.path.join(tempfile.gettempdir(), f"{name}.html")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map the land history of a person or township.")
+    parser.add_argument("scope", choices=("person", "township"))
+    parser.add_argument("id", type=int, help="People.id or township_id")
+    parser.add_argument("--out", help="Output .html map or .geojson FeatureCollection")
+    parser.add_argument("--from", dest="start_year", type=int, help="First year to include")
+    parser.add_argument("--to", dest="end_year", type=int, help="Last year to include")
+    parser.add_argument("--zoom", type=int, default=DEFAULT_ZOOM, help="Zoom level to simplify for")
+    args = parser.parse_args()
+
+    cursor = get_connection().cursor()
+    if args.scope == "person":
+        features = person_land_features(cursor, args.id, args.start_year, args.end_year)
+    else:
+        features = township_land_features(cursor, args.id, args.start_year, args.end_year)
+    if not features:
+        print(f"No mapped records for {args.scope} {args.id}.")
+        return
+
+    path = export_land_map(features, args.out or default_map_path(f"land_{args.scope}_{args.id}"), args.zoom)
+    print(f"Wrote {len(features)} features to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# lazy_imports.py
+#
+# Deferred imports for heavy optional libraries (folium, geopandas, pandas,
+# shapely, requests, bs4) and the modules built on them.  Forms that only
+# occasionally show a map or run a web search bind a LazyModule at load time
+# and pay for the real import on the first attribute access.
+
+import importlib
+
+
+class LazyModule:
+    """A module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """
+    Return a proxy for a module that is imported when first used.
+
+    Args:
+        name (str): Dotted module name, e.g. "folium.plugins".
+
+    Returns:
+        LazyModule: Proxy that forwards attribute access to the real module.
+    """
+    return LazyModule(name)
@@ -0,0 +1,91 @@
+# lazy_tabs.py
+#
+# Build notebook tabs the first time they are selected instead of when the
+# form opens.  Each tab starts as an empty placeholder; on
+# <<NotebookTabChanged>> its builder runs, and the frame it adds to the
+# notebook is moved into the placeholder's position.
+#
+# A built tab is kept until an edit invalidates it.  Edits are detected with
+# the connection's total_changes counter, which goes up whenever any window
+# sharing the connection writes to the database, so a tab whose data may have
+# changed is rebuilt the next time it is selected.  invalidate() forces the
+# same thing explicitly.
+
+from tkinter import ttk
+
+
+class LazyTabs:
+    """Placeholder tabs on a ttk.Notebook that are built on first selection."""
+
+    def __init__(self, notebook, connection=None):
+        self.notebook = notebook
+        self.connection = connection
+        self.tabs = {}  # tab text -> {"build", "frame", "built", "changes"}
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+
+    def _changes(self):
+        return self.connection.total_changes if self.connection is not None else 0
+
+    def add(self, text, build):
+        """
+        Add a tab whose contents are built when it is first selected.
+
+        Args:
+            text (str): Tab label; must match the label the builder uses.
+            build (callable): Adds a frame to the notebook, e.g. a create_*_tab call.
+        """
+        placeholder = ttk.Frame(self.notebook)
+        self.notebook.add(placeholder, text=text)
+        self.tabs[text] = {"build": build, "frame": placeholder, "built": False, "changes": None}
+
+    def invalidate(self, text):
+        """Discard a built tab so it is rebuilt the next time it is shown."""
+        tab = self.tabs.get(text)
+        if tab is None or not tab["built"]:
+            return
+
+        old_frame = tab["frame"]
+        was_selected = self.notebook.select() == str(old_frame)
+
+        placeholder = ttk.Frame(self.notebook)
+        self.notebook.insert(self.notebook.index(old_frame), placeholder, text=text)
+        tab.update(frame=placeholder, built=False, changes=None)
+
+        # Select the placeholder first so destroying the old frame does not
+        # move the selection onto (and build) a neighbouring tab
+        if was_selected:
+            self.notebook.select(placeholder)
+        old_frame.destroy()
+
+    def _on_tab_changed(self, event=None):
+        selected = self.notebook.select()
+        for text, tab in self.tabs.items():
+            if str(tab["frame"]) != selected:
+                continue
+            if not tab["built"]:
+                self._build(text)
+            elif tab["changes"] != self._changes():
+                self.invalidate(text)
+            break
+
+    def _build(self, text):
+        tab = self.tabs[text]
+        placeholder = tab["frame"]
+        before = set(self.notebook.tabs())
+
+        tab["build"]()
+
+        tab["built"] = True
+        tab["changes"] = self._changes()
+
+        added = [name for name in self.notebook.tabs() if name not in before]
+        if added:
+            frame = self.notebook.nametowidget(added[0])
+            self.notebook.insert(self.notebook.index(placeholder), frame)
+            tab["frame"] = frame
+            self.notebook.select(frame)
+            self.notebook.forget(placeholder)
+            placeholder.destroy()
+        else:
+            # The builder found nothing to show for this person
+            ttk.Label(placeholder, text="No records found.").pack(padx=10, pady=10, anchor="w")
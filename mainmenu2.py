@@ -7,11 +7,43 @@ from tkinter import messagebox
 from tkinter import ttk
 from tkinter import filedialog
 from PIL import ImageTk, Image
+from people_grid import PeopleGridPager, format_people_grid_row
+from db_utils import get_connection, close_connection
+from window_manager import open_person_form, open_membership_manager, open_business_manager
+from migrations import SCHEMA_VERSION, migrate
+from name_search import name_match_condition
+
+# Bring the schema (indexes etc.) up to date before anything queries it; the
+# forms rely on the new tables and triggers, so stop if that cannot be done
+def schema_error(message):
+    root = tk.Tk()
+    root.withdraw()
+    messagebox.showerror("Database Upgrade Failed", f"{message}\n\nThe program will now close.")
+    root.destroy()
+    sys.exit(1)
+
+try:
+    schema_version = migrate()
+except Exception as e:
+    schema_error(f"The database could not be upgraded:\n{e}")
+if schema_version < SCHEMA_VERSION:
+    schema_error(f"The database was only upgraded to version {schema_version} of {SCHEMA_VERSION} "
+                 f"because a table is missing. Run 'python migrations.py migrate' for details.")
 
 # Connect to the database
-connection = sqlite3.connect('phoenix.db')
+connection = get_connection()
 cursor = connection.cursor()
 
+# Windowed grid settings: rows fetched per page and pages kept in the tree
+GRID_PAGE_SIZE = 200
+GRID_WINDOW_PAGES = 3
+
+grid_pager = PeopleGridPager(cursor, GRID_PAGE_SIZE)
+grid_keys = {}  # tree item -> keyset pagination key for that row
+grid_at_start = True
+grid_at_end = True
+grid_loading = False
+
 # Function to close the form
 def close_form():
     if messagebox.askquestion("Close Form", "Are you sure you want to close the form?") == "yes":
@@ -22,8 +54,6 @@ def open_address_management():
     subprocess.run(["python", "address_management.py"])
 
 def export_data():
-    # Connect to the database
-    connection = sqlite3.connect('phoenix.db')
     cursor = connection.cursor()
 
     # Execute the query to retrieve all records from the People table
@@ -49,83 +79,108 @@ def export_data():
         # Write the data rows
         writer.writerows(records)
 
-    # Close the database connection
-    connection.close()
-
     # Print the number of records exported
     record_count = len(records)
     print(f"{record_count} records have been exported to {file_path}")
        
 
-def populate_tree(records):
-    tree.delete(*tree.get_children())  # Clear existing records in the tree
-
-    for record in records:
+def insert_grid_rows(rows, index=tk.END):
+    """Insert (key, record) pairs from the grid pager into the tree."""
+    for key, record in rows:
         try:
-            #person_id = record[0]  # Assuming the first column in the record is the person's ID
-            person_id = record[0]  # ID
-            first_name = record[1] if record[1] is not None else ""  # Replace None with empty string
-            middle_name = record[2] if record[2] is not None else ""
-            last_name = record[3] if record[3] is not None else ""
-            title = record[4] if record[4] is not None else ""
-            nick_name = record[5] if record[5] is not None else ""
-            married_name = record[6] if record[6] is not None else ""
-            married_to = record[7] if record[7] is not None else ""  # This might be different, adjust according to actual data
-            father = record[8] if record[8] is not None else ""
-            mother = record[9] if record[9] is not None else ""
-            birth_date = record[10] if record[10] is not None else ""
-            birth_location = record[11] if record[11] is not None else ""
-            death_date = record[12] if record[12] is not None else ""
-            death_location = record[13] if record[13] is not None else ""
-            buried_link = record[26] if record[26] is not None else ""
-            obit_link = record[22] if record[22] is not None else ""
-
-
-            # Check for an image for the person
-            cursor.execute("SELECT image_path FROM Photos WHERE person_id = ?", (person_id,))
-            image_result = cursor.fetchone()
-            image_symbol = '\U0001F4F7' if image_result else ""  # Camera symbol if image exists
-
-            # Fetch the first spouse's ID for displaying in the Married To column
-            cursor.execute("""
-                SELECT CASE
-                    WHEN person1_id = ? THEN person2_id
-                    ELSE person1_id
-                END AS spouse_id
-                FROM Marriages
-                WHERE person1_id = ? OR person2_id = ?
-                LIMIT 1
-            """, (person_id, person_id, person_id))
-            spouse_result = cursor.fetchone()
-            spouse_id_display = spouse_result[0] if spouse_result else ""
-
-            # Construct the record for display. Adjust according to your treeview columns
-            display_record = [image_symbol, person_id] + list(record[1:-1]) + [spouse_id_display]  # Adjust the slicing as needed
+            display_record = format_people_grid_row(record)
 
             # Insert the record into the treeview
-            tree.insert("", tk.END, values=display_record)
+            item = tree.insert("", index, values=display_record)
+            grid_keys[item] = key
+            if index != tk.END:
+                index += 1
 
         except Exception as e:
             print(f"Failed to insert record {record}: {e}")  # Error handling
 
+def populate_tree(rows):
+    global grid_at_start, grid_at_end
+
+    tree.delete(*tree.get_children())  # Clear existing records in the tree
+    grid_keys.clear()
+
+    insert_grid_rows(rows)
+    grid_at_start = True
+    grid_at_end = not grid_pager.page_size or len(rows) < grid_pager.page_size
+
+def trim_grid(from_top):
+    """Drop rows from one end of the tree so it holds at most the grid window."""
+    global grid_at_start, grid_at_end
+
+    children = tree.get_children()
+    excess = len(children) - GRID_PAGE_SIZE * GRID_WINDOW_PAGES
+    if excess <= 0:
+        return
+
+    removed = children[:excess] if from_top else children[-excess:]
+    for item in removed:
+        grid_keys.pop(item, None)
+    tree.delete(*removed)
+
+    if from_top:
+        grid_at_start = False
+    else:
+        grid_at_end = False
+
+def extend_grid(forward):
+    """Fetch the next (or previous) page as the user scrolls near an edge."""
+    global grid_at_start, grid_at_end, grid_loading
+
+    if grid_loading or not grid_pager.page_size:
+        return
+    if (forward and grid_at_end) or (not forward and grid_at_start):
+        return
+
+    children = tree.get_children()
+    if not children:
+        return
+
+    grid_loading = True
+    try:
+        top_item = tree.identify_row(1)
+
+        if forward:
+            rows = grid_pager.page_after(grid_keys[children[-1]])
+            insert_grid_rows(rows)
+            grid_at_end = len(rows) < grid_pager.page_size
+        else:
+            rows = grid_pager.page_before(grid_keys[children[0]])
+            insert_grid_rows(rows, 0)
+            grid_at_start = len(rows) < grid_pager.page_size
+
+        if rows:
+            trim_grid(from_top=forward)
+
+            # Keep the row that was at the top of the view in place
+            if top_item and tree.exists(top_item):
+                tree.yview_moveto(tree.index(top_item) / len(tree.get_children()))
+    except sqlite3.Error as e:
+        print(f"Failed to fetch grid page: {e}")
+    finally:
+        grid_loading = False
+
+def on_tree_yscroll(first, last):
+    y_scrollbar.set(first, last)
+
+    if float(last) >= 0.98:
+        window.after_idle(extend_grid, True)
+    elif float(first) <= 0.02:
+        window.after_idle(extend_grid, False)
+
         
 def search_by_name():
     last_name = entry_last_name.get().strip()
     first_name = entry_first_name.get().strip()
 
-    query = "SELECT * FROM People WHERE"
-    parameters = []
-
-    if last_name:
-        query += " (last_name LIKE ? OR married_name LIKE ?)"
-        parameters.append(f"{last_name}%")
-        parameters.append(f"{last_name}%")
-
-    if first_name:
-        if parameters:
-            query += " AND"
-        query += " first_name LIKE ?"
-        parameters.append(f"{first_name}%")
+    # Word-prefix match through the full-text name index, or phonetic codes
+    query, parameters = name_match_condition(cursor, sounds_like=var_sounds_like.get(),
+                                             last_name=last_name, first_name=first_name)
 
     if not parameters:  # No names entered
         messagebox.showinfo("No Input", "Please enter a first name, a last name, or both.")
@@ -145,21 +200,9 @@ def search_by_record_number():
         record_number = int(record_number)
 
         # The new query and parameters for the search
-        query = "SELECT * FROM People WHERE id = ?"
-        parameters = [record_number] 
-
-        cursor.execute(query, parameters)
-        records = cursor.fetchall()
+        display_records("p.id = ?", [record_number])
 
-        #print("Query results:", records)  # Debugging line to check the fetched records
-
-        if records:
-            # Clear the treeview before populating with new records
-            tree.delete(*tree.get_children())
-
-            # Populate the tree with the fetched record
-            populate_tree(records)
-        else:
+        if not tree.get_children():
             print("No records found for the provided record number.")
             messagebox.showinfo("No Records", "No records found for the provided record number.")
 
@@ -222,8 +265,8 @@ def view_orgs():
         subprocess.run(["python", "orgs.py"])
 
 def view_members():
-    # Run the members.py script
-        subprocess.run(["python", "members.py"])
+    # Open the Membership Management window
+        open_membership_manager()
 
 
 # Function to add a census record
@@ -278,7 +321,7 @@ def open_edit_form(event):
 
     # Check if record_id is not empty
     if record_id:
-        subprocess.Popen(["python", "editme.py", str(record_id)])
+        open_person_form(record_id)
     else:
         messagebox.showinfo("No Record Found", "The record you're trying to access does not exist.")
 
@@ -309,10 +352,19 @@ column_name_mapping = {
     "Occupation" : "occupation"
 }
 
-# Global variables for current query and its parameters
-current_query = "SELECT * FROM People"
+# Global variables for current filter and its parameters
+current_query = ""
 current_parameters = []
 
+def refresh_grid():
+    """Reload the grid from the first page of the current filter and sort."""
+    try:
+        rows = grid_pager.first_page()
+    except sqlite3.Error as e:
+        print(f"Failed to execute query: {e}")
+        return
+    populate_tree(rows)
+
 def display_records(query, parameters=[]):
     global current_query
     global current_parameters
@@ -322,21 +374,12 @@ def display_records(query, parameters=[]):
     current_parameters = parameters
     sort_order = {col: True for col in tree["columns"]}  # Reset the sort order
 
-    cursor.execute(query, parameters)
-    records = cursor.fetchall()
-    #print("Fetched records:", records)  # Debugging line
-
-
-    for row in tree.get_children():
-        tree.delete(row)
-
-    populate_tree(records)
+    grid_pager.reset(query, parameters)
+    refresh_grid()
 
 def on_column_header_double_click(column):
     global current_sort_column
     global sort_order
-    global current_query
-    global current_parameters
 
     # Check if the column is already sorted in ascending order
     ascending = column == current_sort_column and sort_order[column]
@@ -351,26 +394,18 @@ def on_column_header_double_click(column):
         print(f"Column {column} not found in column_name_mapping.")
         return
 
-    # Run the current query, but add an ORDER BY clause to sort the results
-    sorted_query = current_query + f' ORDER BY "{db_column_name}" {order}'
-    print(f"Sorted query: {sorted_query}")
-    try:
-        cursor.execute(sorted_query, current_parameters)
-    except Exception as e:
-        print(f"Failed to execute query: {e}")
-        return
-    records = cursor.fetchall()
-
-    # Clear the existing records in the tree
-    for row in tree.get_children():
-        tree.delete(row)
-
-    # Insert the sorted records into the tree
-    populate_tree(records)
+    # Re-run the current filter sorted by the column; pages seek on the sort key
+    print(f"Sorted by: {db_column_name} {order}")
+    grid_pager.reset(current_query, current_parameters, db_column_name, sort_order[column])
+    refresh_grid()
 
     # Store the current sort column and order
     current_sort_column = column
 
+def toggle_windowed_grid():
+    grid_pager.page_size = GRID_PAGE_SIZE if windowed_grid_var.get() else None
+    refresh_grid()
+
 def delete_record():
     selected_item = tree.focus()
     if selected_item:
@@ -405,8 +440,9 @@ def delete_record():
                 cursor.execute("DELETE FROM Photos WHERE person_id = ?", (record_id,))
                 connection.commit()
                 messagebox.showinfo("Success", "Record deleted successfully.")
-                # Refresh the tree view
-                display_records(current_query, current_parameters)
+                # Remove the row in place so the grid keeps its scroll position
+                grid_keys.pop(selected_item, None)
+                tree.delete(selected_item)
             except sqlite3.Error as e:
                 messagebox.showerror("Error", str(e))
     else:
@@ -418,7 +454,7 @@ def open_add_form():
 
 
 def open_business_management():
-    subprocess.Popen(["python", "business.py"])
+    open_business_manager()
 
 # Function to open the census form for the selected record
 def open_census_window():
@@ -472,6 +508,12 @@ tools_menu = tk.Menu(menu, tearoff=False)
 menu.add_cascade(label="Tools", menu=tools_menu)
 tools_menu.add_command(label="FindAGrave Matching", command=open_findagrave_matching)
 
+# View Menu
+view_menu = tk.Menu(menu, tearoff=False)
+menu.add_cascade(label="View", menu=view_menu)
+windowed_grid_var = tk.BooleanVar(value=True)
+view_menu.add_checkbutton(label="Windowed People Grid", variable=windowed_grid_var, command=toggle_windowed_grid)
+
 
 # Create a frame for the title
 frame_title = ttk.Frame(window)
@@ -504,6 +546,11 @@ entry_last_name.grid(row=1, column=1, padx=5, pady=5)
 #Bind the Return key to the Last Name entry field
 entry_last_name.bind("<Return>", lambda event: search_by_name())
 
+# Match spelling variants (Smith/Smyth/Schmidt) by phonetic code
+var_sounds_like = tk.BooleanVar(value=False)
+check_sounds_like = ttk.Checkbutton(frame_search, text="Sounds like", variable=var_sounds_like)
+check_sounds_like.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+
 # Sort order radio buttons
 #label_order = ttk.Label(frame_search, text="Order:")
 #label_order.grid(row=2, column=0, padx=5, pady=5)
@@ -554,7 +601,7 @@ x_scrollbar = ttk.Scrollbar(frame_tree, orient=tk.HORIZONTAL)
 y_scrollbar = ttk.Scrollbar(frame_tree)
 
 # Create a treeview to display the records
-tree = ttk.Treeview(frame_tree, xscrollcommand=x_scrollbar.set, yscrollcommand=y_scrollbar.set, show='headings')
+tree = ttk.Treeview(frame_tree, xscrollcommand=x_scrollbar.set, yscrollcommand=on_tree_yscroll, show='headings')
 tree["columns"] = (
     "Image","ID", "First Name", "Middle Name", "Last Name",
     "Title", "Nick Name", "Married Name", "Married To",
@@ -635,13 +682,8 @@ for column in tree["columns"][13:]:
 
 tree.pack(fill=tk.BOTH, expand=True)
 
-# Retrieve all records from the People table
-cursor.execute(f"SELECT * FROM People")
-
-records = cursor.fetchall()
-
-# Insert the records into the treeview for the first time
-populate_tree(records)
+# Load the first page of the People table into the treeview
+display_records("")
 
 # Create a frame for the buttons
 frame_buttons = ttk.Frame(window)
@@ -676,4 +718,4 @@ y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 window.mainloop()
 
 # Close the connection
-connection.close()
+close_connection()
@@ -1,15 +1,21 @@
 import sqlite3
 import sys
-import subprocess
 import tkinter as tk
 import re
 from datetime import datetime
 from tkinter import ttk, messagebox
+from db_utils import get_connection
+from name_search import name_match_condition, search_people
+from window_manager import hosted_form, form_argv, create_form_window, run_form_mainloop, open_person_form
 
 # Connect to the database
-connection = sqlite3.connect('Phoenix.db')
+connection = get_connection()
 cursor = connection.cursor()
 
+# Set when this window is opened inside the running app by window_manager
+hosted = hosted_form()
+argv = form_argv()
+
 def load_organizations_dropdown():
     try:
         cursor.execute("SELECT org_id, org_name FROM Org")
@@ -28,7 +34,7 @@ def edit_membership_window(membership_id):
 
     print(f"Editing membership with ID: {membership_id}")
 
-    edit_window = tk.Tk()
+    edit_window = create_form_window()
     edit_window.title("Edit Membership")
     edit_window.geometry("400x400")
 
@@ -128,7 +134,7 @@ def edit_membership_window(membership_id):
         messagebox.showerror("Error", f"Database error: {e}")
         edit_window.destroy()
 
-    edit_window.mainloop()
+    run_form_mainloop(edit_window)
 
 def add_membership_for_known_person(person_id):
     # Create a simple form window
@@ -140,6 +146,7 @@ def add_membership_for_known_person(person_id):
     form_window.grab_set()
     form_window.focus_force()
     form_window.lift()
+    form_window.protocol("WM_DELETE_WINDOW", lambda: cancel_membership())
 
     # Get person details
     cursor.execute("SELECT first_name, middle_name, last_name FROM People WHERE id = ?", (person_id,))
@@ -197,7 +204,7 @@ def add_membership_for_known_person(person_id):
             connection.commit()
             messagebox.showinfo("Success", f"Membership added for {full_name}")
             form_window.destroy()
-            root.quit()
+            root.destroy()
         except Exception as e:
             messagebox.showerror("Error", f"Could not save membership: {e}")
 
@@ -206,17 +213,17 @@ def add_membership_for_known_person(person_id):
 
     def cancel_membership():
         form_window.destroy()
-        root.quit()
+        root.destroy()
 
     ttk.Button(button_frame, text="Save Membership", command=save_membership).pack(side="left", padx=10)
     ttk.Button(button_frame, text="Cancel", command=cancel_membership).pack(side="left", padx=10)
 
 
 # Handle edit mode if --edit-membership is passed
-if "--edit-membership" in sys.argv:
+if "--edit-membership" in argv:
     try:
-        idx = sys.argv.index("--edit-membership") + 1
-        membership_id = int(sys.argv[idx])
+        idx = argv.index("--edit-membership") + 1
+        membership_id = int(argv[idx])
         edit_membership_window(membership_id)
         sys.exit()
     except (IndexError, ValueError):
@@ -224,17 +231,17 @@ if "--edit-membership" in sys.argv:
         sys.exit(1)
 
 # Handle add mode if --for-person is passed
-elif "--for-person" in sys.argv:
+elif "--for-person" in argv:
     try:
-        person_index = sys.argv.index("--for-person") + 1
-        person_id = int(sys.argv[person_index])
+        person_index = argv.index("--for-person") + 1
+        person_id = int(argv[person_index])
         print(f"[members.py] --for-person detected. Opening form for person_id={person_id}")
 
-        root = tk.Tk()
+        root = create_form_window()
         root.withdraw()  # Hides the main window, but keeps Tk alive
         add_membership_for_known_person(person_id)
 
-        root.mainloop()
+        run_form_mainloop(root)
         sys.exit()
     except (IndexError, ValueError):
         print("Invalid or missing person ID after --for-person")
@@ -242,15 +249,15 @@ elif "--for-person" in sys.argv:
 
 # Default: Run full Membership Management UI
 else:
-    root = tk.Tk()
+    root = create_form_window()
     root.title("Membership Management System")
     root.geometry("1200x600")  # Adjust size as needed
 
 # Capture person_id if passed as command-line argument
 initial_person_id = None
-if len(sys.argv) > 1:
+if len(argv) > 1:
     try:
-        initial_person_id = int(sys.argv[1])
+        initial_person_id = int(argv[1])
     except ValueError:
         initial_person_id = None
 
@@ -324,7 +331,7 @@ def on_double_click(event):
             if response:
                 # Close current window and open the edit person script
                 root.destroy()  # Closes the main window, adjust as needed if multiple windows are open
-                subprocess.run(["python", "editme.py", str(person_id)])
+                open_person_form(person_id)
         else:
             # Handle other columns double-click for editing membership
             edit_membership_window(membership_id)
@@ -356,15 +363,11 @@ def search_members(org_id, first_name, last_name):
     # Dynamic list of parameters starting with org_id
     parameters = [org_id]
 
-    # If first name is not empty, append condition and parameter
-    if first_name:
-        query += " AND People.first_name LIKE ?"
-        parameters.append(f'%{first_name}%')
-
-    # If last name is not empty, append condition and parameter
-    if last_name:
-        query += " AND People.last_name LIKE ?"
-        parameters.append(f'%{last_name}%')
+    # Narrow to matching names through the full-text name index
+    name_condition, name_parameters = name_match_condition(cursor, "People", first_name=first_name, last_name=last_name)
+    if name_condition:
+        query += f" AND {name_condition}"
+        parameters.extend(name_parameters)
 
     # Execute the query with the dynamic list of parameters
     cursor.execute(query, parameters)
@@ -521,13 +524,11 @@ def add_membership_window(prefill_person_id=None):
     # Function to populate treeview with search results
     def search_for_people(first_name, last_name, person_tree):
         person_tree.delete(*person_tree.get_children())  # Clear existing entries in the treeview
-        query = """
-            SELECT id, first_name, middle_name, last_name, title, nick_name, married_name, birth_date, death_date
-            FROM People
-            WHERE first_name LIKE ? AND last_name LIKE ?
-        """
-        cursor.execute(query, (f'%{first_name}%', f'%{last_name}%'))
-        people_records = cursor.fetchall()
+        people_records = search_people(
+            cursor,
+            ("id", "first_name", "middle_name", "last_name", "title", "nick_name", "married_name", "birth_date", "death_date"),
+            first_name=first_name, last_name=last_name
+        )
         for record in people_records:
             person_tree.insert("", tk.END, values=record)
 
@@ -605,8 +606,10 @@ def populate_treeview(org_id=None, search_text=None):
     parameters = [org_id]
 
     if search_text:
-        query += " AND (People.first_name LIKE ? OR People.last_name LIKE ?)"
-        parameters += [f'%{search_text}%', f'%{search_text}%']
+        name_condition, name_parameters = name_match_condition(cursor, "People", text=search_text)
+        if name_condition:
+            query += f" AND {name_condition}"
+            parameters += name_parameters
 
     cursor.execute(query, parameters)
     for member in cursor.fetchall():
@@ -661,12 +664,12 @@ member_treeview.configure(yscrollcommand=scrollbar.set)
 organizations = load_organizations_dropdown()
 org_dropdown['values'] = [f"{org[0]} - {org[1]}" for org in organizations]
 
-if "--for-person" in sys.argv:
+if "--for-person" in argv:
     try:
-        person_id_index = sys.argv.index("--for-person") + 1
-        target_id = int(sys.argv[person_id_index])
+        person_id_index = argv.index("--for-person") + 1
+        target_id = int(argv[person_id_index])
         add_membership_for_known_person(target_id)
-        root.mainloop()  # Run only the simple form
+        run_form_mainloop(root)  # Run only the simple form
         sys.exit()       # Prevent loading the main Membership Management interface
     except (IndexError, ValueError):
         print("Invalid or missing person ID after --for-person")
@@ -674,7 +677,7 @@ if "--for-person" in sys.argv:
 
 
 def edit_membership_window(membership_id):
-    edit_window = tk.Tk()
+    edit_window = tk.Toplevel(root) if hosted else tk.Tk()
     edit_window.title("Edit Membership")
     edit_window.geometry("500x400")
 
@@ -752,7 +755,8 @@ def edit_membership_window(membership_id):
     ttk.Button(edit_window, text="Save Changes", command=save_edits).pack(pady=20)
     ttk.Button(edit_window, text="Cancel", command=edit_window.destroy).pack()
 
-    edit_window.mainloop()
+    if hosted is None:
+        edit_window.mainloop()
 
 
 def handle_member_selection():
@@ -774,14 +778,14 @@ button_delete_member.pack(pady=5)
 member_treeview.bind("<<TreeviewSelect>>", on_member_select)
 
 # Start the Tkinter event loop
-root.mainloop()
+run_form_mainloop(root)
 
 
 
-if "--edit-membership" in sys.argv:
+if "--edit-membership" in argv:
     try:
-        idx = sys.argv.index("--edit-membership") + 1
-        membership_id = int(sys.argv[idx])
+        idx = argv.index("--edit-membership") + 1
+        membership_id = int(argv[idx])
         edit_membership_window(membership_id)
         sys.exit()
     except (IndexError, ValueError):
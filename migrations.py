@@ -0,0 +1,468 @@
+# migrations.py
+#
+# Versioned schema migrations for phoenix.db, plus an index advisor.
+#
+# The schema version is kept in PRAGMA user_version.  Each migration runs in
+# its own transaction and bumps the version when it commits, so running the
+# script again only applies what is new.  A migration whose table is missing
+# is skipped without bumping the version, and migrating stops there, so it is
+# applied once the table exists instead of being counted as done.
+#
+#   python migrations.py migrate [--db phoenix.db]   Apply pending migrations
+#   python migrations.py verify  [--db phoenix.db]   Check the hot-query indexes
+#   python migrations.py advise  [--db phoenix.db]   EXPLAIN the app's queries
+
+import argparse
+import sqlite3
+from db_utils import DB_PATH, connect
+from resgroup_sync import create_change_log
+from name_search import create_name_index
+from phonetic import create_phonetic_log, create_phonetic_table, rebuild_phonetic_codes, refresh_phonetic_codes
+from date_keys import create_date_keys
+from parcel_geometry import create_geometry_tables, refresh_geometry, backfill_metrics
+from deed_summary import create_deed_summary, rebuild_deed_summary
+from title_chain import create_title_tables, rebuild_title_chain
+from ancestry import create_parent_id_indexes
+
+# (index name, table, columns) for the columns the app's hot queries filter on
+HOT_QUERY_INDEXES = [
+    ("idx_census_person_id", "Census", ("person_id",)),
+    ("idx_census_household", "Census", ("census_year", "township_id", "census_dwellnum", "census_householdnum")),
+    ("idx_resgroupmembers_group_member", "ResGroupMembers", ("res_group_id", "res_group_member")),
+    ("idx_resgroups_lookup", "ResGroups", ("dwelling_num", "household_num", "res_group_year", "township_id", "event_type")),
+    ("idx_people_father", "People", ("father",)),
+    ("idx_people_mother", "People", ("mother",)),
+    ("idx_marriages_person1_id", "Marriages", ("person1_id",)),
+    ("idx_marriages_person2_id", "Marriages", ("person2_id",)),
+    ("idx_geojsonlink_record", "GeoJSONLink", ("record_type", "record_id")),
+    ("idx_deedparties_person_id", "DeedParties", ("person_id",)),
+    ("idx_legaldescriptions_deed_id", "LegalDescriptions", ("deed_id",)),
+    ("idx_tax_records_people_id", "Tax_Records", ("people_id",)),
+    ("idx_membership_org_id", "Membership", ("org_id",)),
+    ("idx_membership_person_id", "Membership", ("person_id",)),
+    ("idx_photos_person_id", "Photos", ("person_id",)),
+]
+
+# Indexes added by later migrations, checked by verify alongside HOT_QUERY_INDEXES
+CENSUS_RES_GROUP_INDEX = ("idx_census_res_group_id", "Census", ("res_group_id",))
+
+
+class MigrationSkipped(Exception):
+    """A migration could not be applied because a table or column it needs is missing."""
+
+
+# -------------------------------
+# SCHEMA HELPERS
+# -------------------------------
+
+def get_schema_version(cursor):
+    """Return the schema version stored in PRAGMA user_version."""
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+
+def table_columns(cursor, table):
+    """
+    List the columns of a table.
+
+    Args:
+        cursor: SQLite cursor object.
+        table (str): Table name.
+
+    Returns:
+        list: Column names, empty if the table does not exist.
+    """
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    return [row[1] for row in cursor.fetchall()]
+
+
+def find_covering_index(cursor, table, columns):
+    """
+    Find an existing index whose leading columns are exactly `columns`.
+
+    Args:
+        cursor: SQLite cursor object.
+        table (str): Table name.
+        columns (tuple): Column names in index order.
+
+    Returns:
+        str: Name of a matching index, or None.
+    """
+    cursor.execute(f'PRAGMA index_list("{table}")')
+    for index in cursor.fetchall():
+        index_name = index[1]
+        cursor.execute(f'PRAGMA index_info("{index_name}")')
+        index_columns = tuple(row[2] for row in sorted(cursor.fetchall()))
+        if index_columns[:len(columns)] == tuple(columns):
+            return index_name
+    return None
+
+
+def ensure_index(cursor, index_name, table, columns):
+    """
+    Create an index unless the table already has one that serves the same columns.
+
+    Returns:
+        str: "created", "exists", or "skipped" when the table or a column is missing.
+    """
+    existing_columns = table_columns(cursor, table)
+    if not existing_columns or any(column not in existing_columns for column in columns):
+        return "skipped"
+    if find_covering_index(cursor, table, columns):
+        return "exists"
+
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" ({column_list})')
+    return "created"
+
+
+# -------------------------------
+# MIGRATIONS
+# -------------------------------
+
+def migration_001_hot_query_indexes(cursor):
+    """Create the indexes the People grid, census, family and deed queries rely on."""
+    skipped = []
+    for index_name, table, columns in HOT_QUERY_INDEXES:
+        status = ensure_index(cursor, index_name, table, columns)
+        print(f"  {table}({', '.join(columns)}): {status}")
+        if status == "skipped":
+            skipped.append(table)
+    if skipped:
+        raise MigrationSkipped(", ".join(dict.fromkeys(skipped)))
+
+
+def migration_002_census_change_log(cursor):
+    """Log Census inserts, deletes and household-key edits for resgroup_sync."""
+    if not table_columns(cursor, "Census"):
+        raise MigrationSkipped("Census")
+    create_change_log(cursor)
+    print("  CensusChangeLog and triggers: created")
+
+
+def migration_003_people_name_index(cursor):
+    """Full-text index over People names for the person searches."""
+    if not table_columns(cursor, "People"):
+        raise MigrationSkipped("People")
+    create_name_index(cursor)
+    print("  PeopleNameIndex and triggers: created")
+
+
+def migration_004_people_phonetic_codes(cursor):
+    """Phonetic codes for first, last and married names, coded for everyone now."""
+    if not table_columns(cursor, "People"):
+        raise MigrationSkipped("People")
+    create_phonetic_table(cursor)
+    print(f"  PeoplePhonetic: coded {refresh_phonetic_codes(cursor)} people")
+
+
+def migration_005_census_res_group_index(cursor):
+    """Index Census by ResGroup for the group checks in resgroup_sync and bulk imports."""
+    index_name, table, columns = CENSUS_RES_GROUP_INDEX
+    status = ensure_index(cursor, index_name, table, columns)
+    print(f"  {table}({', '.join(columns)}): {status}")
+    if status == "skipped":
+        raise MigrationSkipped(table)
+
+
+def migration_006_date_sort_keys(cursor):
+    """Indexed sort keys for the free-text date columns, backfilled with parse_date_input."""
+    for (table, column), count in create_date_keys(cursor).items():
+        print(f"  {table}.{column}_sort: {count} dates keyed")
+
+
+def migration_007_geojson_geometry(cursor):
+    """Parsed geometry and an R*Tree bounding-box index for GeoJSONData, parsed for every row now."""
+    if not table_columns(cursor, "GeoJSONData"):
+        raise MigrationSkipped("GeoJSONData")
+    create_geometry_tables(cursor)
+    print(f"  GeoJSONGeometry and GeoJSONRTree: parsed {refresh_geometry(cursor)} features")
+
+
+def migration_008_parcel_metrics(cursor):
+    """Area, perimeter and centroid columns on GeoJSONGeometry, measured for every feature now."""
+    if not table_columns(cursor, "GeoJSONData"):
+        raise MigrationSkipped("GeoJSONData")
+    create_geometry_tables(cursor)
+    print(f"  GeoJSONGeometry metrics: measured {backfill_metrics(cursor)} features")
+
+
+def migration_009_deed_summary(cursor):
+    """DeedSummary for the deed tab, built for every deed now."""
+    if not table_columns(cursor, "Deeds"):
+        raise MigrationSkipped("Deeds")
+    create_deed_summary(cursor)
+    print(f"  DeedSummary and triggers: summarized {rebuild_deed_summary(cursor)} deeds")
+
+
+def migration_010_title_chain(cursor):
+    """Chain-of-title tables over Deeds and DeedParties, built for every parcel now."""
+    if not table_columns(cursor, "Deeds") or not table_columns(cursor, "LegalDescriptions"):
+        raise MigrationSkipped("Deeds")
+    create_title_tables(cursor)
+    print(f"  TitleTransfers and TitleHoldings: built {rebuild_title_chain(cursor)} parcels")
+
+
+def migration_011_parent_id_indexes(cursor):
+    """Indexes on People father/mother as integer ids, for the ancestry walks."""
+    columns = table_columns(cursor, "People")
+    if "father" not in columns or "mother" not in columns:
+        raise MigrationSkipped("People")
+    create_parent_id_indexes(cursor)
+    print("  People father and mother ids: created")
+
+
+def migration_012_phonetic_log(cursor):
+    """Log People name writes for sync_phonetic_codes; code anyone still uncoded now."""
+    if not table_columns(cursor, "People"):
+        raise MigrationSkipped("People")
+    create_phonetic_table(cursor)
+    create_phonetic_log(cursor)
+    print(f"  PeoplePhoneticLog and triggers: created, coded {refresh_phonetic_codes(cursor)} people")
+
+
+def migration_013_title_chain_conveyances(cursor):
+    """Transfer kinds in the chain of title; holdings rebuilt from conveyances only."""
+    if not table_columns(cursor, "Deeds") or not table_columns(cursor, "LegalDescriptions"):
+        raise MigrationSkipped("Deeds")
+    create_title_tables(cursor)
+    print(f"  TitleTransfers and TitleHoldings: rebuilt {rebuild_title_chain(cursor)} parcels")
+
+
+def migration_014_phonetic_name_folding(cursor):
+    """Phonetic codes recomputed with accents, ß and apostrophes folded out of names."""
+    if not table_columns(cursor, "People"):
+        raise MigrationSkipped("People")
+    create_phonetic_table(cursor)
+    create_phonetic_log(cursor)
+    print(f"  PeoplePhonetic: re-coded {rebuild_phonetic_codes(cursor)} people")
+
+
+def migration_015_date_sort_keys_before_1000(cursor):
+    """Date sort keys backfilled again; years before 1000 were keyed as if padded on the right."""
+    for (table, column), count in create_date_keys(cursor).items():
+        print(f"  {table}.{column}_sort: {count} dates keyed")
+
+
+# (version, description, function(cursor)) in the order they are applied
+MIGRATIONS = [
+    (1, "Indexes for hot queries", migration_001_hot_query_indexes),
+    (2, "Census change log for incremental ResGroup sync", migration_002_census_change_log),
+    (3, "Full-text People name index", migration_003_people_name_index),
+    (4, "Phonetic name codes for sounds-like search", migration_004_people_phonetic_codes),
+    (5, "Census ResGroup index", migration_005_census_res_group_index),
+    (6, "Sortable date keys", migration_006_date_sort_keys),
+    (7, "GeoJSON geometry and spatial index", migration_007_geojson_geometry),
+    (8, "Parcel area, perimeter and centroid", migration_008_parcel_metrics),
+    (9, "Deed summary table", migration_009_deed_summary),
+    (10, "Chain of title", migration_010_title_chain),
+    (11, "People parent id indexes", migration_011_parent_id_indexes),
+    (12, "Phonetic code change log", migration_012_phonetic_log),
+    (13, "Chain of title without mortgages and leases", migration_013_title_chain_conveyances),
+    (14, "Phonetic codes for accented and apostrophized names", migration_014_phonetic_name_folding),
+    (15, "Sortable date keys for years before 1000", migration_015_date_sort_keys_before_1000),
+]
+
+# Version of a fully migrated database
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(db_path=DB_PATH):
+    """
+    Apply every migration newer than the database's schema version.
+
+    Stops at the first migration that is skipped because a table is missing,
+    leaving the version below it.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        int: The schema version after migrating; below SCHEMA_VERSION if a
+            migration was skipped.
+
+    Raises:
+        Exception: Whatever a migration raised; that migration is rolled back.
+    """
+    connection = connect(db_path)
+    cursor = connection.cursor()
+
+    try:
+        version = get_schema_version(cursor)
+        print(f"Schema version: {version}")
+
+        for migration_version, description, apply in MIGRATIONS:
+            if migration_version <= version:
+                continue
+
+            print(f"Applying migration {migration_version}: {description}")
+            cursor.execute("BEGIN")
+            try:
+                apply(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(migration_version)}")
+                connection.commit()
+            except MigrationSkipped as e:
+                connection.rollback()
+                print(f"  Skipped: {e} missing.  Schema left at version {version}.")
+                return version
+            except Exception:
+                connection.rollback()
+                raise
+            version = migration_version
+
+        print(f"Schema is up to date at version {version}.")
+        return version
+    finally:
+        connection.close()
+
+
+def verify_indexes(db_path=DB_PATH):
+    """
+    Check that every hot-query index (or an equivalent one) exists.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        list: (table, columns, index name or None) for each expected index.
+    """
+    connection = connect(db_path)
+    cursor = connection.cursor()
+
+    try:
+        results = []
+        for _, table, columns in HOT_QUERY_INDEXES + [CENSUS_RES_GROUP_INDEX]:
+            if not table_columns(cursor, table):
+                continue
+            results.append((table, columns, find_covering_index(cursor, table, columns)))
+        return results
+    finally:
+        connection.close()
+
+
+# -------------------------------
+# INDEX ADVISOR
+# -------------------------------
+
+# (name, SQL) for the queries the app runs most.  Placeholders are bound to
+# NULL; EXPLAIN QUERY PLAN only needs the statement, not real values.
+QUERY_CATALOGUE = [
+    ("People grid name search", """
+        SELECT p.id FROM People p
+        WHERE (p.last_name LIKE ? OR p.married_name LIKE ?) AND p.first_name LIKE ?
+    """),
+    ("Photos for person", "SELECT image_path FROM Photos WHERE person_id = ?"),
+    ("Spouse lookup", """
+        SELECT CASE WHEN person1_id = ? THEN person2_id ELSE person1_id END
+        FROM Marriages WHERE person1_id = ? OR person2_id = ? LIMIT 1
+    """),
+    ("Children of person", "SELECT id, birth_date FROM People WHERE father = ? OR mother = ?"),
+    ("Census records for person", "SELECT id FROM Census WHERE person_id = ?"),
+    ("Census household members", """
+        SELECT person_id FROM Census
+        WHERE census_year = ? AND township_id = ? AND census_dwellnum = ? AND census_householdnum = ?
+    """),
+    ("Census dwelling members", "SELECT person_id FROM Census WHERE census_year = ? AND census_dwellnum = ?"),
+    ("ResGroup lookup", """
+        SELECT id FROM ResGroups
+        WHERE dwelling_num = ? AND household_num = ? AND res_group_year = ?
+          AND township_id = ? AND event_type = ?
+    """),
+    ("ResGroup members", """
+        SELECT p.id FROM ResGroupMembers rgm JOIN People p ON p.id = rgm.res_group_member
+        WHERE rgm.res_group_id = ?
+    """),
+    ("ResGroup membership check", "SELECT 1 FROM ResGroupMembers WHERE res_group_id = ? AND res_group_member = ?"),
+    ("Tax records for person", """
+        SELECT t.record_id FROM Tax_Records t
+        LEFT JOIN GeoJSONLink gl ON t.record_id = gl.record_id AND gl.record_type = 'Tax'
+        WHERE t.people_id = ?
+    """),
+    ("Deeds for person", """
+        SELECT d.deed_id FROM Deeds d
+        JOIN DeedParties dp ON d.deed_id = dp.deed_id AND dp.person_id = ?
+        LEFT JOIN LegalDescriptions ld ON d.deed_id = ld.deed_id
+    """),
+    ("GeoJSON for record", "SELECT geojson_id FROM GeoJSONLink WHERE record_type = ? AND record_id = ?"),
+    ("Organization members", """
+        SELECT People.id FROM Membership JOIN People ON Membership.person_id = People.id
+        WHERE Membership.org_id = ?
+    """),
+    ("Memberships for person", "SELECT Membership.id FROM Membership WHERE Membership.person_id = ?"),
+]
+
+
+def explain_query(cursor, sql):
+    """
+    Run EXPLAIN QUERY PLAN for a statement with all placeholders bound to NULL.
+
+    Returns:
+        list: The plan's detail strings.
+    """
+    parameters = [None] * sql.count("?")
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+    return [row[3] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Return the plan steps that read a whole table rather than searching an index."""
+    return [step for step in plan if step.startswith("SCAN ") and " USING " not in step]
+
+
+def advise_indexes(db_path=DB_PATH):
+    """
+    Report which catalogued queries fall back to full-table scans.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        list: (query name, scan steps or error message) for each catalogued query.
+    """
+    connection = connect(db_path)
+    cursor = connection.cursor()
+
+    try:
+        report = []
+        for name, sql in QUERY_CATALOGUE:
+            try:
+                report.append((name, full_scans(explain_query(cursor, sql))))
+            except sqlite3.Error as e:
+                report.append((name, f"not checked: {e}"))
+        return report
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema migrations and index advisor for phoenix.db.")
+    parser.add_argument("command", choices=["migrate", "verify", "advise"])
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate(args.db)
+
+    elif args.command == "verify":
+        missing = 0
+        for table, columns, index_name in verify_indexes(args.db):
+            status = index_name if index_name else "MISSING"
+            missing += index_name is None
+            print(f"{table}({', '.join(columns)}): {status}")
+        print(f"\n{missing} missing index(es)." if missing else "\nAll hot-query indexes are present.")
+
+    elif args.command == "advise":
+        scans = 0
+        for name, result in advise_indexes(args.db):
+            if isinstance(result, str):
+                print(f"{name}: {result}")
+            elif result:
+                scans += 1
+                print(f"{name}: FULL SCAN - {'; '.join(result)}")
+            else:
+                print(f"{name}: ok")
+        print(f"\n{scans} quer{'y' if scans == 1 else 'ies'} with full-table scans.")
+
+
+if __name__ == "__main__":
+    main()
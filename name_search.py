@@ -0,0 +1,220 @@
+# name_search.py
+#
+# Full-text name index over People.
+#
+# PeopleNameIndex is an external-content FTS5 table on People's name columns
+# (first, middle, last, married, nickname and title), kept in step by
+# triggers, so a name search is an index lookup instead of a LIKE '%x%' scan.
+# Every word typed is matched as a prefix of a word in the name, e.g. "jo smi"
+# in the last-name box finds "Smith-Jones".  Results come back best match
+# first (FTS5 bm25 rank).
+#
+# The index is created by migration 3 in migrations.py.  Until it exists the
+# search functions fall back to prefix LIKE matching.
+#
+# With sounds_like=True the first and last name boxes are matched on stored
+# phonetic codes instead (see phonetic.py); other boxes still use the index.
+
+import re
+from phonetic import SOUNDS_LIKE_FIELDS, sounds_like_condition
+
+NAME_INDEX_TABLE = "PeopleNameIndex"
+NAME_INDEX_COLUMNS = ("first_name", "middle_name", "last_name", "married_name", "nick_name", "title")
+
+# Search box -> the indexed columns it matches
+SEARCH_FIELD_COLUMNS = {
+    "first_name": ("first_name", "nick_name"),
+    "middle_name": ("middle_name",),
+    "last_name": ("last_name", "married_name"),
+    "text": NAME_INDEX_COLUMNS,
+}
+
+_COLUMN_LIST = ", ".join(NAME_INDEX_COLUMNS)
+_NEW_VALUES = ", ".join(f"NEW.{column}" for column in NAME_INDEX_COLUMNS)
+_OLD_VALUES = ", ".join(f"OLD.{column}" for column in NAME_INDEX_COLUMNS)
+
+NAME_INDEX_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_INDEX_TABLE} USING fts5(
+        {_COLUMN_LIST},
+        content='People',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_name_index_insert
+    AFTER INSERT ON People
+    BEGIN
+        INSERT INTO {NAME_INDEX_TABLE} (rowid, {_COLUMN_LIST}) VALUES (NEW.id, {_NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_name_index_delete
+    AFTER DELETE ON People
+    BEGIN
+        INSERT INTO {NAME_INDEX_TABLE} ({NAME_INDEX_TABLE}, rowid, {_COLUMN_LIST})
+        VALUES ('delete', OLD.id, {_OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_name_index_update
+    AFTER UPDATE OF id, {_COLUMN_LIST} ON People
+    BEGIN
+        INSERT INTO {NAME_INDEX_TABLE} ({NAME_INDEX_TABLE}, rowid, {_COLUMN_LIST})
+        VALUES ('delete', OLD.id, {_OLD_VALUES});
+        INSERT INTO {NAME_INDEX_TABLE} (rowid, {_COLUMN_LIST}) VALUES (NEW.id, {_NEW_VALUES});
+    END
+    """,
+]
+
+
+def create_name_index(cursor):
+    """Create the People name index and its triggers, and index every existing row."""
+    for statement in NAME_INDEX_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute(f"INSERT INTO {NAME_INDEX_TABLE} ({NAME_INDEX_TABLE}) VALUES ('rebuild')")
+
+
+def has_name_index(cursor):
+    """Return True if the People name index exists in this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (NAME_INDEX_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def _tokens(text):
+    """Split search text into words the way the unicode61 tokenizer does."""
+    return re.findall(r"\w+", text or "")
+
+
+def build_name_match(**names):
+    """
+    Build an FTS5 MATCH expression from the search boxes.
+
+    Args:
+        **names: Search text keyed by SEARCH_FIELD_COLUMNS (first_name,
+            middle_name, last_name, or text for any name column).
+
+    Returns:
+        str: The MATCH expression, or None if nothing searchable was entered.
+    """
+    clauses = []
+    for field, value in names.items():
+        words = _tokens(value)
+        if not words:
+            continue
+        columns = " ".join(SEARCH_FIELD_COLUMNS[field])
+        phrases = " AND ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+        clauses.append(f"{{{columns}}} : ({phrases})")
+    return " AND ".join(clauses) or None
+
+
+def _like_condition(alias, names):
+    """Prefix LIKE fallback used when the name index has not been created."""
+    prefix = f"{alias}." if alias else ""
+    conditions = []
+    parameters = []
+    for field, value in names.items():
+        value = (value or "").strip()
+        if not value:
+            continue
+        columns = SEARCH_FIELD_COLUMNS[field]
+        conditions.append("(" + " OR ".join(f"{prefix}{column} LIKE ?" for column in columns) + ")")
+        parameters.extend([f"{value}%"] * len(columns))
+    return " AND ".join(conditions), parameters
+
+
+def _split_sounds_like(cursor, alias, names):
+    """Pop the boxes matched phonetically and return their condition and parameters."""
+    phonetic_names = {field: names.pop(field) for field in SOUNDS_LIKE_FIELDS if field in names}
+    return sounds_like_condition(cursor, alias, **phonetic_names)
+
+
+def name_match_condition(cursor, alias="p", sounds_like=False, **names):
+    """
+    SQL condition restricting People to those matching the search boxes.
+
+    Suitable for a WHERE clause that keeps its own ORDER BY, such as the main
+    People grid.
+
+    Args:
+        cursor: SQLite cursor object.
+        alias (str): Alias of the People table in the outer query.
+        sounds_like (bool): Match first and last names phonetically.
+        **names: Search text, as for build_name_match().
+
+    Returns:
+        tuple: (condition, parameters); the condition is empty if nothing was entered.
+    """
+    conditions = []
+    parameters = []
+    if sounds_like:
+        condition, phonetic_parameters = _split_sounds_like(cursor, alias, names)
+        if condition:
+            conditions.append(condition)
+            parameters.extend(phonetic_parameters)
+
+    if not has_name_index(cursor):
+        condition, like_parameters = _like_condition(alias, names)
+        if condition:
+            conditions.append(condition)
+            parameters.extend(like_parameters)
+        return " AND ".join(conditions), parameters
+
+    match = build_name_match(**names)
+    if match is not None:
+        prefix = f"{alias}." if alias else ""
+        conditions.append(f"{prefix}id IN (SELECT rowid FROM {NAME_INDEX_TABLE} WHERE {NAME_INDEX_TABLE} MATCH ?)")
+        parameters.append(match)
+    return " AND ".join(conditions), parameters
+
+
+def search_people(cursor, columns, where_clause="", parameters=(), limit=None, sounds_like=False, **names):
+    """
+    Find People matching the search boxes, best match first.
+
+    Args:
+        cursor: SQLite cursor object.
+        columns (sequence): People columns to return.
+        where_clause (str): Extra condition on People (alias p), without WHERE.
+        parameters: Parameters for where_clause.
+        limit (int): Maximum number of rows, or None for all.
+        sounds_like (bool): Match first and last names phonetically.
+        **names: Search text, as for build_name_match().
+
+    Returns:
+        list: Matching rows.
+    """
+    select_list = ", ".join(f"p.{column}" for column in columns)
+    conditions = [f"({where_clause})"] if where_clause else []
+    query_parameters = list(parameters)
+
+    if sounds_like:
+        condition, phonetic_parameters = _split_sounds_like(cursor, "p", names)
+        if condition:
+            conditions.append(condition)
+            query_parameters.extend(phonetic_parameters)
+
+    match = build_name_match(**names) if has_name_index(cursor) else None
+
+    if match is not None:
+        query = f"SELECT {select_list} FROM {NAME_INDEX_TABLE} JOIN People p ON p.id = {NAME_INDEX_TABLE}.rowid"
+        conditions.insert(0, f"{NAME_INDEX_TABLE} MATCH ?")
+        query_parameters.insert(0, match)
+        order_by = f" ORDER BY {NAME_INDEX_TABLE}.rank"
+    else:
+        query = f"SELECT {select_list} FROM People p"
+        condition, like_parameters = _like_condition("p", names)
+        if condition:
+            conditions.append(condition)
+            query_parameters.extend(like_parameters)
+        order_by = " ORDER BY p.last_name, p.first_name" if sounds_like else ""
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += order_by
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+
+    cursor.execute(query, query_parameters)
+    return cursor.fetchall()
@@ -0,0 +1,530 @@
+# parcel_geometry.py
+#
+# Parsed geometry for GeoJSONData, and an R*Tree index over its bounding boxes.
+#
+# GeoJSONData.geojson_text holds a boundary as typed: "lon,lat,lon,lat,..."
+# (or a GeoJSON Point/LineString/Polygon).  Each row is parsed once into
+# GeoJSONGeometry, which keeps the points as packed float64 lon,lat pairs, and
+# its bounding box goes into the GeoJSONRTree rtree table, so "which parcels
+# touch this area" and "which parcel is this point in" are index lookups.
+#
+# Geometry is stored when map data is saved (update_geometry).  Like
+# PeoplePhonetic, the GeoJSONData triggers created by migration 7 only discard
+# geometry whose text changed, so a row written by another tool never keeps a
+# stale shape; rows without geometry are parsed by refresh_geometry() before
+# the next spatial query (db_utils.refresh_before_read).  The rtree keeps 32-bit boxes rounded outwards, so
+# it may return a near miss but never drops a hit; point queries then test
+# the exact shape.
+#
+# Each geometry also stores its metrics, computed when it is parsed: geodesic
+# area in acres (polygons), perimeter or length in metres, and a centroid,
+# so recorded acreage can be checked against the drawn boundary in SQL
+# (see acreage_report.py).
+
+import json
+import math
+import re
+from array import array
+from db_utils import refresh_before_read
+
+GEOMETRY_TABLE = "GeoJSONGeometry"
+RTREE_TABLE = "GeoJSONRTree"
+
+GEOMETRY_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {GEOMETRY_TABLE} (
+        geojson_id INTEGER PRIMARY KEY,
+        geometry_type TEXT,
+        point_count INTEGER NOT NULL,
+        coordinates BLOB NOT NULL,
+        area_acres REAL,
+        perimeter_m REAL,
+        centroid_lon REAL,
+        centroid_lat REAL
+    )
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(geojson_id, min_lon, max_lon, min_lat, max_lat)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_geojsondata_geometry_update
+    AFTER UPDATE OF geojson_id, geojson_text, feature_type ON GeoJSONData
+    WHEN OLD.geojson_id IS NOT NEW.geojson_id OR OLD.geojson_text IS NOT NEW.geojson_text
+         OR OLD.feature_type IS NOT NEW.feature_type
+    BEGIN
+        DELETE FROM {GEOMETRY_TABLE} WHERE geojson_id = OLD.geojson_id;
+        DELETE FROM {RTREE_TABLE} WHERE geojson_id = OLD.geojson_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_geojsondata_geometry_delete
+    AFTER DELETE ON GeoJSONData
+    BEGIN
+        DELETE FROM {GEOMETRY_TABLE} WHERE geojson_id = OLD.geojson_id;
+        DELETE FROM {RTREE_TABLE} WHERE geojson_id = OLD.geojson_id;
+    END
+    """,
+]
+
+# Metric columns of GeoJSONGeometry, added to databases created before they existed
+METRIC_COLUMNS = ["area_acres", "perimeter_m", "centroid_lon", "centroid_lat"]
+
+METRIC_INDEXES = [
+    ("idx_geojsongeometry_area_acres", "area_acres"),
+    ("idx_geojsongeometry_centroid", "centroid_lon, centroid_lat"),
+]
+
+GEOMETRY_TYPES = ("POINT", "LINE", "POLYGON")
+
+# Mean earth radius (m) and square metres per acre
+EARTH_RADIUS_M = 6371008.8
+SQUARE_METRES_PER_ACRE = 4046.8564224
+
+# GeoJSON geometry type -> our geometry type
+_GEOJSON_TYPES = {"Point": "POINT", "LineString": "LINE", "Polygon": "POLYGON"}
+
+
+# -------------------------------
+# PARSING
+# -------------------------------
+
+def parse_coordinates(text):
+    """
+    Parse map data as stored in GeoJSONData.geojson_text.
+
+    Args:
+        text (str): "lon,lat,lon,lat,..." (commas and/or whitespace between
+            numbers), or a GeoJSON Point, LineString or Polygon, bare or as
+            a Feature.
+
+    Returns:
+        tuple: (points, geojson_type) where points is a list of (lon, lat)
+            floats and geojson_type is "POINT", "LINE" or "POLYGON" for GeoJSON
+            input, None for a bare coordinate list.
+
+    Raises:
+        ValueError: If the text is empty, not numeric, has an odd number of
+            values or a coordinate out of range.
+    """
+    text = (text or "").strip()
+    if not text:
+        raise ValueError("No coordinates")
+
+    geojson_type = None
+    if text.startswith("{"):
+        try:
+            geometry = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid GeoJSON: {e}")
+        if not isinstance(geometry, dict):
+            raise ValueError("GeoJSON must be a geometry or Feature object")
+        geometry = geometry.get("geometry") or geometry
+        geojson_type = _GEOJSON_TYPES.get(geometry.get("type"))
+        if geojson_type is None:
+            raise ValueError(f"Unsupported geometry type: {geometry.get('type')}")
+        coordinates = geometry.get("coordinates") or []
+        if geojson_type == "POINT":
+            coordinates = [coordinates]
+        elif geojson_type == "POLYGON":
+            coordinates = coordinates[0] if coordinates else []  # Outer ring
+        try:
+            values = [float(value) for position in coordinates for value in position[:2]]
+        except (TypeError, ValueError):
+            raise ValueError("Invalid GeoJSON coordinates")
+    else:
+        try:
+            values = [float(value) for value in re.split(r"[,\s]+", text) if value]
+        except ValueError:
+            raise ValueError("Coordinates must be numbers")
+
+    if not values or len(values) % 2:
+        raise ValueError("Coordinates must be longitude,latitude pairs")
+
+    points = list(zip(values[0::2], values[1::2]))
+    for lon, lat in points:
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ValueError(f"Coordinate out of range: {lon},{lat}")
+    return points, geojson_type
+
+
+def classify_geometry(points, feature_type=None):
+    """
+    Decide whether points form a POINT, LINE or POLYGON.
+
+    GeoJSONData.feature_type wins when set; otherwise one point is a POINT,
+    two are a LINE and three or more (the add form's minimum) a POLYGON.
+    """
+    feature_type = (feature_type or "").strip().upper()
+    if feature_type in GEOMETRY_TYPES:
+        return feature_type
+    if len(points) == 1:
+        return "POINT"
+    if len(points) == 2:
+        return "LINE"
+    return "POLYGON"
+
+
+def pack_coordinates(points):
+    """Pack (lon, lat) pairs as float64 lon,lat,lon,lat,... bytes."""
+    return array("d", [value for point in points for value in point]).tobytes()
+
+
+def unpack_coordinates(blob):
+    """Unpack bytes from pack_coordinates into a list of (lon, lat) pairs."""
+    values = array("d")
+    values.frombytes(blob or b"")
+    return list(zip(values[0::2], values[1::2]))
+
+
+def bounding_box(points):
+    """Return (min_lon, max_lon, min_lat, max_lat) of the points."""
+    lons = [lon for lon, _ in points]
+    lats = [lat for _, lat in points]
+    return min(lons), max(lons), min(lats), max(lats)
+
+
+def point_in_polygon(lon, lat, ring):
+    """
+    Ray-casting test of a point against a polygon ring (closed or not).
+
+    Returns:
+        bool: True if the point is inside the ring.
+    """
+    inside = False
+    count = len(ring)
+    for index in range(count):
+        x1, y1 = ring[index]
+        x2, y2 = ring[(index + 1) % count]
+        if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def to_geojson_geometry(geometry_type, points):
+    """
+    Build a GeoJSON geometry dict from stored geometry.
+
+    Args:
+        geometry_type (str): "POINT", "LINE" or "POLYGON".
+        points (list): (lon, lat) pairs.
+
+    Returns:
+        dict: A GeoJSON Point, LineString or Polygon (ring closed).
+    """
+    positions = [[lon, lat] for lon, lat in points]
+    if geometry_type == "POINT":
+        return {"type": "Point", "coordinates": positions[0]}
+    if geometry_type == "LINE":
+        return {"type": "LineString", "coordinates": positions}
+    if positions[0] != positions[-1]:
+        positions.append(positions[0])
+    return {"type": "Polygon", "coordinates": [positions]}
+
+
+# -------------------------------
+# METRICS
+# -------------------------------
+
+def geodesic_area_acres(ring):
+    """
+    Area of a polygon ring on the sphere, in acres.
+
+    Uses the spherical excess sum of Chamberlain and Duquette, "Some
+    Algorithms for Polygons on a Sphere" (2007); for parcels the error
+    against the ellipsoid is well under one percent.
+    """
+    total = 0.0
+    count = len(ring)
+    for index in range(count):
+        lon1, lat1 = ring[index]
+        lon2, lat2 = ring[(index + 1) % count]
+        total += math.radians(lon2 - lon1) * (2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2)))
+    return abs(total) * EARTH_RADIUS_M ** 2 / 2 / SQUARE_METRES_PER_ACRE
+
+
+def haversine_m(start, end):
+    """Great-circle distance between two (lon, lat) points, in metres."""
+    lon1, lat1, lon2, lat2 = map(math.radians, (*start, *end))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def path_length_m(points, closed=False):
+    """Length of a line, or perimeter of a ring when closed, in metres."""
+    length = sum(haversine_m(points[index], points[index + 1]) for index in range(len(points) - 1))
+    if closed and len(points) > 2 and points[0] != points[-1]:
+        length += haversine_m(points[-1], points[0])
+    return length
+
+
+def centroid(geometry_type, points):
+    """
+    Centroid of a geometry as (lon, lat).
+
+    Polygons use the area-weighted centroid of the ring in degrees (accurate
+    at parcel scale); lines and degenerate polygons use the mean vertex.
+    """
+    if geometry_type == "POLYGON":
+        ring = points[:-1] if len(points) > 3 and points[0] == points[-1] else points
+        twice_area = cx = cy = 0.0
+        for index in range(len(ring)):
+            x1, y1 = ring[index]
+            x2, y2 = ring[(index + 1) % len(ring)]
+            cross = x1 * y2 - x2 * y1
+            twice_area += cross
+            cx += (x1 + x2) * cross
+            cy += (y1 + y2) * cross
+        if twice_area:
+            return cx / (3 * twice_area), cy / (3 * twice_area)
+    return sum(lon for lon, _ in points) / len(points), sum(lat for _, lat in points) / len(points)
+
+
+def parcel_metrics(geometry_type, points):
+    """
+    Metrics of a geometry.
+
+    Returns:
+        tuple: (area_acres, perimeter_m, centroid_lon, centroid_lat); area is
+            None except for polygons, perimeter is the length of a line and
+            None for a point.
+    """
+    if geometry_type == "POLYGON":
+        area, perimeter = geodesic_area_acres(points), path_length_m(points, closed=True)
+    elif geometry_type == "LINE":
+        area, perimeter = None, path_length_m(points)
+    else:
+        area, perimeter = None, None
+    return (area, perimeter, *centroid(geometry_type, points))
+
+
+# -------------------------------
+# STORAGE
+# -------------------------------
+
+def create_geometry_tables(cursor):
+    """Create GeoJSONGeometry, the GeoJSONRTree index and the GeoJSONData triggers."""
+    for statement in GEOMETRY_SCHEMA:
+        cursor.execute(statement)
+
+    cursor.execute(f"PRAGMA table_info({GEOMETRY_TABLE})")
+    existing = [row[1] for row in cursor.fetchall()]
+    for column in METRIC_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {GEOMETRY_TABLE} ADD COLUMN {column} REAL")
+    for index_name, columns in METRIC_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {GEOMETRY_TABLE} ({columns})")
+
+
+def has_geometry_tables(cursor):
+    """Return True if GeoJSONGeometry exists in this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (GEOMETRY_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def _geometry_rows(geojson_id, text, feature_type):
+    """(geometry row, rtree row or None) for one GeoJSONData row."""
+    try:
+        points, geojson_type = parse_coordinates(text)
+    except ValueError:
+        # Kept as an empty geometry so it is not parsed again until the text changes
+        return (geojson_id, None, 0, b"", None, None, None, None), None
+    geometry_type = classify_geometry(points, feature_type or geojson_type)
+    return (
+        (geojson_id, geometry_type, len(points), pack_coordinates(points), *parcel_metrics(geometry_type, points)),
+        (geojson_id, *bounding_box(points)),
+    )
+
+
+def _store_geometry_rows(cursor, geometry_rows, rtree_rows):
+    cursor.executemany(f"""
+        INSERT OR REPLACE INTO {GEOMETRY_TABLE}
+            (geojson_id, geometry_type, point_count, coordinates, {', '.join(METRIC_COLUMNS)})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, geometry_rows)
+    cursor.executemany(f"DELETE FROM {RTREE_TABLE} WHERE geojson_id = ?", [(row[0],) for row in geometry_rows])
+    cursor.executemany(f"INSERT INTO {RTREE_TABLE} VALUES (?, ?, ?, ?, ?)", rtree_rows)
+
+
+def update_geometry(cursor, geojson_id):
+    """
+    Re-parse one GeoJSONData row; call after saving its map data.
+
+    Args:
+        cursor: SQLite cursor object.
+        geojson_id (int): GeoJSONData.geojson_id of the row saved.
+    """
+    if not has_geometry_tables(cursor):
+        return
+
+    cursor.execute("SELECT geojson_text, feature_type FROM GeoJSONData WHERE geojson_id = ?", (geojson_id,))
+    record = cursor.fetchone()
+    if record is None:
+        cursor.execute(f"DELETE FROM {GEOMETRY_TABLE} WHERE geojson_id = ?", (geojson_id,))
+        cursor.execute(f"DELETE FROM {RTREE_TABLE} WHERE geojson_id = ?", (geojson_id,))
+        return
+
+    geometry_row, rtree_row = _geometry_rows(geojson_id, *record)
+    _store_geometry_rows(cursor, [geometry_row], [rtree_row] if rtree_row else [])
+
+
+def refresh_geometry(cursor):
+    """
+    Parse every GeoJSONData row that has no geometry (new rows, or text changed elsewhere).
+
+    Returns:
+        int: Number of rows parsed.
+    """
+    if not has_geometry_tables(cursor):
+        return 0
+
+    cursor.execute(f"""
+        SELECT d.geojson_id, d.geojson_text, d.feature_type FROM GeoJSONData d
+        WHERE NOT EXISTS (SELECT 1 FROM {GEOMETRY_TABLE} g WHERE g.geojson_id = d.geojson_id)
+    """)
+    records = cursor.fetchall()
+
+    geometry_rows, rtree_rows = [], []
+    for record in records:
+        geometry_row, rtree_row = _geometry_rows(*record)
+        geometry_rows.append(geometry_row)
+        if rtree_row:
+            rtree_rows.append(rtree_row)
+    _store_geometry_rows(cursor, geometry_rows, rtree_rows)
+    return len(records)
+
+
+def backfill_metrics(cursor):
+    """
+    Recompute the metrics of every stored geometry from its packed points.
+
+    Returns:
+        int: Number of geometries measured.
+    """
+    if not has_geometry_tables(cursor):
+        return 0
+
+    cursor.execute(f"SELECT geojson_id, geometry_type, coordinates FROM {GEOMETRY_TABLE} WHERE point_count > 0")
+    rows = [
+        (*parcel_metrics(geometry_type, unpack_coordinates(coordinates)), geojson_id)
+        for geojson_id, geometry_type, coordinates in cursor.fetchall()
+    ]
+    cursor.executemany(f"""
+        UPDATE {GEOMETRY_TABLE} SET {', '.join(f'{column} = ?' for column in METRIC_COLUMNS)}
+        WHERE geojson_id = ?
+    """, rows)
+    return len(rows)
+
+
+def get_geometry(cursor, geojson_id):
+    """
+    Get the parsed geometry of one GeoJSONData row.
+
+    Returns:
+        dict: None if the row has no usable geometry, else "geojson_id",
+            "geometry_type", "points" (list of (lon, lat)), "bbox"
+            (min_lon, max_lon, min_lat, max_lat), "area_acres", "perimeter_m"
+            and "centroid" (lon, lat).
+    """
+    if not has_geometry_tables(cursor):
+        return None
+    cursor.execute(f"SELECT geojson_id FROM {GEOMETRY_TABLE} WHERE geojson_id = ?", (geojson_id,))
+    if cursor.fetchone() is None:
+        refresh_before_read(cursor, update_geometry, geojson_id)
+
+    cursor.execute(f"""
+        SELECT g.geometry_type, g.coordinates, r.min_lon, r.max_lon, r.min_lat, r.max_lat,
+               g.area_acres, g.perimeter_m, g.centroid_lon, g.centroid_lat
+        FROM {GEOMETRY_TABLE} g
+        JOIN {RTREE_TABLE} r ON r.geojson_id = g.geojson_id
+        WHERE g.geojson_id = ?
+    """, (geojson_id,))
+    record = cursor.fetchone()
+    if record is None:
+        return None
+    return {
+        "geojson_id": geojson_id,
+        "geometry_type": record[0],
+        "points": unpack_coordinates(record[1]),
+        "bbox": tuple(record[2:6]),
+        "area_acres": record[6],
+        "perimeter_m": record[7],
+        "centroid": (record[8], record[9]),
+    }
+
+
+# -------------------------------
+# SPATIAL QUERIES
+# -------------------------------
+
+# Linked records of each geometry whose box overlaps ?min_lon..?max_lon, ?min_lat..?max_lat
+_BBOX_QUERY = f"""
+    SELECT r.geojson_id, g.geometry_type, g.coordinates,
+           gl.record_type, gl.record_id, gl.legal_description_id
+    FROM {RTREE_TABLE} r
+    JOIN {GEOMETRY_TABLE} g ON g.geojson_id = r.geojson_id
+    LEFT JOIN GeoJSONLink gl ON gl.geojson_id = r.geojson_id
+    WHERE r.max_lon >= ? AND r.min_lon <= ? AND r.max_lat >= ? AND r.min_lat <= ?
+    ORDER BY r.geojson_id
+"""
+
+
+def ensure_geometry(cursor):
+    """Parse any GeoJSONData rows without geometry before a spatial query."""
+    refresh_before_read(cursor, refresh_geometry)
+
+
+def _match(record):
+    return {
+        "geojson_id": record[0],
+        "geometry_type": record[1],
+        "record_type": record[3],
+        "record_id": record[4],
+        "legal_description_id": record[5],
+    }
+
+
+def features_in_bbox(cursor, min_lon, min_lat, max_lon, max_lat):
+    """
+    Find the map features whose bounding box overlaps an area.
+
+    Args:
+        cursor: SQLite cursor object.
+        min_lon, min_lat, max_lon, max_lat (float): The area.
+
+    Returns:
+        list: One dict per linked record ("geojson_id", "geometry_type",
+            "record_type", "record_id", "legal_description_id"); a feature
+            with no GeoJSONLink row is listed once with None for the record.
+    """
+    if not has_geometry_tables(cursor):
+        return []
+    ensure_geometry(cursor)
+    cursor.execute(_BBOX_QUERY, (min_lon, max_lon, min_lat, max_lat))
+    return [_match(record) for record in cursor.fetchall()]
+
+
+def parcels_containing_point(cursor, lon, lat):
+    """
+    Find the polygons (parcels) a point falls inside.
+
+    Args:
+        cursor: SQLite cursor object.
+        lon, lat (float): The point.
+
+    Returns:
+        list: Same dicts as features_in_bbox, polygons only.
+    """
+    if not has_geometry_tables(cursor):
+        return []
+    ensure_geometry(cursor)
+    cursor.execute(_BBOX_QUERY, (lon, lon, lat, lat))
+
+    matches = []
+    inside = {}
+    for record in cursor.fetchall():
+        if record[1] != "POLYGON":
+            continue
+        geojson_id = record[0]
+        if geojson_id not in inside:
+            inside[geojson_id] = point_in_polygon(lon, lat, unpack_coordinates(record[2]))
+        if inside[geojson_id]:
+            matches.append(_match(record))
+    return matches
@@ -0,0 +1,156 @@
+# people_grid.py
+#
+# Query helpers for the People grid on the main menu.  The grid used to run a
+# Photos lookup and a Marriages lookup for every row it displayed; the query
+# below returns both values in the same result set so a search is a single
+# round trip no matter how many people match.
+
+CAMERA_SYMBOL = '\U0001F4F7'
+
+PEOPLE_GRID_QUERY = """
+    SELECT p.*,
+           EXISTS (
+               SELECT 1 FROM Photos ph WHERE ph.person_id = p.id
+           ) AS grid_has_photo,
+           (
+               SELECT CASE WHEN m.person1_id = p.id THEN m.person2_id ELSE m.person1_id END
+               FROM Marriages m
+               WHERE m.person1_id = p.id OR m.person2_id = p.id
+               LIMIT 1
+           ) AS grid_spouse_id
+    FROM People p
+"""
+
+
+def build_people_grid_query(where_clause="", order_by=None):
+    """
+    Build the People grid query with an optional filter and sort.
+
+    Args:
+        where_clause (str): SQL condition on People columns (without WHERE).
+        order_by (str): Optional ORDER BY expression, e.g. '"last_name" ASC'.
+
+    Returns:
+        str: The complete SQL statement.
+    """
+    query = PEOPLE_GRID_QUERY
+    if where_clause:
+        query += f" WHERE {where_clause}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query
+
+
+def fetch_people_grid(cursor, where_clause="", parameters=(), order_by=None):
+    """
+    Fetch People rows together with the has-photo flag and first spouse id.
+
+    Args:
+        cursor: SQLite cursor object.
+        where_clause (str): SQL condition on People columns (without WHERE).
+        parameters: Parameters for the where clause.
+        order_by (str): Optional ORDER BY expression.
+
+    Returns:
+        list: Rows of People columns followed by has_photo and spouse_id.
+    """
+    cursor.execute(build_people_grid_query(where_clause, order_by), parameters)
+    return cursor.fetchall()
+
+
+def format_people_grid_row(record):
+    """
+    Convert a People grid row into the values shown in the main menu tree.
+
+    Args:
+        record (tuple): A row returned by the People grid query.
+
+    Returns:
+        list: Display values - image symbol, ID, People columns, spouse ID.
+    """
+    person = record[:-2]
+    has_photo, spouse_id = record[-2], record[-1]
+
+    image_symbol = CAMERA_SYMBOL if has_photo else ""
+    spouse_id_display = spouse_id if spouse_id is not None else ""
+
+    return [image_symbol, person[0]] + list(person[1:-1]) + [spouse_id_display]
+
+
+class PeopleGridPager:
+    """
+    Keyset pagination over the People grid query.
+
+    Pages are fetched by seeking past the sort key of the last row already
+    shown (or before the first one), so each page costs the same no matter how
+    far the user has scrolled.  A page_size of None fetches every row at once.
+    """
+
+    def __init__(self, cursor, page_size=200):
+        self.cursor = cursor
+        self.page_size = page_size
+        self.reset()
+
+    def reset(self, where_clause="", parameters=(), sort_column=None, ascending=True):
+        """Start a new result set with the given filter and sort."""
+        self.where_clause = where_clause
+        self.parameters = list(parameters)
+        self.sort_column = sort_column
+        self.ascending = ascending
+
+    def _key_expressions(self):
+        # NULLs sort first, so the key leads with an IS NOT NULL flag and
+        # compares IFNULL(col, '') to keep the row-value seek well defined.
+        if not self.sort_column or self.sort_column == "id":
+            return ["p.id"]
+        sort_expr = f'p."{self.sort_column}"'
+        return [f"{sort_expr} IS NOT NULL", f"IFNULL({sort_expr}, '')", "p.id"]
+
+    def row_key(self, record, description):
+        """Return the seek key for a row fetched by this pager."""
+        if not self.sort_column or self.sort_column == "id":
+            return (record[0],)
+        columns = [col[0] for col in description]
+        value = record[columns.index(self.sort_column)]
+        return (int(value is not None), value if value is not None else "", record[0])
+
+    def _fetch(self, seek_key=None, forward=True):
+        key_exprs = self._key_expressions()
+        descending = self.ascending != forward
+        direction = "DESC" if descending else "ASC"
+
+        conditions = []
+        parameters = list(self.parameters)
+        if self.where_clause:
+            conditions.append(f"({self.where_clause})")
+        if seek_key is not None:
+            comparator = "<" if descending else ">"
+            conditions.append(f"({', '.join(key_exprs)}) {comparator} ({', '.join('?' for _ in key_exprs)})")
+            parameters.extend(seek_key)
+
+        query = build_people_grid_query(
+            " AND ".join(conditions),
+            ", ".join(f"{expr} {direction}" for expr in key_exprs)
+        )
+        if self.page_size:
+            query += f" LIMIT {int(self.page_size)}"
+
+        self.cursor.execute(query, parameters)
+        records = self.cursor.fetchall()
+        description = self.cursor.description
+        rows = [(self.row_key(record, description), record) for record in records]
+        if not forward:
+            rows.reverse()
+        return rows
+
+    def first_page(self):
+        """Fetch the first page as a list of (key, record) pairs."""
+        return self._fetch()
+
+    def page_after(self, key):
+        """Fetch the page that follows the row with the given key."""
+        return self._fetch(key, forward=True)
+
+    def page_before(self, key):
+        """Fetch the page that precedes the row with the given key."""
+        return self._fetch(key, forward=False)
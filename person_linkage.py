@@ -1,37 +1,36 @@
 # person_linkage.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
+from db_utils import get_connection
+from name_search import search_people
+from background_search import BackgroundSearch
 
-connection = sqlite3.connect('phoenix.db')
-cursor = connection.cursor()
+PERSON_COLUMNS = ("id", "first_name", "middle_name", "last_name", "married_name", "birth_date", "death_date")
+
+
+def run_person_search(cursor, fname, mname, lname, sounds_like):
+    """Ranked name search for person_search_popup; runs on the search worker thread."""
+    return search_people(cursor, PERSON_COLUMNS, sounds_like=sounds_like,
+                         first_name=fname, middle_name=mname, last_name=lname)
 
 
 def person_search_popup(callback):
+    def search_args():
+        return (fname_var.get().strip(), mname_var.get().strip(), lname_var.get().strip(), sounds_like_var.get())
+
     def search():
-        fname = fname_var.get().strip()
-        mname = mname_var.get().strip()
-        lname = lname_var.get().strip()
-
-        query = """
-        SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date
-        FROM People
-        WHERE 1=1
-        """
-        params = []
-        if fname:
-            query += " AND first_name LIKE ?"
-            params.append(f"%{fname}%")
-        if mname:
-            query += " AND middle_name LIKE ?"
-            params.append(f"%{mname}%")
-        if lname:
-            query += " AND (last_name LIKE ? OR married_name LIKE ?)"
-            params.extend([f"%{lname}%", f"%{lname}%"])
+        search_job.run_now(*search_args())
 
-        tree.delete(*tree.get_children())
-        for row in cursor.execute(query, params):
+    def search_as_you_type(*_):
+        args = search_args()
+        if any(args[:3]):
+            search_job.schedule(*args)
+
+    def show_rows(rows, first):
+        if first:
+            tree.delete(*tree.get_children())
+        for row in rows:
             tree.insert("", "end", values=row)
 
     def select_person():
@@ -50,6 +49,7 @@ def person_search_popup(callback):
     fname_var = tk.StringVar()
     mname_var = tk.StringVar()
     lname_var = tk.StringVar()
+    sounds_like_var = tk.BooleanVar(value=False)
 
     form = ttk.Frame(popup)
     form.pack(padx=10, pady=5, fill="x")
@@ -65,6 +65,7 @@ def person_search_popup(callback):
 
     ttk.Button(form, text="Search", command=search).grid(row=0, column=6, padx=10)
     ttk.Button(form, text="Cancel", command=cancel).grid(row=0, column=7)
+    ttk.Checkbutton(form, text="Sounds like", variable=sounds_like_var).grid(row=1, column=1, sticky="w", padx=5)
 
     tree = ttk.Treeview(popup, columns=("ID", "First", "Middle", "Last", "Married", "Birth", "Death"), show="headings")
     for col in tree["columns"]:
@@ -75,12 +76,17 @@ def person_search_popup(callback):
     tree.bind("<Double-1>", lambda e: select_person())
     ttk.Button(popup, text="Select", command=select_person).pack(pady=5)
 
+    # Search as the user types; the query runs off the Tk thread
+    search_job = BackgroundSearch(popup, run_person_search, show_rows)
+    for var in (fname_var, mname_var, lname_var, sounds_like_var):
+        var.trace_add("write", search_as_you_type)
+
     popup.grab_set()
     popup.focus_set()
     popup.wait_window()
 
 
-def create_person_search_panel(parent, search_vars, on_search, on_reset):
+def create_person_search_panel(parent, search_vars, on_search, on_reset, sounds_like_var=None):
     search_frame = ttk.Frame(parent)
 
     # First line: Name fields
@@ -100,10 +106,15 @@ def create_person_search_panel(parent, search_vars, on_search, on_reset):
     button_frame.grid(row=2, column=0, columnspan=6, pady=8, sticky='w')
     ttk.Button(button_frame, text="Search", command=on_search).pack(side="left", padx=5)
     ttk.Button(button_frame, text="Reset", command=on_reset).pack(side="left", padx=5)
+    if sounds_like_var is not None:
+        ttk.Checkbutton(button_frame, text="Sounds like", variable=sounds_like_var).pack(side="left", padx=5)
 
     return search_frame
 
 def open_person_linkage_popup(parent_id, role="child", refresh_callback=None):
+    connection = get_connection()
+    cursor = connection.cursor()
+
     window = tk.Toplevel()
     window.title(f"Add or Link {role.title()}")
     window.geometry("1000x600")
@@ -115,6 +126,7 @@ def open_person_linkage_popup(parent_id, role="child", refresh_callback=None):
         'birth_date': tk.StringVar(),
         'death_date': tk.StringVar()
     }
+    sounds_like_var = tk.BooleanVar(value=False)
 
     # Setup frames
     search_frame = ttk.Frame(window)
@@ -135,11 +147,11 @@ def open_person_linkage_popup(parent_id, role="child", refresh_callback=None):
             var.set("")
         refresh_tree(use_full_database=False)
 
-    search_panel = create_person_search_panel(search_frame, search_vars, apply_filters, reset_filters)
+    search_panel = create_person_search_panel(search_frame, search_vars, apply_filters, reset_filters, sounds_like_var)
     search_panel.pack()
 
     # Treeview
-    columns = ("id", "first_name", "middle_name", "last_name", "married_name", "birth_date", "death_date")
+    columns = PERSON_COLUMNS
     tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
     for col in columns:
         tree.heading(col, text=col.replace('_', ' ').title())
@@ -166,23 +178,22 @@ def open_person_linkage_popup(parent_id, role="child", refresh_callback=None):
         tree.delete(*tree.get_children())
         filters = {k: v.get().strip() for k, v in search_vars.items() if v.get().strip()}
 
-        query = "SELECT id, first_name, middle_name, last_name, married_name, birth_date, death_date FROM People WHERE 1=1"
+        conditions = []
         params = []
 
         if not use_full_database:
-            query += " AND (last_name = (SELECT last_name FROM People WHERE id = ?))"
+            conditions.append("p.last_name = (SELECT last_name FROM People WHERE id = ?)")
             params.append(parent_id)
 
-        for k, v in filters.items():
-            if k == 'last_name':
-                query += " AND (last_name LIKE ? OR married_name LIKE ?)"
-                params.extend([f"%{v}%", f"%{v}%"])
-            else:
-                query += f" AND {k} LIKE ?"
-                params.append(f"%{v}%")
+        for k in ('birth_date', 'death_date'):
+            if k in filters:
+                conditions.append(f"p.{k} LIKE ?")
+                params.append(f"%{filters[k]}%")
 
-        cursor.execute(query, tuple(params))
-        results = cursor.fetchall()
+        # Names go through the full-text index, best match first
+        names = {k: filters[k] for k in ('first_name', 'middle_name', 'last_name') if k in filters}
+        results = search_people(cursor, columns, " AND ".join(conditions), params,
+                                sounds_like=sounds_like_var.get(), **names)
 
         def extract_year(date_str):
             try:
@@ -190,8 +201,9 @@ def open_person_linkage_popup(parent_id, role="child", refresh_callback=None):
             except:
                 return 9999
 
-        # Sort results by birth year
-        results.sort(key=lambda r: extract_year(r[5] or "9999"))
+        # Sort results by birth year unless they are ranked by name match
+        if not names:
+            results.sort(key=lambda r: extract_year(r[5] or "9999"))
 
         for row in results:
             item = tree.insert('', 'end', values=row)
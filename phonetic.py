@@ -0,0 +1,519 @@
+# phonetic.py
+#
+# Phonetic name codes for "sounds like" searches.
+#
+# Historical records spell the same name many ways (Schmidt, Smith, Smyth), so
+# each word of a person's first, last and married name is reduced to its
+# Soundex, Metaphone and NYSIIS codes and stored in PeoplePhonetic, indexed by
+# (algorithm, code).  A sounds-like search codes what the user typed and looks
+# the codes up, so nothing is computed per row at query time.
+#
+# Codes are computed when a person is saved (update_phonetic_codes).  The
+# People triggers created by migration 4 discard codes whose names changed, so
+# a row written by another tool never keeps stale codes, and those added by
+# migration 12 log such rows in PeoplePhoneticLog; the next save or
+# sounds-like search codes everyone logged (sync_phonetic_codes), so a search
+# only writes when something was changed outside the app.
+# A person with no codable name gets a single row with an empty name_field,
+# algorithm and code, so they are not coded again.
+# Names are folded to ASCII letters first (fold_name), so Müller codes like
+# Muller and O'Brien like OBrien; migration 14 re-coded rows made before that.
+
+import re
+import unicodedata
+
+from db_utils import refresh_before_read
+
+PHONETIC_TABLE = "PeoplePhonetic"
+PHONETIC_LOG_TABLE = "PeoplePhoneticLog"
+
+# People column -> name_field stored in PeoplePhonetic
+PHONETIC_NAME_FIELDS = {
+    "first_name": "first",
+    "last_name": "last",
+    "married_name": "married",
+}
+
+# Algorithm used by the "Sounds like" search boxes
+SOUNDS_LIKE_ALGORITHM = "soundex"
+
+# Search box -> name fields whose codes it matches
+SOUNDS_LIKE_FIELDS = {
+    "first_name": ("first",),
+    "last_name": ("last", "married"),
+}
+
+PHONETIC_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {PHONETIC_TABLE} (
+        person_id INTEGER NOT NULL,
+        name_field TEXT NOT NULL,
+        algorithm TEXT NOT NULL,
+        code TEXT NOT NULL,
+        PRIMARY KEY (person_id, name_field, algorithm, code)
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_peoplephonetic_code ON {PHONETIC_TABLE} (algorithm, code, name_field)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_phonetic_update
+    AFTER UPDATE OF id, {', '.join(PHONETIC_NAME_FIELDS)} ON People
+    BEGIN
+        DELETE FROM {PHONETIC_TABLE} WHERE person_id = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_phonetic_delete
+    AFTER DELETE ON People
+    BEGIN
+        DELETE FROM {PHONETIC_TABLE} WHERE person_id = OLD.id;
+    END
+    """,
+]
+
+# People whose names were written without coding them, for sync_phonetic_codes()
+PHONETIC_LOG_SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS {PHONETIC_LOG_TABLE} (person_id INTEGER PRIMARY KEY)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_phonetic_log_insert
+    AFTER INSERT ON People
+    BEGIN
+        INSERT OR IGNORE INTO {PHONETIC_LOG_TABLE} (person_id) VALUES (NEW.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_phonetic_log_update
+    AFTER UPDATE OF id, {', '.join(PHONETIC_NAME_FIELDS)} ON People
+    BEGIN
+        INSERT OR IGNORE INTO {PHONETIC_LOG_TABLE} (person_id) VALUES (NEW.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_people_phonetic_log_delete
+    AFTER DELETE ON People
+    BEGIN
+        DELETE FROM {PHONETIC_LOG_TABLE} WHERE person_id = OLD.id;
+    END
+    """,
+]
+
+
+# -------------------------------
+# ALGORITHMS
+# -------------------------------
+
+_SOUNDEX_CODES = {}
+for _letters, _digit in (("BFPV", "1"), ("CGJKQSXZ", "2"), ("DT", "3"), ("L", "4"), ("MN", "5"), ("R", "6")):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _digit
+
+VOWELS = "AEIOU"
+
+# Letters that do not decompose into a base letter and an accent
+_FOLDED_LETTERS = str.maketrans({
+    "ß": "ss", "ẞ": "SS", "Æ": "AE", "æ": "ae", "Œ": "OE", "œ": "oe",
+    "Ø": "O", "ø": "o", "Ł": "L", "ł": "l", "Đ": "D", "đ": "d", "Þ": "TH", "þ": "th",
+})
+
+# Apostrophes inside a name (O'Brien, D’Arcy) join its parts into one word
+_APOSTROPHES = re.compile(r"['’ʼ`´]")
+
+
+def fold_name(name):
+    """
+    Reduce a name to plain ASCII letters before coding or comparing it.
+
+    Accents are dropped ("Müller" -> "Muller"), ß and ligatures are spelled
+    out and apostrophes removed ("O'Brien" -> "OBrien"); other characters
+    are left for the caller to split on.
+    """
+    name = _APOSTROPHES.sub("", str(name or "")).translate(_FOLDED_LETTERS)
+    return "".join(char for char in unicodedata.normalize("NFKD", name) if not unicodedata.combining(char))
+
+
+def _letters_only(name):
+    return re.sub(r"[^A-Z]", "", fold_name(name).upper())
+
+
+def soundex(name):
+    """
+    American Soundex, as used by the census Soundex indexes.
+
+    Returns:
+        str: A letter and three digits (e.g. "S530"), or "" for a name with no letters.
+    """
+    name = _letters_only(name)
+    if not name:
+        return ""
+
+    code = name[0]
+    last_digit = _SOUNDEX_CODES.get(name[0], "")
+    for letter in name[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != last_digit:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code; vowels do
+        if letter not in "HW":
+            last_digit = digit
+    return code.ljust(4, "0")
+
+
+def metaphone(name):
+    """
+    Original Metaphone (Lawrence Philips, 1990).
+
+    Returns:
+        str: The Metaphone key ("0" stands for "th"), or "" for a name with no letters.
+    """
+    word = _letters_only(name)
+    if not word:
+        return ""
+
+    # Initial letter exceptions
+    if word[:2] in ("AE", "GN", "KN", "PN", "WR"):
+        word = word[1:]
+    elif word[0] == "X":
+        word = "S" + word[1:]
+    elif word[:2] == "WH":
+        word = "W" + word[2:]
+
+    def at(index):
+        return word[index] if 0 <= index < len(word) else ""
+
+    key = []
+    for i, letter in enumerate(word):
+        previous, following = at(i - 1), at(i + 1)
+
+        # Doubled letters count once, except C
+        if letter == previous and letter != "C":
+            continue
+
+        if letter in VOWELS:
+            if i == 0:
+                key.append(letter)
+        elif letter == "B":
+            if not (previous == "M" and i == len(word) - 1):
+                key.append("B")
+        elif letter == "C":
+            if following == "I" and at(i + 2) == "A":
+                key.append("X")
+            elif following == "H":
+                key.append("K" if previous == "S" else "X")
+            elif following in ("I", "E", "Y"):
+                if previous != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif letter == "D":
+            if following == "G" and at(i + 2) in ("E", "I", "Y"):
+                key.append("J")
+            else:
+                key.append("T")
+        elif letter == "G":
+            if following == "H" and not (i + 2 >= len(word) or at(i + 2) in VOWELS):
+                continue
+            if following == "N" and (i + 2 == len(word) or word[i + 1:] == "NED"):
+                continue
+            if following in ("I", "E", "Y") and previous != "G":
+                key.append("J")
+            else:
+                key.append("K")
+        elif letter == "H":
+            if previous in ("C", "S", "P", "T", "G"):
+                continue
+            if previous in VOWELS and following not in VOWELS:
+                continue
+            key.append("H")
+        elif letter == "K":
+            if previous != "C":
+                key.append("K")
+        elif letter == "P":
+            key.append("F" if following == "H" else "P")
+        elif letter == "Q":
+            key.append("K")
+        elif letter == "S":
+            if following == "H":
+                key.append("X")
+            elif following == "I" and at(i + 2) in ("O", "A"):
+                key.append("X")
+            else:
+                key.append("S")
+        elif letter == "T":
+            if following == "I" and at(i + 2) in ("O", "A"):
+                key.append("X")
+            elif following == "H":
+                key.append("0")
+            elif not (following == "C" and at(i + 2) == "H"):
+                key.append("T")
+        elif letter == "V":
+            key.append("F")
+        elif letter in ("W", "Y"):
+            if following in VOWELS:
+                key.append(letter)
+        elif letter == "X":
+            key.append("KS")
+        elif letter == "Z":
+            key.append("S")
+        else:  # F, J, L, M, N, R
+            key.append(letter)
+
+    return "".join(key)
+
+
+def nysiis(name, max_length=6):
+    """
+    New York State Identification and Intelligence System code.
+
+    Args:
+        name (str): Name to code.
+        max_length (int): Truncate the code to this length (6 in the original), or None.
+
+    Returns:
+        str: The NYSIIS code, or "" for a name with no letters.
+    """
+    word = _letters_only(name)
+    if not word:
+        return ""
+
+    for prefix, replacement in (("MAC", "MCC"), ("KN", "NN"), ("K", "C"), ("PH", "FF"), ("PF", "FF"), ("SCH", "SSS")):
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix):]
+            break
+    for suffix, replacement in (("EE", "Y"), ("IE", "Y"), ("DT", "D"), ("RT", "D"), ("RD", "D"), ("NT", "D"), ("ND", "D")):
+        if word.endswith(suffix):
+            word = word[:-len(suffix)] + replacement
+            break
+
+    key = word[0]
+    chars = list(word)
+    i = 1
+    while i < len(chars):
+        letter = chars[i]
+        if letter == "E" and i + 1 < len(chars) and chars[i + 1] == "V":
+            chars[i:i + 2] = ["A", "F"]
+        elif letter in VOWELS:
+            chars[i] = "A"
+        elif letter == "Q":
+            chars[i] = "G"
+        elif letter == "Z":
+            chars[i] = "S"
+        elif letter == "M":
+            chars[i] = "N"
+        elif letter == "K":
+            if i + 1 < len(chars) and chars[i + 1] == "N":
+                chars[i] = "N"
+            else:
+                chars[i] = "C"
+        elif letter == "S" and chars[i + 1:i + 3] == ["C", "H"]:
+            chars[i:i + 3] = ["S", "S", "S"]
+        elif letter == "P" and i + 1 < len(chars) and chars[i + 1] == "H":
+            chars[i:i + 2] = ["F", "F"]
+        elif letter == "H":
+            following = chars[i + 1] if i + 1 < len(chars) else ""
+            if chars[i - 1] not in VOWELS or (following and following not in VOWELS):
+                chars[i] = chars[i - 1]
+        elif letter == "W" and chars[i - 1] in VOWELS:
+            chars[i] = chars[i - 1]
+
+        if chars[i] != key[-1]:
+            key += chars[i]
+        i += 1
+
+    if len(key) > 1 and key.endswith("S"):
+        key = key[:-1]
+    if key.endswith("AY"):
+        key = key[:-2] + "Y"
+    if len(key) > 1 and key.endswith("A"):
+        key = key[:-1]
+
+    return key[:max_length] if max_length else key
+
+
+PHONETIC_ALGORITHMS = {
+    "soundex": soundex,
+    "metaphone": metaphone,
+    "nysiis": nysiis,
+}
+
+
+def phonetic_codes(name, algorithm):
+    """
+    Code each word of a name.
+
+    Args:
+        name (str): Name, possibly several words (e.g. "Van Buren").
+        algorithm (str): Key of PHONETIC_ALGORITHMS.
+
+    Returns:
+        list: Distinct non-empty codes, in word order.
+    """
+    codes = []
+    for word in re.findall(r"[A-Za-z]+", fold_name(name)):
+        code = PHONETIC_ALGORITHMS[algorithm](word)
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+# -------------------------------
+# STORAGE
+# -------------------------------
+
+def create_phonetic_table(cursor):
+    """Create PeoplePhonetic, its index and the People triggers."""
+    for statement in PHONETIC_SCHEMA:
+        cursor.execute(statement)
+
+
+def create_phonetic_log(cursor):
+    """Create PeoplePhoneticLog and the People triggers that fill it."""
+    for statement in PHONETIC_LOG_SCHEMA:
+        cursor.execute(statement)
+
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def has_phonetic_table(cursor):
+    """Return True if PeoplePhonetic exists in this database."""
+    return _table_exists(cursor, PHONETIC_TABLE)
+
+
+def _phonetic_rows(person_id, names):
+    rows = []
+    for column, name_field in PHONETIC_NAME_FIELDS.items():
+        for algorithm in PHONETIC_ALGORITHMS:
+            for code in phonetic_codes(names.get(column), algorithm):
+                rows.append((person_id, name_field, algorithm, code))
+    # Nothing codable: one empty row marks the person as coded
+    return rows or [(person_id, "", "", "")]
+
+
+def _code_people(cursor, people):
+    """Store codes for (id, first_name, last_name, married_name) rows."""
+    columns = list(PHONETIC_NAME_FIELDS)
+    rows = []
+    for record in people:
+        rows.extend(_phonetic_rows(record[0], dict(zip(columns, record[1:]))))
+    cursor.executemany(f"INSERT OR IGNORE INTO {PHONETIC_TABLE} VALUES (?, ?, ?, ?)", rows)
+
+
+def update_phonetic_codes(cursor, person_id):
+    """
+    Recompute the stored codes for one person; call after saving their names.
+
+    Anyone else logged as changed since the last save is coded too.
+
+    Args:
+        cursor: SQLite cursor object.
+        person_id (int): People.id of the person saved.
+    """
+    if not has_phonetic_table(cursor):
+        return
+
+    cursor.execute(f"SELECT id, {', '.join(PHONETIC_NAME_FIELDS)} FROM People WHERE id = ?", (person_id,))
+    people = cursor.fetchall()
+
+    cursor.execute(f"DELETE FROM {PHONETIC_TABLE} WHERE person_id = ?", (person_id,))
+    _code_people(cursor, people)
+    if _table_exists(cursor, PHONETIC_LOG_TABLE):
+        cursor.execute(f"DELETE FROM {PHONETIC_LOG_TABLE} WHERE person_id = ?", (person_id,))
+        sync_phonetic_codes(cursor)
+
+
+def sync_phonetic_codes(cursor):
+    """
+    Recode the people logged in PeoplePhoneticLog since they were last coded.
+
+    The caller owns the transaction.  Nothing is written when the log is empty.
+
+    Returns:
+        int: Number of people coded.
+    """
+    if not _table_exists(cursor, PHONETIC_LOG_TABLE):
+        return 0
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {PHONETIC_LOG_TABLE})")
+    if not cursor.fetchone()[0]:
+        return 0
+
+    cursor.execute(f"""
+        SELECT p.id, {', '.join(f'p.{column}' for column in PHONETIC_NAME_FIELDS)}
+        FROM {PHONETIC_LOG_TABLE} l JOIN People p ON p.id = l.person_id
+    """)
+    people = cursor.fetchall()
+    if people:
+        cursor.execute(f"DELETE FROM {PHONETIC_TABLE} WHERE person_id IN (SELECT person_id FROM {PHONETIC_LOG_TABLE})")
+        _code_people(cursor, people)
+    cursor.execute(f"DELETE FROM {PHONETIC_LOG_TABLE}")
+    return len(people)
+
+
+def refresh_phonetic_codes(cursor):
+    """
+    Compute codes for every person who has none; used by the migrations to backfill.
+
+    Returns:
+        int: Number of people coded.
+    """
+    if not has_phonetic_table(cursor):
+        return 0
+
+    cursor.execute(f"""
+        SELECT id, {', '.join(PHONETIC_NAME_FIELDS)} FROM People p
+        WHERE NOT EXISTS (SELECT 1 FROM {PHONETIC_TABLE} ph WHERE ph.person_id = p.id)
+    """)
+    people = cursor.fetchall()
+    _code_people(cursor, people)
+    return len(people)
+
+
+def rebuild_phonetic_codes(cursor):
+    """
+    Discard every stored code and code everyone again, after the coding changes.
+
+    Returns:
+        int: Number of people coded.
+    """
+    if not has_phonetic_table(cursor):
+        return 0
+
+    cursor.execute(f"DELETE FROM {PHONETIC_TABLE}")
+    if _table_exists(cursor, PHONETIC_LOG_TABLE):
+        cursor.execute(f"DELETE FROM {PHONETIC_LOG_TABLE}")
+    return refresh_phonetic_codes(cursor)
+
+
+def sounds_like_condition(cursor, alias="p", algorithm=SOUNDS_LIKE_ALGORITHM, **names):
+    """
+    SQL condition restricting People to names that sound like the search boxes.
+
+    Every word typed must share a code with some word of the matching name
+    field.  People logged as changed since they were coded (imports, other
+    tools) are coded first.
+
+    Args:
+        cursor: SQLite cursor object.
+        alias (str): Alias of the People table in the outer query.
+        algorithm (str): Key of PHONETIC_ALGORITHMS.
+        **names: Search text keyed by SOUNDS_LIKE_FIELDS (first_name, last_name).
+
+    Returns:
+        tuple: (condition, parameters); the condition is empty if nothing codable was entered.
+    """
+    refresh_before_read(cursor, sync_phonetic_codes)
+
+    prefix = f"{alias}." if alias else ""
+    conditions = []
+    parameters = []
+    for field, value in names.items():
+        name_fields = SOUNDS_LIKE_FIELDS[field]
+        for code in phonetic_codes(value, algorithm):
+            conditions.append(
+                f"{prefix}id IN (SELECT person_id FROM {PHONETIC_TABLE} "
+                f"WHERE algorithm = ? AND code = ? AND name_field IN ({', '.join('?' * len(name_fields))}))"
+            )
+            parameters.extend([algorithm, code, *name_fields])
+    return " AND ".join(conditions), parameters
@@ -1,61 +1,164 @@
-import sqlite3
-from resgroup_utils import get_or_create_resgroup
+import argparse
+from collections import Counter
+from db_utils import DB_PATH, connect
 
-def repair_resgroup_ids(db_path="phoenix.db"):
-    connection = sqlite3.connect(db_path)
+EVENT_TYPE = "Census"
+DIFF_SAMPLE_SIZE = 10
+
+
+def _key_part(value):
+    """Normalize a key column the way the per-row repair did (int where possible)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def load_resgroup_keys(cursor, event_type=EVENT_TYPE, min_id=0):
+    """
+    Map every ResGroup household key to its id in one query.
+
+    Args:
+        cursor: SQLite cursor object.
+        event_type (str): Only groups of this event type are loaded.
+        min_id (int): Only groups with a larger id are loaded.
+
+    Returns:
+        dict: (dwelling_num, household_num, res_group_year, township_id) -> lowest ResGroup id.
+    """
+    cursor.execute("""
+        SELECT id, dwelling_num, household_num, res_group_year, township_id
+        FROM ResGroups
+        WHERE event_type = ? AND id > ?
+        ORDER BY id
+    """, (event_type, min_id))
+
+    key_map = {}
+    for res_group_id, dwell_num, hh_num, year, township_id in cursor.fetchall():
+        key = (_key_part(dwell_num), _key_part(hh_num), _key_part(year), _key_part(township_id))
+        key_map.setdefault(key, res_group_id)
+    return key_map
+
+
+def plan_repair(cursor, key_map):
+    """
+    Work out which Census rows point at the wrong ResGroup.
+
+    Args:
+        cursor: SQLite cursor object.
+        key_map (dict): Household key -> ResGroup id, from load_resgroup_keys().
+
+    Returns:
+        tuple: (list of (census_id, old_res_group_id, key) to reassign,
+                list of keys that have no ResGroup yet)
+    """
+    cursor.execute("""
+        SELECT
+            id,
+            census_dwellnum,
+            census_householdnum,
+            census_year,
+            township_id,
+            res_group_id
+        FROM Census
+        WHERE census_dwellnum IS NOT NULL
+          AND census_householdnum IS NOT NULL
+          AND census_year IS NOT NULL
+          AND township_id IS NOT NULL
+    """)
+
+    reassignments = []
+    missing_keys = {}
+    for census_id, dwell_num, hh_num, year, township_id, old_res_group_id in cursor.fetchall():
+        key = (int(dwell_num), int(hh_num), int(year), int(township_id))
+        new_res_group_id = key_map.get(key)
+        if new_res_group_id is None:
+            missing_keys[key] = None
+        if new_res_group_id is None or old_res_group_id != new_res_group_id:
+            reassignments.append((census_id, old_res_group_id, key))
+
+    return reassignments, list(missing_keys)
+
+
+def create_missing_resgroups(cursor, missing_keys, key_map, event_type=EVENT_TYPE):
+    """Insert a ResGroup for each missing key in one batch and add the new ids to key_map."""
+    if not missing_keys:
+        return 0
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ResGroups")
+    max_id = cursor.fetchone()[0]
+
+    cursor.executemany("""
+        INSERT INTO ResGroups (
+            dwelling_num,
+            household_num,
+            res_group_year,
+            township_id,
+            event_type,
+            household_notes
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """, [key + (event_type, "Generated from " + event_type + " Data") for key in missing_keys])
+
+    key_map.update(load_resgroup_keys(cursor, event_type, min_id=max_id))
+    return len(missing_keys)
+
+
+def print_repair_summary(reassignments, missing_keys, key_map):
+    """Print the dry-run diff: counts by old -> new group and a few sample rows."""
+    print(f"ResGroups to create: {len(missing_keys)}")
+    for key in missing_keys[:DIFF_SAMPLE_SIZE]:
+        print(f"  + Dwelling {key[0]}, Household {key[1]}, Year {key[2]}, Township {key[3]}")
+    if len(missing_keys) > DIFF_SAMPLE_SIZE:
+        print(f"  ... and {len(missing_keys) - DIFF_SAMPLE_SIZE} more")
+
+    print(f"Census records to reassign: {len(reassignments)}")
+    moves = Counter((old, key_map.get(key, "new")) for _, old, key in reassignments)
+    for (old, new), count in moves.most_common(DIFF_SAMPLE_SIZE):
+        print(f"  ResGroup {old} ➜ {new}: {count} record(s)")
+    if len(moves) > DIFF_SAMPLE_SIZE:
+        print(f"  ... and {len(moves) - DIFF_SAMPLE_SIZE} more group change(s)")
+
+
+def repair_resgroup_ids(db_path=DB_PATH, dry_run=False):
+    """
+    Point every Census record at the ResGroup for its household key.
+
+    Existing keys are loaded into a dict once, missing groups are created in
+    one batch, and the reassignments are applied with executemany.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        dry_run (bool): Report what would change without writing anything.
+
+    Returns:
+        int: Number of Census records reassigned (or that would be).
+    """
+    connection = connect(db_path)
     cursor = connection.cursor()
 
     try:
         cursor.execute("BEGIN")
-        fixed_count = 0
-
-        # Fetch all Census records with res_group_id assigned
-        cursor.execute("""
-            SELECT 
-                id, 
-                census_dwellnum, 
-                census_householdnum, 
-                census_year, 
-                township_id, 
-                res_group_id 
-            FROM Census
-            WHERE census_dwellnum IS NOT NULL 
-              AND census_householdnum IS NOT NULL 
-              AND census_year IS NOT NULL 
-              AND township_id IS NOT NULL
-        """)
-        records = cursor.fetchall()
-
-        for row in records:
-            census_id = row[0]
-            dwell_num = int(row[1])
-            hh_num = int(row[2])
-            year = int(row[3])
-            township_id = int(row[4])
-            old_res_group_id = row[5]
-
-            # Get the corrected res_group_id using new logic
-            new_res_group_id = get_or_create_resgroup(
-                cursor,
-                census_dwellnum=dwell_num,
-                census_year=year,
-                township_id=township_id,
-                household_num=hh_num,
-                event_type="Census"
-            )
-
-            # Only update if needed
-            if old_res_group_id != new_res_group_id:
-                cursor.execute("""
-                    UPDATE Census 
-                    SET res_group_id = ? 
-                    WHERE id = ?
-                """, (new_res_group_id, census_id))
-                fixed_count += 1
-                print(f"[FIXED] Census ID {census_id} → ResGroup {old_res_group_id} ➜ {new_res_group_id}")
+
+        key_map = load_resgroup_keys(cursor)
+        reassignments, missing_keys = plan_repair(cursor, key_map)
+
+        if dry_run:
+            connection.rollback()
+            print_repair_summary(reassignments, missing_keys, key_map)
+            print("\nDry run: no changes were written.")
+            return len(reassignments)
+
+        created_count = create_missing_resgroups(cursor, missing_keys, key_map)
+        cursor.executemany("""
+            UPDATE Census
+            SET res_group_id = ?
+            WHERE id = ?
+        """, [(key_map[key], census_id) for census_id, _, key in reassignments])
 
         connection.commit()
-        print(f"\n✅ Repair complete. {fixed_count} Census records were reassigned to correct ResGroups.")
+        print(f"Created {created_count} missing ResGroups.")
+        print(f"\n✅ Repair complete. {len(reassignments)} Census records were reassigned to correct ResGroups.")
+        return len(reassignments)
 
     except Exception as e:
         connection.rollback()
@@ -63,5 +166,10 @@ def repair_resgroup_ids(db_path="phoenix.db"):
     finally:
         connection.close()
 
+
 if __name__ == "__main__":
-    repair_resgroup_ids()
+    parser = argparse.ArgumentParser(description="Reassign Census records to the ResGroup for their household key.")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    parser.add_argument("--dry-run", action="store_true", help="print a summary of the changes without writing them")
+    args = parser.parse_args()
+    repair_resgroup_ids(args.db, dry_run=args.dry_run)
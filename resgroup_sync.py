@@ -0,0 +1,253 @@
+# resgroup_sync.py
+#
+# Incremental ResGroup maintenance.  Triggers on Census (created by migration 2
+# in migrations.py) record every insert, delete and household-key change in
+# CensusChangeLog.  reconcile_resgroups() processes the log up to its current
+# high-water mark and touches only the groups those rows belong to, so
+# curated columns (ResGroups.address_id, ResGroups.record_completed,
+# ResGroupMembers.member_order) survive on everything it does not have to
+# change.  rebuild_resgroups.py remains the full drop-and-rebuild.
+#
+#   python resgroup_sync.py [db_path]
+
+import sys
+from db_utils import DB_PATH, connect
+
+CHANGE_LOG_TABLE = "CensusChangeLog"
+
+# Census columns that decide which ResGroup (and member) a row belongs to
+CENSUS_GROUP_COLUMNS = ("person_id", "census_year", "township_id", "census_dwellnum", "census_householdnum")
+
+CHANGE_LOG_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        census_id INTEGER NOT NULL,
+        old_res_group_id INTEGER,
+        change_type TEXT NOT NULL
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_census_changelog_insert
+    AFTER INSERT ON Census
+    BEGIN
+        INSERT INTO {CHANGE_LOG_TABLE} (census_id, old_res_group_id, change_type)
+        VALUES (NEW.id, NULL, 'insert');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_census_changelog_update
+    AFTER UPDATE OF {', '.join(CENSUS_GROUP_COLUMNS)} ON Census
+    WHEN {' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in CENSUS_GROUP_COLUMNS)}
+    BEGIN
+        INSERT INTO {CHANGE_LOG_TABLE} (census_id, old_res_group_id, change_type)
+        VALUES (NEW.id, OLD.res_group_id, 'update');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_census_changelog_delete
+    AFTER DELETE ON Census
+    BEGIN
+        INSERT INTO {CHANGE_LOG_TABLE} (census_id, old_res_group_id, change_type)
+        VALUES (OLD.id, OLD.res_group_id, 'delete');
+    END
+    """,
+]
+
+# Matches a ResGroup to the household key of Census row c
+GROUP_KEY_MATCH = """
+    g.res_group_year = c.census_year
+    AND g.township_id = c.township_id
+    AND g.dwelling_num = c.census_dwellnum
+    AND g.household_num = c.census_householdnum
+    AND g.event_type = 'Census'
+"""
+
+
+def create_change_log(cursor):
+    """Create the Census change log table and its triggers."""
+    for statement in CHANGE_LOG_SCHEMA:
+        cursor.execute(statement)
+
+
+def has_change_log(cursor):
+    """Return True if the Census change log exists in this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGE_LOG_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def reconcile_resgroups(cursor):
+    """
+    Bring ResGroups and ResGroupMembers in line with Census rows changed since the last run.
+
+    The caller owns the transaction, so this can run inside a census save.
+
+    Args:
+        cursor: SQLite cursor object.
+
+    Returns:
+        dict: Counts of what changed:
+            - "changes" (int): Change log rows processed.
+            - "groups_created" (int): ResGroups created for new household keys.
+            - "census_relinked" (int): Census rows moved to a different group.
+            - "census_unlinked" (int): Census rows whose key no longer names a group.
+            - "members_added" (int): ResGroupMembers rows inserted.
+            - "members_removed" (int): ResGroupMembers rows no longer backed by Census.
+            - "groups_deleted" (int): Census ResGroups left with no rows or members.
+    """
+    stats = {"changes": 0, "groups_created": 0, "census_relinked": 0, "census_unlinked": 0,
+             "members_added": 0, "members_removed": 0, "groups_deleted": 0}
+    if not has_change_log(cursor):
+        return stats
+
+    # Only process what is logged right now; later changes wait for the next run
+    cursor.execute(f"SELECT MAX(change_id), COUNT(*) FROM {CHANGE_LOG_TABLE}")
+    high_water_mark, change_count = cursor.fetchone()
+    if high_water_mark is None:
+        return stats
+    stats["changes"] = change_count
+
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ResGroupSyncCensus (census_id INTEGER PRIMARY KEY)")
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ResGroupSyncGroups (res_group_id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp.ResGroupSyncCensus")
+    cursor.execute("DELETE FROM temp.ResGroupSyncGroups")
+
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO temp.ResGroupSyncCensus (census_id)
+        SELECT census_id FROM {CHANGE_LOG_TABLE} WHERE change_id <= ?
+    """, (high_water_mark,))
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO temp.ResGroupSyncGroups (res_group_id)
+        SELECT old_res_group_id FROM {CHANGE_LOG_TABLE}
+        WHERE change_id <= ? AND old_res_group_id IS NOT NULL
+    """, (high_water_mark,))
+
+    # Groups the changed rows point at now, before relinking
+    cursor.execute("""
+        INSERT OR IGNORE INTO temp.ResGroupSyncGroups (res_group_id)
+        SELECT c.res_group_id FROM Census c
+        JOIN temp.ResGroupSyncCensus s ON s.census_id = c.id
+        WHERE c.res_group_id IS NOT NULL
+    """)
+
+    # Step 1: Create groups for household keys that do not have one yet
+    cursor.execute(f"""
+        INSERT INTO ResGroups (res_group_year, township_id, dwelling_num, household_num, event_type, household_notes)
+        SELECT DISTINCT c.census_year, c.township_id, c.census_dwellnum, c.census_householdnum,
+               'Census', 'Generated from Census Data'
+        FROM Census c
+        JOIN temp.ResGroupSyncCensus s ON s.census_id = c.id
+        WHERE c.census_dwellnum IS NOT NULL AND c.census_householdnum IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM ResGroups g WHERE {GROUP_KEY_MATCH})
+    """)
+    stats["groups_created"] = cursor.rowcount
+
+    # Step 2: Point each changed Census row at the group for its key
+    cursor.execute(f"""
+        UPDATE Census
+        SET res_group_id = k.res_group_id
+        FROM (
+            SELECT c.id AS census_id, MIN(g.id) AS res_group_id
+            FROM Census c
+            JOIN temp.ResGroupSyncCensus s ON s.census_id = c.id
+            JOIN ResGroups g ON {GROUP_KEY_MATCH}
+            GROUP BY c.id
+        ) k
+        WHERE Census.id = k.census_id
+          AND Census.res_group_id IS NOT k.res_group_id
+    """)
+    stats["census_relinked"] = cursor.rowcount
+
+    # Rows whose key is now missing or incomplete leave their old group
+    cursor.execute(f"""
+        UPDATE Census
+        SET res_group_id = NULL
+        WHERE id IN (SELECT census_id FROM temp.ResGroupSyncCensus)
+          AND res_group_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM Census c JOIN ResGroups g ON {GROUP_KEY_MATCH}
+              WHERE c.id = Census.id
+          )
+    """)
+    stats["census_unlinked"] = cursor.rowcount
+
+    cursor.execute("""
+        INSERT OR IGNORE INTO temp.ResGroupSyncGroups (res_group_id)
+        SELECT c.res_group_id FROM Census c
+        JOIN temp.ResGroupSyncCensus s ON s.census_id = c.id
+        WHERE c.res_group_id IS NOT NULL
+    """)
+
+    # Step 3: Members of the affected Census groups follow their Census rows;
+    # existing members (and their member_order) are left as they are
+    cursor.execute("""
+        INSERT INTO ResGroupMembers (res_group_id, res_group_member, res_group_role)
+        SELECT c.res_group_id, c.person_id, MIN(c.relation_to_head)
+        FROM Census c
+        JOIN temp.ResGroupSyncGroups sg ON sg.res_group_id = c.res_group_id
+        WHERE c.person_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM ResGroupMembers m
+              WHERE m.res_group_id = c.res_group_id AND m.res_group_member = c.person_id
+          )
+        GROUP BY c.res_group_id, c.person_id
+    """)
+    stats["members_added"] = cursor.rowcount
+
+    cursor.execute("""
+        DELETE FROM ResGroupMembers
+        WHERE res_group_id IN (
+              SELECT sg.res_group_id FROM temp.ResGroupSyncGroups sg
+              JOIN ResGroups g ON g.id = sg.res_group_id
+              WHERE g.event_type = 'Census'
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM Census c
+              WHERE c.res_group_id = ResGroupMembers.res_group_id
+                AND c.person_id = ResGroupMembers.res_group_member
+          )
+    """)
+    stats["members_removed"] = cursor.rowcount
+
+    # Step 4: Drop Census groups that no longer have any rows or members
+    cursor.execute("""
+        DELETE FROM ResGroups
+        WHERE id IN (SELECT res_group_id FROM temp.ResGroupSyncGroups)
+          AND event_type = 'Census'
+          AND NOT EXISTS (SELECT 1 FROM Census c WHERE c.res_group_id = ResGroups.id)
+          AND NOT EXISTS (SELECT 1 FROM ResGroupMembers m WHERE m.res_group_id = ResGroups.id)
+    """)
+    stats["groups_deleted"] = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE change_id <= ?", (high_water_mark,))
+    return stats
+
+
+def reconcile(db_path=DB_PATH):
+    """Run one reconciliation pass in its own transaction and print what changed."""
+    conn = connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        if not has_change_log(cursor):
+            print("Census change log not found; run 'python migrations.py migrate' first.")
+            return
+
+        cursor.execute("BEGIN")
+        stats = reconcile_resgroups(cursor)
+        conn.commit()
+
+        print(f"Processed {stats['changes']} Census change(s).")
+        print(f"  ResGroups created: {stats['groups_created']}, deleted: {stats['groups_deleted']}")
+        print(f"  Census rows relinked: {stats['census_relinked']}, unlinked: {stats['census_unlinked']}")
+        print(f"  Members added: {stats['members_added']}, removed: {stats['members_removed']}")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\nError during reconciliation: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    reconcile(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
@@ -2,6 +2,7 @@ import tkinter as tk
 import sqlite3
 from tkinter import ttk, messagebox
 from family_linkage import open_family_linkage_window
+from household_roster import get_household_roster
 
 # Debug mode for logging
 DEBUG_MODE = True
@@ -78,7 +79,17 @@ def show_entire_group(cursor, census_tree):
         township_id = record[4]
         dwelling_num = record[5] or "N/A"
         household_num = record[6] or "N/A"
-        address = record[8] or "Unknown Address"
+
+        if not res_group_id:
+            messagebox.showinfo("No Residence", "This Census record is not linked to a residence group.")
+            return
+
+        # The whole household, its address and completion status in one query
+        roster = get_household_roster(cursor, res_group_id)
+        if roster is None:
+            messagebox.showerror("Error", f"ResGroup {res_group_id} not found in the database.")
+            return
+        address = roster["address"] or "Unknown Address"
 
         print(f"DEBUG - Extracted values:", flush=True)
         print(f"  person_id: {person_id}", flush=True)
@@ -87,25 +98,14 @@ def show_entire_group(cursor, census_tree):
         print(f"  dwelling_num: {dwelling_num}", flush=True)
         print(f"  household_num: {household_num}", flush=True)
 
-        # Query for all members in this ResGroup
-        members_query = """
-            SELECT p.id, p.first_name, p.middle_name, p.last_name, p.married_name,
-                   c.person_age, c.person_occupation, c.relation_to_head
-            FROM Census c
-            JOIN People p ON c.person_id = p.id
-            JOIN ResGroupMembers rgm ON c.person_id = rgm.res_group_member AND c.res_group_id = rgm.res_group_id
-            WHERE c.census_year = ? AND c.census_dwellnum = ?
-            ORDER BY COALESCE(rgm.member_order, 9999)
-        """
-        cursor.execute(members_query, (census_year, dwelling_num))
-        members = cursor.fetchall()
+        members = [member for member in roster["members"] if member["in_people"] and member["census"]]
 
         if not members:
             messagebox.showinfo("No Members", "No members found in this Census residence.")
             return
         print(f"DEBUG - Found {len(members)} members in group", flush=True)
         for member in members:
-            print(f"DEBUG - Member: {member}", flush=True)
+            print(f"DEBUG - Member: {member['person_id']} (Census {member['census']['id']})", flush=True)
 
         # Create residence window
         residence_window = tk.Toplevel()
@@ -117,10 +117,11 @@ def show_entire_group(cursor, census_tree):
             messagebox.showinfo("No Members", "No members found in this Census residence.")
             return
 
-        # Add a TreeView to display the members
+        # Add a TreeView to display the members; the Census id column is hidden
         tree = ttk.Treeview(
             residence_window, 
-            columns=("ID", "Name", "Age", "Occupation", "Relation"), 
+            columns=("ID", "Name", "Age", "Occupation", "Relation", "CensusID"), 
+            displaycolumns=("ID", "Name", "Age", "Occupation", "Relation"),
             show="headings", 
             height=15
         )
@@ -136,29 +137,32 @@ def show_entire_group(cursor, census_tree):
         tree.column("Occupation", width=150)
         tree.column("Relation", width=120)
 
-        # Populate the TreeView with members
-        for member in members:
-            person_id = member[0]
-            first_name = member[1] or ""
-            middle_name = member[2] or ""
-            last_name = member[3] or ""
-            married_name = member[4] or ""
-
-            if married_name:
-                name = " ".join(filter(None, [
-                    first_name,
-                    middle_name,
-                    f"({last_name}) {married_name}" if last_name else married_name
-                ]))
-            else:
-                name = " ".join(filter(None, [first_name, middle_name, last_name]))
-
-            age = member[5] or ""
-            occupation = member[6] or ""
-            relation = member[7] or ""
-
-            tree.insert("", "end", values=(person_id, name, age, occupation, relation))
-
+        def populate_group_tree(members):
+            """Fill the TreeView with roster members."""
+            tree.delete(*tree.get_children())
+            for member in members:
+                first_name = member["first_name"] or ""
+                middle_name = member["middle_name"] or ""
+                last_name = member["last_name"] or ""
+                married_name = member["married_name"] or ""
+
+                if married_name:
+                    name = " ".join(filter(None, [
+                        first_name,
+                        middle_name,
+                        f"({last_name}) {married_name}" if last_name else married_name
+                    ]))
+                else:
+                    name = " ".join(filter(None, [first_name, middle_name, last_name]))
+
+                census = member["census"]
+                age = census.get("person_age") or ""
+                occupation = census.get("person_occupation") or ""
+                relation = census.get("relation_to_head") or ""
+
+                tree.insert("", "end", values=(member["person_id"], name, age, occupation, relation, census["id"]))
+
+        populate_group_tree(members)
         tree.pack(fill="both", expand=True, padx=10, pady=10)
 
 
@@ -188,15 +192,11 @@ def show_entire_group(cursor, census_tree):
                 messagebox.showerror("Invalid ID", f"Invalid person_id: {person_id}")
                 return
 
-            # Ensure person_id exists in the People table
-            cursor.execute("SELECT id FROM People WHERE id = ?", (person_id,))
-            if not cursor.fetchone():
-                messagebox.showerror("Error", f"Person with ID {person_id} not found in the database.")
-                return
-
             def refresh_group_tree():
                 # Refresh the parent tree with updated data
-                load_group_tree(cursor, tree, res_group_id, census_year, dwelling_num)
+                roster = get_household_roster(cursor, res_group_id)
+                if roster is not None:
+                    populate_group_tree([m for m in roster["members"] if m["in_people"] and m["census"]])
 
             from census_records import edit_census_record  # Local import
             print(f"Made it to the call to edit the record. person id is: {person_id}",flush=True)
@@ -235,9 +235,8 @@ def show_entire_group(cursor, census_tree):
         # Create BooleanVar for checkbox state
         completed_var = tk.BooleanVar()
 
-        # Get initial completion state from ResGroups table
-        cursor.execute("SELECT record_completed FROM ResGroups WHERE id = ?", (res_group_id,))
-        initial_state = cursor.fetchone()[0] or False
+        # Initial completion state from the roster
+        initial_state = roster["completed"]
         completed_var.set(initial_state)
 
         def toggle_completion():
@@ -410,6 +409,177 @@ def add_resgroup_member(cursor, res_group_id, person_id, role=""):
     return True
 
 
+def _key_value(value):
+    """A household key part as ResGroups stores it: an int where the text is one."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def get_or_create_resgroups(cursor, keys, event_type="Census"):
+    """
+    Batched get_or_create_resgroup: resolve many household keys in a few statements.
+
+    The keys are loaded into a temp table, matched against ResGroups with one
+    join, and the missing ones are created with a single INSERT ... SELECT.
+
+    Args:
+        cursor: SQLite cursor object.
+        keys (iterable): (dwelling_num, household_num, res_group_year, township_id) tuples.
+        event_type (str): Type of event ("Census", "Marriage", "Move", etc.)
+
+    Returns:
+        tuple: (dict of key -> res_group_id, list of (normalized) keys whose ResGroup was created)
+    """
+    # '12' and 12 name the same household, as they do in ResGroups' numeric columns
+    normalized = {}
+    for key in keys:
+        normalized.setdefault(tuple(key), tuple(_key_value(value) for value in key))
+    unique_keys = list(dict.fromkeys(normalized.values()))
+    if not unique_keys:
+        return {}, []
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS ResGroupKeyBatch (
+            dwelling_num, household_num, res_group_year, township_id,
+            res_group_id INTEGER, is_new INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("DELETE FROM temp.ResGroupKeyBatch")
+    cursor.executemany("""
+        INSERT INTO temp.ResGroupKeyBatch (dwelling_num, household_num, res_group_year, township_id)
+        VALUES (?, ?, ?, ?)
+    """, unique_keys)
+
+    cursor.execute("""
+        UPDATE temp.ResGroupKeyBatch
+        SET res_group_id = (
+            SELECT MIN(g.id) FROM ResGroups g
+            WHERE g.dwelling_num = ResGroupKeyBatch.dwelling_num
+              AND g.household_num = ResGroupKeyBatch.household_num
+              AND g.res_group_year = ResGroupKeyBatch.res_group_year
+              AND g.township_id = ResGroupKeyBatch.township_id
+              AND g.event_type = ?
+        )
+    """, (event_type,))
+    cursor.execute("UPDATE temp.ResGroupKeyBatch SET is_new = 1 WHERE res_group_id IS NULL")
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ResGroups")
+    max_id = cursor.fetchone()[0]
+    cursor.execute("""
+        INSERT INTO ResGroups (dwelling_num, household_num, res_group_year, township_id, event_type, household_notes)
+        SELECT dwelling_num, household_num, res_group_year, township_id, ?, ?
+        FROM temp.ResGroupKeyBatch
+        WHERE is_new
+        ORDER BY rowid
+    """, (event_type, "Generated from " + event_type + " Data"))
+
+    # The new groups are the only ones above max_id
+    cursor.execute("""
+        UPDATE temp.ResGroupKeyBatch
+        SET res_group_id = (
+            SELECT MIN(g.id) FROM ResGroups g
+            WHERE g.id > ?
+              AND g.dwelling_num IS ResGroupKeyBatch.dwelling_num
+              AND g.household_num IS ResGroupKeyBatch.household_num
+              AND g.res_group_year IS ResGroupKeyBatch.res_group_year
+              AND g.township_id IS ResGroupKeyBatch.township_id
+        )
+        WHERE is_new
+    """, (max_id,))
+
+    cursor.execute("""
+        SELECT dwelling_num, household_num, res_group_year, township_id, res_group_id, is_new
+        FROM temp.ResGroupKeyBatch
+        ORDER BY rowid
+    """)
+    resolved = {}
+    created = []
+    for key, (*_, res_group_id, is_new) in zip(unique_keys, cursor.fetchall()):
+        resolved[key] = res_group_id
+        if is_new:
+            created.append(key)
+
+    debug_log(f"Resolved {len(unique_keys)} household key(s); created {len(created)} ResGroup(s).")
+    return {key: resolved[value] for key, value in normalized.items()}, created
+
+
+def add_resgroup_members(cursor, members):
+    """
+    Batched add_resgroup_member: add many people to ResGroups in a few statements.
+
+    Groups and people are validated with one join each, and only pairs that
+    are not already members are inserted.
+
+    Args:
+        cursor: SQLite cursor object.
+        members (iterable): (res_group_id, person_id, role) tuples; role may be omitted.
+
+    Returns:
+        list: (res_group_id, person_id) pairs that were added, in input order.
+
+    Raises:
+        ValueError: If any ResGroup or person does not exist; nothing is added.
+    """
+    rows = {}
+    for member in members:
+        res_group_id, person_id = int(member[0]), int(member[1])
+        rows.setdefault((res_group_id, person_id), member[2] if len(member) > 2 else "")
+    if not rows:
+        return []
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS ResGroupMemberBatch (
+            res_group_id INTEGER NOT NULL,
+            person_id INTEGER NOT NULL,
+            role TEXT,
+            is_new INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("DELETE FROM temp.ResGroupMemberBatch")
+    cursor.executemany("""
+        INSERT INTO temp.ResGroupMemberBatch (res_group_id, person_id, role) VALUES (?, ?, ?)
+    """, [(res_group_id, person_id, role) for (res_group_id, person_id), role in rows.items()])
+
+    cursor.execute("""
+        SELECT DISTINCT b.res_group_id FROM temp.ResGroupMemberBatch b
+        WHERE NOT EXISTS (SELECT 1 FROM ResGroups g WHERE g.id = b.res_group_id)
+    """)
+    missing_groups = [row[0] for row in cursor.fetchall()]
+    if missing_groups:
+        raise ValueError(f"ResGroup(s) {', '.join(map(str, missing_groups))} do not exist")
+
+    cursor.execute("""
+        SELECT DISTINCT b.person_id FROM temp.ResGroupMemberBatch b
+        WHERE NOT EXISTS (SELECT 1 FROM People p WHERE p.id = b.person_id)
+    """)
+    missing_people = [row[0] for row in cursor.fetchall()]
+    if missing_people:
+        raise ValueError(f"Person(s) {', '.join(map(str, missing_people))} do not exist")
+
+    cursor.execute("""
+        UPDATE temp.ResGroupMemberBatch
+        SET is_new = NOT EXISTS (
+            SELECT 1 FROM ResGroupMembers m
+            WHERE m.res_group_id = ResGroupMemberBatch.res_group_id
+              AND m.res_group_member = ResGroupMemberBatch.person_id
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO ResGroupMembers (res_group_id, res_group_member, res_group_role)
+        SELECT res_group_id, person_id, role
+        FROM temp.ResGroupMemberBatch
+        WHERE is_new
+        ORDER BY rowid
+    """)
+    cursor.execute("SELECT res_group_id, person_id FROM temp.ResGroupMemberBatch WHERE is_new ORDER BY rowid")
+    added = cursor.fetchall()
+
+    debug_log(f"Added {len(added)} of {len(rows)} member(s) to ResGroups.")
+    return added
+
+
 def update_resgroup_address(cursor, res_group_id, address_id):
     """
     Update the address_id for a residential group.
@@ -0,0 +1,69 @@
+# test_ancestry.py
+#
+# Ancestry walks over People whose father/mother ids are stored as text, as
+# they are when a form saves an entry's contents, or in an untyped column.
+#
+#   python -m unittest test_ancestry
+
+import sqlite3
+import unittest
+
+from ancestry import (build_closure, create_parent_id_indexes, get_ancestors, get_descendants,
+                      get_relationship, sync_closure)
+
+
+def build_people(column_type):
+    """Person 1 is the father of 2, and 2 the father of 3; ids stored as text, '' for none."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE People (id INTEGER PRIMARY KEY, father {column_type}, mother {column_type})")
+    cursor.executemany("INSERT INTO People (id, father, mother) VALUES (?, ?, ?)",
+                       [(1, "", ""), (2, "1", ""), (3, "2", "")])
+    create_parent_id_indexes(cursor)
+    return cursor
+
+
+class TextParentIdTests(unittest.TestCase):
+    def check_chain(self, cursor):
+        self.assertEqual(get_ancestors(cursor, 3), [(2, 1), (1, 2)])
+        self.assertEqual(get_descendants(cursor, 1), [(2, 1), (3, 2)])
+
+        relationship = get_relationship(cursor, 3, 2)
+        self.assertEqual(relationship["relationship"], "parent")
+        self.assertFalse(relationship["half"])
+        self.assertEqual(get_relationship(cursor, 1, 3)["relationship"], "grandchild")
+
+        build_closure(cursor)
+        self.assertEqual(get_ancestors(cursor, 3, use_closure=True), [(2, 1), (1, 2)])
+        self.assertEqual(get_descendants(cursor, 1, use_closure=True), [(2, 1), (3, 2)])
+
+        cursor.execute("UPDATE People SET mother = '1' WHERE id = 3")
+        sync_closure(cursor)
+        self.assertEqual(get_ancestors(cursor, 3, use_closure=True), [(1, 1), (2, 1)])
+
+    def test_text_columns(self):
+        self.check_chain(build_people("TEXT"))
+
+    def test_untyped_columns(self):
+        self.check_chain(build_people(""))
+
+    def test_half_siblings_need_both_parents_recorded(self):
+        cursor = build_people("TEXT")
+        cursor.executemany("INSERT INTO People (id, father, mother) VALUES (?, ?, ?)",
+                           [(4, "1", ""), (5, "1", "9"), (6, "1", "9"), (7, "1", "8"), (8, "", ""), (9, "", "")])
+
+        # Only the father is recorded for 2 and 4, so they may be full siblings
+        self.assertEqual(get_relationship(cursor, 2, 4)["relationship"], "sibling")
+        self.assertIsNone(get_relationship(cursor, 2, 4)["half"])
+        self.assertIs(get_relationship(cursor, 5, 6)["half"], False)
+        self.assertIs(get_relationship(cursor, 5, 7)["half"], True)
+        self.assertIsNone(get_relationship(cursor, 3, 4)["half"])
+
+    def test_descendant_walk_uses_parent_id_indexes(self):
+        cursor = build_people("TEXT")
+        cursor.execute("EXPLAIN QUERY PLAN SELECT id FROM People WHERE CAST(NULLIF(father, '') AS INTEGER) = 1")
+        self.assertIn("idx_people_father_id", " ".join(row[-1] for row in cursor.fetchall()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# test_date_keys.py
+#
+# The sort keys computed in Python (backfill) and in SQL (triggers) must
+# agree, or rows sort differently depending on how they were written.
+#
+#   python -m unittest test_date_keys
+
+import sqlite3
+import unittest
+
+from date_keys import date_sort_value, decode_sort_value, sort_value_range, sort_value_sql
+
+DATES = [
+    "01-01-0999", "05-0999", "0999", "ABT 12-31-0999",
+    "05-15-1900", "1900-05-15", "05-1900", "1900", "BEF 1900", "ABT 1900", "AFT 05-1900",
+    "", "1900s", "13-1900",
+]
+
+
+class SortKeyTests(unittest.TestCase):
+    def test_python_key_matches_sql_key(self):
+        cursor = sqlite3.connect(":memory:").cursor()
+        for value in DATES:
+            with self.subTest(value=value):
+                cursor.execute(f"SELECT {sort_value_sql('?')}", (value,))
+                self.assertEqual(date_sort_value(value), cursor.fetchone()[0])
+
+    def test_years_before_1000(self):
+        self.assertEqual(date_sort_value("01-01-0999"), 99901015)
+        self.assertEqual(decode_sort_value(date_sort_value("05-0999")), (999, 5, 0, "MONTH"))
+        self.assertLess(date_sort_value("12-31-0999"), date_sort_value("1000"))
+
+    def test_range_of_a_full_date_ignores_precision(self):
+        day = date_sort_value("05-01-1880")
+        for value in ("05-01-1880", "ABT 05-01-1880", "BEF 05-01-1880", "AFT 05-01-1880"):
+            with self.subTest(value=value):
+                low, high = sort_value_range(value)
+                self.assertTrue(low <= day <= high)
+                self.assertEqual(decode_sort_value(low)[:3], decode_sort_value(high)[:3])
+
+
+if __name__ == "__main__":
+    unittest.main()
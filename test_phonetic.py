@@ -0,0 +1,39 @@
+# test_phonetic.py
+#
+# Phonetic codes and sounds-like searches for names with accents and
+# apostrophes, which must code like their plain ASCII spellings.
+#
+#   python -m unittest test_phonetic
+
+import sqlite3
+import unittest
+
+from phonetic import (PHONETIC_ALGORITHMS, create_phonetic_log, create_phonetic_table, phonetic_codes,
+                      rebuild_phonetic_codes, sounds_like_condition)
+
+
+class NameFoldingTests(unittest.TestCase):
+    def test_accented_and_apostrophized_names_code_like_plain_spellings(self):
+        for algorithm in PHONETIC_ALGORITHMS:
+            with self.subTest(algorithm=algorithm):
+                self.assertEqual(phonetic_codes("Müller", algorithm), phonetic_codes("Muller", algorithm))
+                self.assertEqual(phonetic_codes("O'Brien", algorithm), phonetic_codes("OBrien", algorithm))
+                self.assertEqual(len(phonetic_codes("O'Brien", algorithm)), 1)
+
+    def test_sounds_like_search_finds_either_spelling(self):
+        cursor = sqlite3.connect(":memory:").cursor()
+        cursor.execute("CREATE TABLE People (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, married_name TEXT)")
+        create_phonetic_table(cursor)
+        create_phonetic_log(cursor)
+        cursor.executemany("INSERT INTO People (id, first_name, last_name, married_name) VALUES (?, ?, ?, ?)",
+                           [(1, "Anna", "Müller", ""), (2, "Sean", "O'Brien", "")])
+        rebuild_phonetic_codes(cursor)
+
+        for typed, person_id in (("Muller", 1), ("Müller", 1), ("OBrien", 2), ("O'Brien", 2)):
+            condition, parameters = sounds_like_condition(cursor, last_name=typed)
+            cursor.execute(f"SELECT p.id FROM People p WHERE {condition}", parameters)
+            self.assertEqual([row[0] for row in cursor.fetchall()], [person_id], typed)
+
+
+if __name__ == "__main__":
+    unittest.main()
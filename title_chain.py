@@ -0,0 +1,463 @@
+# title_chain.py
+#
+# Chain of title: who held each parcel, and when, from Deeds, DeedParties and
+# LegalDescriptions.
+#
+# A parcel is identified by its legal description text, normalized (case,
+# spacing and punctuation ignored), so every deed describing the same land
+# the same way joins one chain.  Three tables are kept:
+#
+#   TitleParcels    legal description -> parcel key
+#   TitleTransfers  grantor -> grantee edges, one per deed and parcel, with
+#                   the kind of instrument: a conveyance, or a mortgage,
+#                   lease or assignment
+#   TitleHoldings   (person, parcel, from, until) intervals: from the deed
+#                   that conveyed it to them until the deed in which they
+#                   conveyed it away (open-ended if they never did)
+#
+# Only conveyances move ownership.  Mortgages, leases and assignments stay in
+# the chain as transfers but neither start nor end a holding; a deed is one
+# when a party's role (MORTGAGEE, LESSOR, ...) or its deed_type says so.
+#
+# Dates are date_keys sort keys, so intervals compare as integers.
+#
+# Triggers on Deeds, DeedParties and LegalDescriptions log changed deeds in
+# TitleChainLog; refresh_title_chain() recomputes only the parcels those
+# deeds touch before the next query, like the PeopleAncestry closure log.
+#
+#   python title_chain.py rebuild
+#   python title_chain.py chain <description_id>
+#   python title_chain.py held <person_id> <date>
+
+import argparse
+import re
+from collections import defaultdict
+
+from db_utils import DB_PATH, connect, refresh_before_read
+from date_keys import date_sort_value, sort_value_range
+
+PARCEL_TABLE = "TitleParcels"
+TRANSFER_TABLE = "TitleTransfers"
+HOLDING_TABLE = "TitleHoldings"
+CHAIN_LOG_TABLE = "TitleChainLog"
+
+CONVEYANCE = "conveyance"
+
+# DeedParties.party_role values (upper-cased) on each side of a conveyance
+GRANTOR_ROLES = {"GRANTOR", "SELLER", "EXECUTOR", "ADMINISTRATOR"}
+GRANTEE_ROLES = {"GRANTEE", "BUYER", "PURCHASER", "HEIR"}
+
+# Roles of instruments that do not convey ownership -> (kind, side)
+NON_CONVEYANCE_ROLES = {
+    "MORTGAGOR": ("mortgage", "grantor"),
+    "MORTGAGEE": ("mortgage", "grantee"),
+    "LESSOR": ("lease", "grantor"),
+    "LESSEE": ("lease", "grantee"),
+    "ASSIGNOR": ("assignment", "grantor"),
+    "ASSIGNEE": ("assignment", "grantee"),
+}
+
+# Words in Deeds.deed_type (upper-cased) marking an instrument that does not convey ownership
+NON_CONVEYANCE_DEED_TYPES = {"MORTGAGE": "mortgage", "LEASE": "lease", "ASSIGNMENT": "assignment"}
+
+# (trigger name, event, deeds to log)
+_LOG_TRIGGERS = [
+    ("deeds_insert", "AFTER INSERT ON Deeds", "SELECT NEW.deed_id AS deed_id"),
+    ("deeds_update", "AFTER UPDATE OF deed_id, execution_date, deed_type ON Deeds",
+     "SELECT OLD.deed_id AS deed_id UNION SELECT NEW.deed_id"),
+    ("deeds_delete", "AFTER DELETE ON Deeds", "SELECT OLD.deed_id AS deed_id"),
+    ("legaldescriptions_insert", "AFTER INSERT ON LegalDescriptions", "SELECT NEW.deed_id AS deed_id"),
+    ("legaldescriptions_update", "AFTER UPDATE ON LegalDescriptions",
+     "SELECT OLD.deed_id AS deed_id UNION SELECT NEW.deed_id"),
+    ("legaldescriptions_delete", "AFTER DELETE ON LegalDescriptions", "SELECT OLD.deed_id AS deed_id"),
+    ("deedparties_insert", "AFTER INSERT ON DeedParties", "SELECT NEW.deed_id AS deed_id"),
+    ("deedparties_update", "AFTER UPDATE ON DeedParties", "SELECT OLD.deed_id AS deed_id UNION SELECT NEW.deed_id"),
+    ("deedparties_delete", "AFTER DELETE ON DeedParties", "SELECT OLD.deed_id AS deed_id"),
+]
+
+TITLE_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {PARCEL_TABLE} (
+        description_id INTEGER PRIMARY KEY,
+        deed_id INTEGER NOT NULL,
+        parcel_key TEXT NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_titleparcels_key ON {PARCEL_TABLE} (parcel_key)",
+    f"CREATE INDEX IF NOT EXISTS idx_titleparcels_deed ON {PARCEL_TABLE} (deed_id)",
+    f"""
+    CREATE TABLE IF NOT EXISTS {TRANSFER_TABLE} (
+        parcel_key TEXT NOT NULL,
+        deed_id INTEGER NOT NULL,
+        transfer_date INTEGER,
+        grantor_id INTEGER,
+        grantee_id INTEGER,
+        transfer_kind TEXT
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_titletransfers_parcel ON {TRANSFER_TABLE} (parcel_key, transfer_date)",
+    f"CREATE INDEX IF NOT EXISTS idx_titletransfers_grantor ON {TRANSFER_TABLE} (grantor_id)",
+    f"CREATE INDEX IF NOT EXISTS idx_titletransfers_grantee ON {TRANSFER_TABLE} (grantee_id)",
+    f"""
+    CREATE TABLE IF NOT EXISTS {HOLDING_TABLE} (
+        person_id INTEGER NOT NULL,
+        parcel_key TEXT NOT NULL,
+        acquired_deed_id INTEGER,
+        held_from INTEGER,
+        released_deed_id INTEGER,
+        held_until INTEGER
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_titleholdings_person ON {HOLDING_TABLE} (person_id, held_from, held_until)",
+    f"CREATE INDEX IF NOT EXISTS idx_titleholdings_parcel ON {HOLDING_TABLE} (parcel_key)",
+    f"CREATE TABLE IF NOT EXISTS {CHAIN_LOG_TABLE} (deed_id INTEGER PRIMARY KEY)",
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{name}_title_chain
+    {event}
+    BEGIN
+        INSERT OR IGNORE INTO {CHAIN_LOG_TABLE} (deed_id)
+        SELECT deed_id FROM ({deeds}) WHERE deed_id IS NOT NULL;
+    END
+    """
+    for name, event, deeds in _LOG_TRIGGERS
+]
+
+
+def parcel_key(description_text):
+    """
+    Normalize a legal description so equal descriptions share one key.
+
+    Returns:
+        str: Upper-case words and numbers separated by single spaces ("1/4"
+            kept whole), or None for an empty description.
+    """
+    key = " ".join(re.sub(r"[^A-Z0-9/]+", " ", (description_text or "").upper()).split())
+    return key or None
+
+
+def _role_kind(role):
+    """Return (kind, side) of a party role; kind is None for conveyance roles, side None if neither."""
+    role = (role or "").strip().upper()
+    if role in GRANTOR_ROLES:
+        return None, "grantor"
+    if role in GRANTEE_ROLES:
+        return None, "grantee"
+    return NON_CONVEYANCE_ROLES.get(role, (None, None))
+
+
+def deed_type_kind(deed_type):
+    """Kind of instrument named by a deed type: "mortgage", "lease", "assignment" or None."""
+    words = set(re.findall(r"[A-Z]+", (deed_type or "").upper()))
+    for word, kind in NON_CONVEYANCE_DEED_TYPES.items():
+        if word in words:
+            return kind
+    return None
+
+
+# -------------------------------
+# BUILDING
+# -------------------------------
+
+def create_title_tables(cursor):
+    """
+    Create the chain-of-title tables, their change log and its triggers.
+
+    Tables made by an older version get the transfer_kind column and the
+    current triggers; rebuild the chain afterwards.
+    """
+    for name, _, _ in _LOG_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_{name}_title_chain")
+    for statement in TITLE_SCHEMA:
+        cursor.execute(statement)
+
+    cursor.execute(f"PRAGMA table_info({TRANSFER_TABLE})")
+    if "transfer_kind" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {TRANSFER_TABLE} ADD COLUMN transfer_kind TEXT")
+
+
+def has_title_tables(cursor):
+    """Return True if the chain-of-title tables exist in this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TRANSFER_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def _chain_rows(key, deeds):
+    """
+    Transfer and holding rows of one parcel.
+
+    Args:
+        key (str): Parcel key.
+        deeds (list): (deed_id, date key, kind, grantor ids, grantee ids) for
+            every deed describing the parcel; kind is CONVEYANCE or the kind
+            of instrument that does not convey ownership.
+
+    Returns:
+        tuple: (transfer rows, holding rows).
+    """
+    transfers, holdings = [], []
+    holders = {}  # person_id -> (acquired_deed_id, held_from)
+    for deed_id, date, kind, grantors, grantees in sorted(deeds, key=lambda deed: (deed[1] is None, deed[1] or 0, deed[0])):
+        for grantor_id in grantors or [None]:
+            for grantee_id in grantees or [None]:
+                transfers.append((key, deed_id, date, grantor_id, grantee_id, kind))
+
+        if kind != CONVEYANCE:
+            continue
+        for grantor_id in grantors:
+            # A grantor not seen acquiring it held it from an unknown date
+            acquired_deed_id, held_from = holders.pop(grantor_id, (None, None))
+            holdings.append((grantor_id, key, acquired_deed_id, held_from, deed_id, date))
+        for grantee_id in grantees:
+            holders.setdefault(grantee_id, (deed_id, date))
+
+    for person_id, (acquired_deed_id, held_from) in holders.items():
+        holdings.append((person_id, key, acquired_deed_id, held_from, None, None))
+    return transfers, holdings
+
+
+def _rebuild_parcels(cursor, keys):
+    """Recompute the transfers and holdings of the given parcel keys from TitleParcels."""
+    keys = sorted(keys)
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"DELETE FROM {TRANSFER_TABLE} WHERE parcel_key IN ({placeholders})", chunk)
+        cursor.execute(f"DELETE FROM {HOLDING_TABLE} WHERE parcel_key IN ({placeholders})", chunk)
+
+        cursor.execute(f"""
+            SELECT DISTINCT tp.parcel_key, d.deed_id, d.execution_date, d.deed_type, dp.person_id, dp.party_role
+            FROM {PARCEL_TABLE} tp
+            JOIN Deeds d ON d.deed_id = tp.deed_id
+            LEFT JOIN DeedParties dp ON dp.deed_id = d.deed_id
+            WHERE tp.parcel_key IN ({placeholders})
+        """, chunk)
+
+        deeds = defaultdict(dict)  # parcel_key -> deed_id -> [date, kind, grantors, grantees]
+        for key, deed_id, execution_date, deed_type, person_id, role in cursor.fetchall():
+            deed = deeds[key].setdefault(
+                deed_id, [date_sort_value(execution_date), deed_type_kind(deed_type) or CONVEYANCE, [], []])
+            kind, side = _role_kind(role)
+            if kind and deed[1] == CONVEYANCE:
+                deed[1] = kind
+            if person_id is not None and side:
+                party_list = deed[2] if side == "grantor" else deed[3]
+                if person_id not in party_list:
+                    party_list.append(person_id)
+
+        transfers, holdings = [], []
+        for key, by_deed in deeds.items():
+            rows = _chain_rows(key, [(deed_id, *deed) for deed_id, deed in by_deed.items()])
+            transfers.extend(rows[0])
+            holdings.extend(rows[1])
+        cursor.executemany(f"""
+            INSERT INTO {TRANSFER_TABLE} (parcel_key, deed_id, transfer_date, grantor_id, grantee_id, transfer_kind)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, transfers)
+        cursor.executemany(f"INSERT INTO {HOLDING_TABLE} VALUES (?, ?, ?, ?, ?, ?)", holdings)
+
+
+def _key_descriptions(cursor, condition="", parameters=()):
+    """Store the parcel key of the legal descriptions matching condition; return the keys."""
+    cursor.execute(f"SELECT description_id, deed_id, description_text FROM LegalDescriptions {condition}", parameters)
+    rows = [(description_id, deed_id, parcel_key(text)) for description_id, deed_id, text in cursor.fetchall()]
+    rows = [row for row in rows if row[1] is not None and row[2]]
+    cursor.executemany(f"INSERT OR REPLACE INTO {PARCEL_TABLE} VALUES (?, ?, ?)", rows)
+    return {row[2] for row in rows}
+
+
+def rebuild_title_chain(cursor):
+    """
+    Recompute every parcel's chain of title.
+
+    Returns:
+        int: Number of parcels.
+    """
+    for table in (PARCEL_TABLE, TRANSFER_TABLE, HOLDING_TABLE, CHAIN_LOG_TABLE):
+        cursor.execute(f"DELETE FROM {table}")
+    keys = _key_descriptions(cursor)
+    _rebuild_parcels(cursor, keys)
+    return len(keys)
+
+
+def refresh_title_chain(cursor):
+    """
+    Recompute the parcels touched by deeds logged as changed since the last refresh.
+
+    Returns:
+        int: Number of parcels recomputed.
+    """
+    cursor.execute(f"SELECT deed_id FROM {CHAIN_LOG_TABLE}")
+    deed_ids = [row[0] for row in cursor.fetchall()]
+    if not deed_ids:
+        return 0
+
+    keys = set()
+    for start in range(0, len(deed_ids), 500):
+        chunk = deed_ids[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"SELECT DISTINCT parcel_key FROM {PARCEL_TABLE} WHERE deed_id IN ({placeholders})", chunk)
+        keys.update(row[0] for row in cursor.fetchall())
+        cursor.execute(f"DELETE FROM {PARCEL_TABLE} WHERE deed_id IN ({placeholders})", chunk)
+        keys |= _key_descriptions(cursor, f"WHERE deed_id IN ({placeholders})", chunk)
+
+    _rebuild_parcels(cursor, keys)
+    cursor.execute(f"DELETE FROM {CHAIN_LOG_TABLE}")
+    return len(keys)
+
+
+# -------------------------------
+# QUERIES
+# -------------------------------
+
+def _names(cursor, person_ids):
+    person_ids = sorted({person_id for person_id in person_ids if person_id is not None})
+    if not person_ids:
+        return {}
+    cursor.execute(f"""
+        SELECT id, TRIM(COALESCE(first_name, '') || ' ' || COALESCE(last_name, ''))
+        FROM People WHERE id IN ({', '.join('?' * len(person_ids))})
+    """, person_ids)
+    return dict(cursor.fetchall())
+
+
+def description_parcel_key(cursor, description_id):
+    """Parcel key of a legal description, or None."""
+    if not has_title_tables(cursor):
+        return None
+    refresh_before_read(cursor, refresh_title_chain)
+    cursor.execute(f"SELECT parcel_key FROM {PARCEL_TABLE} WHERE description_id = ?", (description_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def get_title_chain(cursor, key):
+    """
+    The full chain of title of a parcel, oldest conveyance first.
+
+    Args:
+        cursor: SQLite cursor object.
+        key (str): Parcel key (see parcel_key, description_parcel_key).
+
+    Returns:
+        list: One dict per deed: "deed_id", "date" (sort key), "execution_date",
+            "deed_type", "kind" (CONVEYANCE, "mortgage", "lease" or
+            "assignment"), "grantors" and "grantees" as [(person_id, name)].
+    """
+    if not has_title_tables(cursor):
+        return []
+    refresh_before_read(cursor, refresh_title_chain)
+    cursor.execute(f"""
+        SELECT t.deed_id, t.transfer_date, d.execution_date, d.deed_type, t.transfer_kind, t.grantor_id, t.grantee_id
+        FROM {TRANSFER_TABLE} t
+        JOIN Deeds d ON d.deed_id = t.deed_id
+        WHERE t.parcel_key = ?
+        ORDER BY t.transfer_date IS NULL, t.transfer_date, t.deed_id
+    """, (key,))
+    rows = cursor.fetchall()
+    names = _names(cursor, [row[5] for row in rows] + [row[6] for row in rows])
+
+    chain = {}
+    for deed_id, date, execution_date, deed_type, kind, grantor_id, grantee_id in rows:
+        link = chain.setdefault(deed_id, {
+            "deed_id": deed_id, "date": date, "execution_date": execution_date, "deed_type": deed_type,
+            "kind": kind, "grantors": [], "grantees": [],
+        })
+        for person_id, side in ((grantor_id, "grantors"), (grantee_id, "grantees")):
+            party = (person_id, names.get(person_id, ""))
+            if person_id is not None and party not in link[side]:
+                link[side].append(party)
+    return list(chain.values())
+
+
+def parcels_held_on(cursor, person_id, on_date):
+    """
+    Every parcel a person held on a date.
+
+    A year, or a month and year, means at any time in that period: a parcel
+    acquired on 05-01-1880 or sold in March 1880 was held in "1880".
+
+    Args:
+        cursor: SQLite cursor object.
+        person_id (int): People.id.
+        on_date (str): Date in any format parse_date_input accepts.
+
+    Returns:
+        list: Dicts with "parcel_key", "acquired_deed_id", "held_from",
+            "released_deed_id", "held_until" (sort keys; None if unknown or
+            still held) and "description" (a legal description of the parcel).
+
+    Raises:
+        ValueError: If the date cannot be parsed.
+    """
+    date_range = sort_value_range(on_date)
+    if date_range is None:
+        raise ValueError(f"Invalid date: {on_date}")
+    first, last = date_range
+    if not has_title_tables(cursor):
+        return []
+    refresh_before_read(cursor, refresh_title_chain)
+    cursor.execute(f"""
+        SELECT h.parcel_key, h.acquired_deed_id, h.held_from, h.released_deed_id, h.held_until,
+               (SELECT ld.description_text FROM {PARCEL_TABLE} tp
+                JOIN LegalDescriptions ld ON ld.description_id = tp.description_id
+                WHERE tp.parcel_key = h.parcel_key LIMIT 1)
+        FROM {HOLDING_TABLE} h
+        WHERE h.person_id = ?
+          AND (h.held_from IS NULL OR h.held_from <= ?)
+          AND (h.held_until IS NULL OR h.held_until > ?)
+          AND (h.held_from IS NOT NULL OR h.held_until IS NOT NULL)
+        ORDER BY h.held_from
+    """, (person_id, last, first))
+    columns = ["parcel_key", "acquired_deed_id", "held_from", "released_deed_id", "held_until", "description"]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chain of title over Deeds, DeedParties and LegalDescriptions.")
+    parser.add_argument("command", choices=["rebuild", "chain", "held"])
+    parser.add_argument("id", nargs="?", type=int, help="description_id (chain) or person id (held)")
+    parser.add_argument("date", nargs="?", help="date for held, e.g. 1885 or 05-15-1885")
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    cursor = connection.cursor()
+    try:
+        if args.command == "rebuild":
+            cursor.execute("BEGIN")
+            create_title_tables(cursor)
+            print(f"Built the chain of title for {rebuild_title_chain(cursor)} parcels.")
+            connection.commit()
+
+        elif args.command == "chain":
+            if args.id is None:
+                parser.error("chain needs a description_id")
+            key = description_parcel_key(cursor, args.id)
+            if key is None:
+                print("No parcel found for that legal description.")
+                return
+            print(key)
+            for link in get_title_chain(cursor, key):
+                grantors = ", ".join(name or str(pid) for pid, name in link["grantors"]) or "?"
+                grantees = ", ".join(name or str(pid) for pid, name in link["grantees"]) or "?"
+                kind = "" if link["kind"] == CONVEYANCE else f" ({link['kind']})"
+                print(f"  {link['execution_date'] or 'undated':<12} {link['deed_type'] or '':<15} "
+                      f"{grantors} -> {grantees}{kind}")
+
+        else:
+            if args.id is None or not args.date:
+                parser.error("held needs a person id and a date")
+            holdings = parcels_held_on(cursor, args.id, args.date)
+            for holding in holdings:
+                print(f"  deed {holding['acquired_deed_id'] or '?'}: {holding['description'] or holding['parcel_key']}")
+            print(f"{len(holdings)} parcels held on {args.date}.")
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# window_manager.py
+#
+# Opens the person, business and membership forms as Toplevel windows inside
+# the running app instead of starting a new Python interpreter for each one.
+# Script-style forms (editme.py, members.py) are executed into a fresh module
+# per window, so each window keeps its own globals exactly as it did in its
+# own process, while heavy imports and the shared database connection are
+# paid for once.
+#
+# The scripts still run on their own from the command line: when no hosted
+# launch is in progress, create_form_window() returns a tk.Tk root and
+# run_form_mainloop() runs the event loop as before.
+
+import importlib.util
+import itertools
+import os
+import subprocess
+import sys
+import tkinter as tk
+from tkinter import messagebox
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_launches = []       # Hosted launches currently executing, innermost last
+_open_forms = {}     # (script, key) -> Toplevel, so a form is only open once
+_form_counter = itertools.count(1)
+
+
+class FormLaunch:
+    """A script form being opened inside the running app."""
+
+    def __init__(self, script, argv, on_close=None):
+        self.script = script
+        self.argv = argv
+        self.on_close = on_close
+        self.window = None
+
+
+def hosted_form():
+    """
+    Return the launch currently executing a script form.
+
+    Returns:
+        FormLaunch: The launch, or None when the script runs on its own.
+    """
+    return _launches[-1] if _launches else None
+
+
+def form_argv():
+    """Return the argument list for the running script form (sys.argv when standalone)."""
+    launch = hosted_form()
+    return launch.argv if launch else sys.argv
+
+
+def create_form_window():
+    """
+    Create the main window for a script form.
+
+    Returns:
+        tk.Tk when the script runs on its own, otherwise a Toplevel owned by
+        the running app.
+    """
+    launch = hosted_form()
+    if launch is None:
+        return tk.Tk()
+
+    window = tk.Toplevel()
+    if launch.window is None:
+        launch.window = window
+    return window
+
+
+def run_form_mainloop(window):
+    """Run the event loop for a standalone script; hosted forms share the app's loop."""
+    if hosted_form() is None:
+        window.mainloop()
+
+
+def _app_is_running():
+    # The default root goes away when a standalone script destroys its Tk window
+    return getattr(tk, "_default_root", None) is not None
+
+
+def _watch_close(key, window, on_close):
+    def on_destroy(event):
+        if event.widget is not window:
+            return
+        if _open_forms.get(key) is window:
+            del _open_forms[key]
+        if on_close:
+            on_close()
+
+    window.bind("<Destroy>", on_destroy, add="+")
+
+
+def _raise_existing(key):
+    window = _open_forms.get(key)
+    if window is None:
+        return False
+    try:
+        if window.state() == "iconic":
+            window.deiconify()
+        window.lift()
+        window.focus_force()
+        return True
+    except tk.TclError:
+        del _open_forms[key]
+        return False
+
+
+def open_script_form(script, *args, on_close=None):
+    """
+    Open a script-style form as a Toplevel window in this process.
+
+    Falls back to starting the script in a new interpreter when no Tk app is
+    running, e.g. after a standalone form has closed its own root window.
+
+    Args:
+        script (str): Script file name, e.g. "editme.py".
+        *args: Command-line arguments the script expects.
+        on_close (callable): Optional callback run when the form's window closes.
+
+    Returns:
+        tk.Toplevel: The form's main window, or None if it was not opened in process.
+    """
+    argv = [script] + [str(arg) for arg in args]
+    if not _app_is_running():
+        subprocess.Popen(["python", os.path.join(SCRIPT_DIR, script)] + argv[1:])
+        return None
+
+    key = tuple(argv)
+    if _raise_existing(key):
+        return _open_forms[key]
+
+    module_name = f"{os.path.splitext(script)[0]}_form_{next(_form_counter)}"
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, script))
+    module = importlib.util.module_from_spec(spec)
+
+    launch = FormLaunch(script, argv, on_close)
+    _launches.append(launch)
+    try:
+        spec.loader.exec_module(module)
+    except SystemExit:
+        pass  # Scripts call sys.exit() once their form is built
+    except Exception as e:
+        if launch.window is not None:
+            launch.window.destroy()
+        messagebox.showerror("Error", f"Could not open {script}: {e}")
+        return None
+    finally:
+        _launches.pop()
+
+    window = launch.window
+    if window is None or not window.winfo_exists():
+        return None
+
+    _open_forms[key] = window
+    _watch_close(key, window, on_close)
+    return window
+
+
+def open_person_form(person_id, on_close=None):
+    """Open the person edit form (editme.py) for a People id."""
+    return open_script_form("editme.py", person_id, on_close=on_close)
+
+
+def open_membership_manager(on_close=None):
+    """Open the Membership Management window (members.py)."""
+    return open_script_form("members.py", on_close=on_close)
+
+
+def open_membership_for_person(person_id, on_close=None):
+    """Open the add-membership form for a person."""
+    return open_script_form("members.py", "--for-person", person_id, on_close=on_close)
+
+
+def open_membership_edit(membership_id, on_close=None):
+    """Open the edit form for a Membership row."""
+    return open_script_form("members.py", "--edit-membership", membership_id, on_close=on_close)
+
+
+def open_business_manager():
+    """Open the Business Search window (business.py)."""
+    from business import BusinessManager
+
+    key = ("business.py",)
+    if _raise_existing(key):
+        return _open_forms[key]
+
+    window = tk.Toplevel()
+    BusinessManager(window)
+    window.geometry("1000x600")
+    _open_forms[key] = window
+    _watch_close(key, window, None)
+    return window
+
+
+def open_business_form(biz_id=None, on_close=None):
+    """Open the Edit Business form for a Biz id, or a blank form when biz_id is None."""
+    from editbiz import EditBusinessForm
+
+    if not _app_is_running():
+        subprocess.Popen(["python", os.path.join(SCRIPT_DIR, "editbiz.py")] + ([str(biz_id)] if biz_id else []))
+        return None
+
+    key = ("editbiz.py", str(biz_id))
+    if _raise_existing(key):
+        return _open_forms[key]
+
+    window = tk.Toplevel()
+    window.geometry("1300x900")
+    EditBusinessForm(window, biz_id)
+    _open_forms[key] = window
+    _watch_close(key, window, on_close)
+    return window